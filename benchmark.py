@@ -0,0 +1,335 @@
+import json
+import time
+import asyncio
+import logging
+import argparse
+import threading
+
+from typing import Dict, List
+from multiprocessing import Process, Queue, Event
+
+from parsers.fake_device import FakeDevice
+from parsers.metrics import registry
+from parsers.common import configure_logging
+from parsers.async_engine import run_devices
+from parsers.utils import create_parser, parser_package
+from parsers.warmup import warm_up
+from parsers.recording import RecordingDevice, SessionRecorder, session_path
+from parsers.tracing import Tracer, trace_parser, trace_path
+from parsers.instrumented_device import InstrumentedDevice
+from parsers.link_queue import LinkQueue, start_link_queue_manager
+
+logger = logging.getLogger(__name__)
+configure_logging(level=logging.INFO)
+
+
+def create_fake_device(serial: str, args) -> FakeDevice:
+    return FakeDevice(
+        serial=serial,
+        recording=args.recording,
+        latency=args.latency,
+        jitter=args.latency / 4,
+        feed_length=args.feed_length,
+        video_label=args.video_label,
+    )
+
+
+def summarize_device(device: FakeDevice, elapsed: float) -> Dict:
+    """Сводка по одному имитируемому устройству из журнала FakeDevice и реестра метрик."""
+    snapshot = registry.snapshot()
+
+    def counter(name: str) -> float:
+        return sum(
+            value for (metric, labels), value in snapshot["counters"].items()
+            if metric == name and dict(labels).get("serial") == device.serial
+        )
+
+    def histogram(name: str):
+        total, count = 0.0, 0
+        for (metric, labels), (_, metric_total, metric_count) in snapshot["histograms"].items():
+            if metric == name and dict(labels).get("serial") == device.serial:
+                total += metric_total
+                count += metric_count
+        return total, count
+
+    ocr_total, ocr_count = histogram("ocr_seconds")
+    links = counter("links_classified_total")
+
+    return {
+        "serial": device.serial,
+        "elapsed": round(elapsed, 3),
+        "rpc_calls": sum(device.rpc_calls.values()),
+        "gestures": len(device.gestures),
+        "swipes": counter("swipes_total"),
+        "links": links,
+        "ocr_runs": ocr_count,
+        "ocr_seconds_per_link": round(ocr_total / links, 4) if links else 0.0,
+    }
+
+
+def bench_process(serial: str, args, stop_event, link_queue, results: Queue) -> None:
+    """Процесс одного устройства для режима --engine process."""
+    fake_device = device = create_fake_device(serial, args)
+    recorder = None
+    tracer = None
+    if args.trace:
+        tracer = Tracer(trace_path(args.trace, serial), serial)
+        device = InstrumentedDevice(device, observers=[tracer.observe_rpc])
+    parser_options = dict(gesture_batch=args.gesture_batch, layout_cache=args.layout_cache)
+    if args.record:
+        recorder = SessionRecorder(
+            session_path(args.record, serial),
+            header=dict(parsing=args.parsing, duration=args.duration, parser_options=parser_options),
+        )
+        device = RecordingDevice(device, recorder)
+    warm_up(device, parser_package(args.parsing), stop_event=stop_event)
+    parser = create_parser(
+        device=device,
+        duration=args.duration,
+        parsing=args.parsing,
+        stop_event=stop_event,
+        link_queue=link_queue,
+        **parser_options,
+    )
+    if tracer is not None:
+        trace_parser(parser, tracer)
+
+    started = time.monotonic()
+    cpu_started = time.process_time()
+    parser.run()
+    if recorder is not None:
+        recorder.close()
+    if tracer is not None:
+        tracer.close()
+
+    summary = summarize_device(fake_device, time.monotonic() - started)
+    summary["cpu_seconds"] = round(time.process_time() - cpu_started, 3)
+    results.put(summary)
+
+
+def run_process_engine(serials: List[str], args, stop_event) -> List[Dict]:
+    manager = None
+    link_queue = None
+    if args.parsing == "links":
+        manager = start_link_queue_manager()
+        link_queue = manager.LinkQueue(fake_links(args.links), max_attempts=1)
+
+    results = Queue()
+    processes = [
+        Process(name=serial, target=bench_process, args=(serial, args, stop_event, link_queue, results))
+        for serial in serials
+    ]
+    for process in processes:
+        process.start()
+
+    summaries = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    if manager is not None:
+        manager.shutdown()
+    return summaries
+
+
+def run_async_engine(serials: List[str], args, stop_event) -> List[Dict]:
+    devices = {serial: create_fake_device(serial, args) for serial in serials}
+    link_queue = LinkQueue(fake_links(args.links), max_attempts=1) if args.parsing == "links" else None
+
+    started = time.monotonic()
+    cpu_started = time.process_time()
+    asyncio.run(run_devices(
+        serials=serials,
+        duration=args.duration,
+        parsing=args.parsing,
+        stop_event=stop_event,
+        link_queue=link_queue,
+        device_factory=devices.__getitem__,
+        parser_options=dict(gesture_batch=args.gesture_batch, layout_cache=args.layout_cache),
+        record_dir=args.record,
+        trace_dir=args.trace,
+    ))
+    elapsed = time.monotonic() - started
+
+    # Все устройства работают в одном процессе, CPU делится поровну
+    cpu_per_device = (time.process_time() - cpu_started) / len(serials)
+    summaries = []
+    for device in devices.values():
+        summary = summarize_device(device, elapsed)
+        summary["cpu_seconds"] = round(cpu_per_device, 3)
+        summaries.append(summary)
+    return summaries
+
+
+def fake_links(count: int) -> List[str]:
+    return [f"https://www.youtube.com/watch?v=bench{index:06d}" for index in range(count)]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарк парсеров на имитируемых устройствах")
+
+    parser.add_argument(
+        "-n", "--devices",
+        type=int,
+        default=4,
+        help="Количество имитируемых устройств (по умолчанию: 4)"
+    )
+
+    parser.add_argument(
+        "-p", "--parsing",
+        type=str,
+        choices=["links", "recommendations", "google"],
+        default="recommendations",
+        help="Тип парсинга: links, recommendations, google"
+    )
+
+    parser.add_argument(
+        "-e", "--engine",
+        type=str,
+        choices=["process", "async"],
+        default="async",
+        help="Режим запуска устройств, как в main.py (по умолчанию: async)"
+    )
+
+    parser.add_argument(
+        "-t", "--seconds",
+        type=float,
+        default=30.0,
+        help="Длительность прогона в секундах (по умолчанию: 30)"
+    )
+
+    parser.add_argument(
+        "-d", "--duration",
+        type=float,
+        default=0.5,
+        help="Длительность свайпа (по умолчанию: 0.5)"
+    )
+
+    parser.add_argument(
+        "--gesture-batch",
+        type=int,
+        default=1,
+        help="Сколько свайпов отправлять одной shell-командой, как в main.py (по умолчанию: 1)"
+    )
+
+    parser.add_argument(
+        "--layout-cache",
+        type=str,
+        default=None,
+        help="Файл кеша границ опорных элементов, как в main.py (по умолчанию: без кеша)"
+    )
+
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.02,
+        help="Средняя задержка RPC имитируемого устройства в секундах (по умолчанию: 0.02)"
+    )
+
+    parser.add_argument(
+        "--recording",
+        type=str,
+        default=None,
+        help="Каталог с записанными кадрами (пары .png/.xml), по умолчанию - синтетические кадры"
+    )
+
+    parser.add_argument(
+        "--feed-length",
+        type=int,
+        default=30,
+        help="Через сколько свайпов синтетическая лента Google заканчивается (по умолчанию: 30)"
+    )
+
+    parser.add_argument(
+        "--video-label",
+        type=str,
+        default="Comments",
+        help="Метка синтетической страницы видео: Comments, Key concepts, Sponsored (по умолчанию: Comments)"
+    )
+
+    parser.add_argument(
+        "--links",
+        type=int,
+        default=20,
+        help="Количество ссылок для режима links (по умолчанию: 20)"
+    )
+
+    parser.add_argument(
+        "--record",
+        type=str,
+        default=None,
+        help="Каталог для записи сессий имитируемых устройств (для проверки replay.py)"
+    )
+
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        help="Каталог для трассировок имитируемых устройств в формате Chrome trace event"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default=None,
+        help="Файл для сохранения результатов в JSON"
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    serials = [f"fake-{index}" for index in range(args.devices)]
+
+    logger.info(
+        f"=== Бенчмарк: {args.parsing}, движок {args.engine}, устройств {args.devices}, "
+        f"{args.seconds} сек, задержка RPC {args.latency * 1000:.0f} мс ==="
+    )
+
+    stop_event = Event()
+    timer = threading.Timer(args.seconds, stop_event.set)
+    timer.start()
+
+    try:
+        if args.engine == "process":
+            summaries = run_process_engine(serials, args, stop_event)
+        else:
+            summaries = run_async_engine(serials, args, stop_event)
+    finally:
+        timer.cancel()
+
+    for summary in summaries:
+        elapsed = max(summary["elapsed"], 1e-9)
+        summary["actions_per_second"] = round(summary["rpc_calls"] / elapsed, 2)
+        summary["swipes_per_second"] = round(summary["swipes"] / elapsed, 2)
+        summary["cpu_percent"] = round(summary["cpu_seconds"] / elapsed * 100, 2)
+        logger.info(
+            f"[{summary['serial']}] действий/с={summary['actions_per_second']} "
+            f"свайпов/с={summary['swipes_per_second']} ссылок={summary['links']:.0f} "
+            f"OCR на ссылку={summary['ocr_seconds_per_link'] * 1000:.1f} мс CPU={summary['cpu_percent']}%"
+        )
+
+    total = {
+        "parsing": args.parsing,
+        "engine": args.engine,
+        "devices": args.devices,
+        "seconds": args.seconds,
+        "latency": args.latency,
+        "actions_per_second": round(sum(summary["actions_per_second"] for summary in summaries), 2),
+        "swipes_per_second": round(sum(summary["swipes_per_second"] for summary in summaries), 2),
+        "cpu_percent_per_device": round(sum(summary["cpu_percent"] for summary in summaries) / len(summaries), 2),
+        "per_device": summaries,
+    }
+    logger.info(
+        f"Итого: действий/с={total['actions_per_second']} свайпов/с={total['swipes_per_second']} "
+        f"CPU на устройство={total['cpu_percent_per_device']}%"
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(total, file, ensure_ascii=False, indent=2)
+        logger.info(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
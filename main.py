@@ -1,38 +1,112 @@
+import os
 import time
+import socket
 import logging
 import argparse
+import threading
 import sys
 
 from pathlib import Path
 from uiautomator2 import Device
 from multiprocessing import Process, Event
 
-from parsers.common import configure_logging
-from parsers.google_parser import GoogleParser
-from parsers.youtube_parser import YoutubeParser
-from parsers.utils import get_android_devices_list
+from parsers.ocr_service import OcrService, OcrClient
+from parsers.link_queue import LinkQueue, start_link_queue_manager
+from parsers.link_source import LinkSource
+from parsers.common import LogPipeline, configure_logging, configure_worker_logging, log_context
+from parsers.async_engine import run_event_loop
+from parsers.instrumented_device import InstrumentedDevice
+from parsers.metrics import MetricsCollector, MetricsReporter, registry
+from parsers.supervisor import Supervisor
+from parsers.coordinator import Coordinator, connect_coordinator, is_loopback, parse_address, serve_coordinator
+from parsers.recording import RecordingDevice, SessionRecorder, session_path
+from parsers.tracing import Tracer, trace_parser, trace_path
+from parsers.utils import create_parser, get_android_devices_list, parser_package
+from parsers.warmup import warm_up
 
 logger = logging.getLogger(__name__)
 configure_logging(level=logging.INFO)
 
-
-def worker(serial: str, duration: float, parsing: str, stop_event: Event):
+# Период heartbeat агента; координатор снимает агента с учёта после 6 пропущенных
+AGENT_HEARTBEAT_INTERVAL = 5.0
+
+# Сырые кадры (--capture raw) читаются через adb exec мимо RecordingDevice, воспроизвести такую запись нельзя
+RAW_CAPTURE_RECORD_ERROR = "--record несовместим с --capture raw: сырые кадры не попадают в запись. Завершение работы."
+
+
+def worker(
+    serial: str,
+    duration: float,
+    parsing: str,
+    stop_event: Event,
+    ocr_client: OcrClient = None,
+    link_queue: LinkQueue = None,
+    metrics_queue=None,
+    parser_options: dict = None,
+    record_dir: str = None,
+    trace_dir: str = None,
+    log_queue=None,
+    log_rate: float = 10.0,
+):
+    configure_worker_logging(log_queue, rate=log_rate)
+    with log_context(serial=serial):
+        run_worker(
+            serial, duration, parsing, stop_event, ocr_client, link_queue, metrics_queue, parser_options,
+            record_dir, trace_dir,
+        )
+
+
+def run_worker(
+    serial: str,
+    duration: float,
+    parsing: str,
+    stop_event: Event,
+    ocr_client: OcrClient = None,
+    link_queue: LinkQueue = None,
+    metrics_queue=None,
+    parser_options: dict = None,
+    record_dir: str = None,
+    trace_dir: str = None,
+):
     logger.info(f"[{serial}] Запуск worker")
 
+    started = time.monotonic()
     device = Device(serial)
+    reporter = None
+    recorder = None
+    tracer = None
+    observers = []
+    if metrics_queue is not None:
+        observers.append(registry.observe_rpc)
+        reporter = MetricsReporter(metrics_queue, source=serial).start()
+    if trace_dir:
+        tracer = Tracer(trace_path(trace_dir, serial), serial)
+        observers.append(tracer.observe_rpc)
+    if observers:
+        device = InstrumentedDevice(device, observers=observers)
+    if record_dir:
+        recorder = SessionRecorder(
+            session_path(record_dir, serial),
+            header=dict(parsing=parsing, duration=duration, parser_options=parser_options or {}),
+        )
+        device = RecordingDevice(device, recorder)
 
     try:
-        while device.info.get("currentPackageName") == "com.android.systemui":
-            if stop_event.is_set():
-                logger.info(f"[{serial}] Получен сигнал остановки до старта")
-                return
-            logger.info(f"[{serial}] Устройство заблокировано. Ожидание разблокировки...")
-            time.sleep(0.5)
-
-        if parsing in ("links", "recommendations"):
-            parser = YoutubeParser(device=device, duration=duration, parsing=parsing)
-        else:
-            parser = GoogleParser(device=device, duration=duration)
+        if warm_up(device, parser_package(parsing), stop_event=stop_event, started=started) is None:
+            logger.info(f"[{serial}] Получен сигнал остановки до старта")
+            return
+
+        parser = create_parser(
+            device=device,
+            duration=duration,
+            parsing=parsing,
+            stop_event=stop_event,
+            ocr_client=ocr_client,
+            link_queue=link_queue,
+            **(parser_options or {}),
+        )
+        if tracer is not None:
+            trace_parser(parser, tracer)
 
         logger.info(f"[{serial}] Старт парсинга ({parsing})")
 
@@ -49,6 +123,12 @@ def worker(serial: str, duration: float, parsing: str, stop_event: Event):
 
     finally:
         device.app_stop_all()
+        if reporter is not None:
+            reporter.stop()
+        if recorder is not None:
+            recorder.close()
+        if tracer is not None:
+            tracer.close()
         logger.info(f"[{serial}] Worker завершил работу")
 
 
@@ -59,8 +139,7 @@ def parse_args():
     parser.add_argument(
         "-s", "--serials",
         nargs="+",
-        help="Список Serials",
-        required=True
+        help="Список Serials (не нужен для --coordinator)"
     )
 
     parser.add_argument(
@@ -78,73 +157,463 @@ def parse_args():
         help="Тип парсинга: links, recommendations, google"
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        "--gesture-batch",
+        type=int,
+        default=1,
+        help="Сколько свайпов отправлять на устройство одной shell-командой (по умолчанию: 1 - отдельный RPC на свайп)"
+    )
+
+    parser.add_argument(
+        "--layout-cache",
+        type=str,
+        default="layout_cache.json",
+        help="Файл кеша границ опорных элементов по модели, разрешению и версии приложения "
+             "(по умолчанию: layout_cache.json, пустая строка - отключить)"
+    )
+
+    parser.add_argument(
+        "--capture",
+        type=str,
+        choices=["png", "raw"],
+        default="png",
+        help="Снимок экрана для OCR: png - через uiautomator2, raw - сырой кадр screencap через adb, несовместим с --record (по умолчанию: png)"
+    )
+
+    parser.add_argument(
+        "--engine",
+        type=str,
+        choices=["process", "async"],
+        default="process",
+        help="Режим запуска: process - процесс на устройство, async - корутины в общем цикле событий, поток на устройство (по умолчанию: process)"
+    )
+
+    parser.add_argument(
+        "--loops",
+        type=int,
+        default=1,
+        help="Количество процессов с циклом событий для --engine async (по умолчанию: 1)"
+    )
+
+    parser.add_argument(
+        "--journal",
+        type=str,
+        default="links_journal.db",
+        help="Журнал состояний ссылок для продолжения режима links после перезапуска (по умолчанию: links_journal.db)"
+    )
+
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=9108,
+        help="Порт HTTP-эндпоинта метрик Prometheus на 127.0.0.1, 0 - без эндпоинта (по умолчанию: 9108)"
+    )
+
+    parser.add_argument(
+        "--pipelined-ocr",
+        action="store_true",
+        help="Снимать экран для OCR в отдельном потоке, пока распознаётся предыдущий кадр (режим links)"
+    )
+
+    parser.add_argument(
+        "--ocr-engines",
+        type=int,
+        default=2,
+        help="Количество процессов общего OCR-сервиса для режима links, 0 - OCR в процессе устройства (по умолчанию: 2)"
+    )
+
+    parser.add_argument(
+        "--record",
+        type=str,
+        default=None,
+        help="Каталог для записи сессий устройств (скриншоты, иерархия, жесты, OCR) для replay.py"
+    )
+
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        metavar="DIR",
+        help="Каталог для трассировок устройств в формате Chrome trace event (chrome://tracing, ui.perfetto.dev)"
+    )
+
+    parser.add_argument(
+        "--restart-backoff",
+        type=float,
+        default=5.0,
+        help="Начальная задержка перезапуска упавшего процесса в секундах, удваивается при повторных падениях (по умолчанию: 5)"
+    )
+
+    parser.add_argument(
+        "--max-restart-backoff",
+        type=float,
+        default=300.0,
+        help="Максимальная задержка перезапуска в секундах (по умолчанию: 300)"
+    )
+
+    parser.add_argument(
+        "--governor-interval",
+        type=float,
+        default=30,
+        help="Период замеров температуры и заряда устройства для регулятора темпа в секундах (по умолчанию: 30, 0 - отключить)"
+    )
+
+    parser.add_argument(
+        "--shell-sessions",
+        type=int,
+        default=2,
+        help="Сколько постоянных shell-сессий adb держать на устройство для открытия ссылок, запуска приложений и dumpsys (по умолчанию: 2, 0 - отключить)"
+    )
+
+    parser.add_argument(
+        "--coordinator",
+        type=str,
+        default=None,
+        metavar="HOST:PORT",
+        help="Режим координатора: хранить очередь ссылок и параметры запуска для агентов, слушать HOST:PORT"
+    )
+
+    parser.add_argument(
+        "--agent",
+        type=str,
+        default=None,
+        metavar="HOST:PORT",
+        help="Режим агента: брать параметры запуска и ссылки у координатора HOST:PORT"
+    )
+
+    parser.add_argument(
+        "--authkey",
+        type=str,
+        default=None,
+        help="Общий ключ координатора и агентов; обязателен для агента и для координатора, доступного из сети "
+             "(координатор на 127.0.0.1 без ключа генерирует случайный и пишет его в журнал)"
+    )
+
+    parser.add_argument(
+        "--log-file",
+        type=str,
+        default="logs/scroller.jsonl",
+        help="Файл журнала в формате JSON Lines с ротацией (по умолчанию: logs/scroller.jsonl, пустая строка - отключить)"
+    )
+
+    parser.add_argument(
+        "--log-max-mb",
+        type=float,
+        default=50,
+        help="Размер файла журнала в МБ, после которого он ротируется, хранится 5 старых файлов (по умолчанию: 50)"
+    )
+
+    parser.add_argument(
+        "--log-rate",
+        type=float,
+        default=10,
+        help="Сколько записей в секунду пропускать с одного места в коде, ошибки не ограничиваются (по умолчанию: 10, 0 - без ограничения)"
+    )
+
+    args = parser.parse_args()
+    if not args.serials and not args.coordinator:
+        parser.error("укажите устройства через -s/--serials")
+    return args
+
+
+def supervise(args, device_serials: list, link_queue, metrics_queue, stop_event, log_queue=None) -> None:
+    """Запускает процессы устройств под Supervisor до остановки или окончания ссылок.
+
+    Args:
+        args: Параметры запуска (аргументы командной строки)
+        device_serials: Белый список серийных номеров
+        link_queue: Общая очередь ссылок (локальная или координатора), None - не режим links
+        metrics_queue: Очередь MetricsCollector
+        stop_event: Общее событие остановки
+        log_queue: Очередь LogPipeline главного процесса
+    """
+    ocr_service = None
+    if args.parsing == "links" and args.ocr_engines > 0:
+        ocr_service = OcrService(
+            engines=args.ocr_engines,
+            max_pending=len(device_serials) * 2,
+            max_clients=len(device_serials),
+        )
+        ocr_service.start()
+
+    def ocr_client(serial: str):
+        # Клиент создаётся при запуске процесса устройства, в том числе подключённого позже
+        return ocr_service.client(serial) if ocr_service is not None else None
+
+    common_kwargs = dict(
+        duration=args.duration,
+        parsing=args.parsing,
+        link_queue=link_queue,
+        metrics_queue=metrics_queue,
+        record_dir=args.record,
+        trace_dir=args.trace,
+        log_queue=log_queue,
+        log_rate=args.log_rate,
+        parser_options=dict(
+            gesture_batch=args.gesture_batch,
+            capture=args.capture,
+            layout_cache=args.layout_cache,
+            governor_interval=args.governor_interval,
+            pipelined_ocr=args.pipelined_ocr,
+            shell_sessions=args.shell_sessions,
+        ),
+    )
+
+    def start_unit(name: str, serials: list, unit_stop_event) -> Process:
+        if args.engine == "async":
+            target, target_kwargs = run_event_loop, dict(
+                name=name,
+                serials=serials,
+                ocr_clients={serial: ocr_client(serial) for serial in serials},
+                stop_event=unit_stop_event,
+                **common_kwargs,
+            )
+        else:
+            target, target_kwargs = worker, dict(
+                serial=serials[0],
+                ocr_client=ocr_client(serials[0]),
+                stop_event=unit_stop_event,
+                **common_kwargs,
+            )
+
+        p = Process(name=name, target=target, kwargs=target_kwargs)
+        p.start()
+        return p
+
+    def release_links(name: str, serials: list) -> None:
+        # Ссылки, взятые завершившимся процессом, возвращаем остальным устройствам
+        if link_queue is None:
+            return
+        for serial in serials:
+            released = link_queue.release(serial)
+            if released:
+                logger.warning(f"[{serial}] Возвращено в очередь ссылок: {len(released)}")
+
+    def log_stats() -> None:
+        if ocr_service is not None:
+            logger.info(f"OCR-сервис: {ocr_service.stats()}")
+        if link_queue is not None:
+            logger.info(f"Очередь ссылок: {link_queue.stats()}")
+
+    supervisor = Supervisor(
+        allowlist=device_serials,
+        start_unit=start_unit,
+        on_exit=release_links,
+        finished=lambda: links_finished(link_queue),
+        loops=max(1, min(args.loops, len(device_serials))) if args.engine == "async" else None,
+        backoff=args.restart_backoff,
+        max_backoff=args.max_restart_backoff,
+    )
+
+    try:
+        supervisor.run(stop_event, on_tick=log_stats)
+    finally:
+        if ocr_service is not None:
+            ocr_service.stop()
+
+
+def links_finished(link_queue) -> bool:
+    """Все ссылки очереди обработаны (нет ожидающих, отложенных и выданных)."""
+    if link_queue is None:
+        return False
+    stats = link_queue.stats()
+    return stats["pending"] == 0 and stats["delayed"] == 0 and stats["in_flight"] == 0
+
+
+def run_coordinator(args) -> None:
+    """Режим координатора: очередь ссылок и параметры запуска для агентов на других компьютерах."""
+    address = parse_address(args.coordinator)
+    if not args.authkey and not is_loopback(address[0]):
+        logger.error(f"Координатор на {address[0]} доступен из сети: задайте --authkey. Завершение работы.")
+        return
+
+    link_queue = LinkQueue.from_file("links.txt", journal_path=args.journal) if args.parsing == "links" else None
+    metrics = MetricsCollector(port=args.metrics_port).start()
+
+    coordinator = Coordinator(
+        config=dict(
+            parsing=args.parsing,
+            duration=args.duration,
+            gesture_batch=args.gesture_batch,
+            capture=args.capture,
+        ),
+        link_queue=link_queue,
+        metrics_queue=metrics.queue,
+        agent_timeout=AGENT_HEARTBEAT_INTERVAL * 6,
+    )
+    server = serve_coordinator(coordinator, address, authkey=args.authkey.encode() if args.authkey else None)
+
+    last_stats = time.monotonic()
+    try:
+        while True:
+            time.sleep(AGENT_HEARTBEAT_INTERVAL)
+            coordinator.expire()
+
+            if time.monotonic() - last_stats >= 60:
+                last_stats = time.monotonic()
+                logger.info(f"Агенты: {coordinator.agents()}")
+                if link_queue is not None:
+                    logger.info(f"Очередь ссылок: {link_queue.stats()}")
+
+            if links_finished(link_queue) and not coordinator.agents():
+                logger.info("Все ссылки обработаны, агенты отключились")
+                break
+
+    except KeyboardInterrupt:
+        logger.warning("Получен сигнал прерывания (Ctrl + C). Останавливаем агентов...")
+        coordinator.stop()
+        deadline = time.monotonic() + AGENT_HEARTBEAT_INTERVAL * 3
+        while coordinator.agents() and time.monotonic() < deadline:
+            time.sleep(0.5)
+
+    finally:
+        server.stop_event.set()
+        metrics.stop()
+        if link_queue is not None:
+            logger.info(f"Очередь ссылок: {link_queue.stats()}")
+            link_queue.close()
+
+    logger.info("=== Координатор завершил работу ===")
+
+
+def run_agent(args, log_queue=None) -> None:
+    """Режим агента: устройства этого компьютера берут работу у координатора."""
+    if not args.authkey:
+        logger.error("Для режима агента нужен --authkey координатора. Завершение работы.")
+        return
+
+    address = parse_address(args.agent)
+    name = f"{socket.gethostname()}-{os.getpid()}"
+    stop_event = Event()
+
+    manager = connect_coordinator(address, authkey=args.authkey.encode())
+    coordinator = manager.Coordinator()
+    reply = coordinator.register(name, args.serials)
+
+    # Параметры парсинга задаёт координатор, параметры этого компьютера (движок, OCR, запись) - агент
+    for key, value in reply["config"].items():
+        setattr(args, key, value)
+    if args.record and args.capture == "raw":
+        logger.error(RAW_CAPTURE_RECORD_ERROR)
+        return
+    device_serials = reply["serials"]
+    if not device_serials:
+        logger.error("Координатор не принял ни одного устройства. Завершение работы.")
+        return
+
+    link_queue = manager.LinkQueue() if args.parsing == "links" else None
+    metrics = MetricsCollector(port=args.metrics_port).start()
+
+    def heartbeat() -> None:
+        while not stop_event.wait(AGENT_HEARTBEAT_INTERVAL):
+            try:
+                status = coordinator.heartbeat(name, device_serials)
+                if status == "unknown":
+                    coordinator.register(name, device_serials)
+                elif status == "stop":
+                    logger.warning("Координатор завершает работу. Останавливаем процессы...")
+                    stop_event.set()
+                coordinator.report_metrics(name, metrics.snapshot())
+            except (ConnectionError, OSError, EOFError) as e:
+                logger.warning(f"Нет связи с координатором: {e}")
+
+    threading.Thread(target=heartbeat, name="heartbeat", daemon=True).start()
+    logger.info(f"Агент {name} подключён к координатору {args.agent}, режим {args.parsing}, устройства: {device_serials}")
+
+    try:
+        supervise(args, device_serials, link_queue, metrics.queue, stop_event, log_queue)
+
+    except KeyboardInterrupt:
+        logger.warning("Получен сигнал прерывания (Ctrl + C). Останавливаем процессы...")
+        stop_event.set()
+
+    finally:
+        stop_event.set()
+        metrics.stop()
+        try:
+            coordinator.report_metrics(name, metrics.snapshot())
+            coordinator.unregister(name)
+        except (ConnectionError, OSError, EOFError) as e:
+            logger.warning(f"Не удалось сообщить координатору об отключении: {e}")
+
+    logger.info("=== Агент завершил работу ===")
 
 
 def main():
-    """Запускает процессы парсинга на всех доступных Android-устройствах."""
+    """Запускает парсеры на устройствах из списка и держит их запущенными, пока устройства подключены."""
     logger.info("=== Запуск приложения ===")
 
     args = parse_args()
+    log_pipeline = LogPipeline(
+        log_file=args.log_file or None,
+        max_bytes=int(args.log_max_mb * 1024 * 1024),
+        rate=args.log_rate,
+    ).start()
+
+    try:
+        run(args, log_pipeline.queue)
+    finally:
+        log_pipeline.stop()
+
+
+def run(args, log_queue) -> None:
+    """Выбирает режим запуска: координатор, агент или устройства этого компьютера."""
+    if args.parsing == "links" and not args.agent and not Path("links.txt").is_file():
+        logger.error("Файл links.txt не найден. Завершение работы.")
+        return
+
+    if args.record and args.capture == "raw" and not args.coordinator:
+        logger.error(RAW_CAPTURE_RECORD_ERROR)
+        return
+
+    if args.coordinator:
+        run_coordinator(args)
+        return
+
     devices = get_android_devices_list()
     attach_device_serials = [device.serial for device in devices]
-    device_serials = []
+    args.serials = list(dict.fromkeys(args.serials))
 
     for serial in args.serials:
         if serial not in attach_device_serials:
-            logger.error(f"Устройство {serial} не существует!")
-        else:
-            device_serials.append(serial)
+            logger.warning(f"Устройство {serial} не подключено, будет запущено после подключения")
 
-    if not device_serials:
-        logger.error("Устройства не найдены. Завершение работы.")
-        return
+    logger.info(f"Устройства: {args.serials}, подключены: {[s for s in args.serials if s in attach_device_serials]}")
 
-    logger.info(f"Найдено устройств: {device_serials}")
-
-    if args.parsing == "links" and not Path("links.txt").is_file():
-        logger.error("Файл links.txt не найден. Завершение работы.")
+    if args.agent:
+        run_agent(args, log_queue)
         return
 
-    processes = []
     stop_event = Event()
 
-    try:
-        for serial in device_serials:
-            p = Process(
-                name=serial,
-                target=worker,
-                args=(serial, args.duration, args.parsing, stop_event)
-            )
-            processes.append(p)
-            p.start()
-            logger.debug(f"Процесс {p.name} запущен")
+    link_manager = None
+    link_queue = None
+    if args.parsing == "links":
+        link_manager = start_link_queue_manager()
+        # Менеджеру передаётся только путь: файл отображается в память в процессе очереди
+        link_queue = link_manager.LinkQueue(LinkSource("links.txt"), journal_path=args.journal)
 
-        logger.info("Ожидание завершения процессов...")
-        for p in processes:
-            p.join()
-            logger.debug(f"Процесс {p.name} завершён")
+    metrics = MetricsCollector(port=args.metrics_port).start()
+
+    try:
+        supervise(args, args.serials, link_queue, metrics.queue, stop_event, log_queue)
 
     except KeyboardInterrupt:
         logger.warning("Получен сигнал прерывания (Ctrl + C). Останавливаем процессы...")
         stop_event.set()
 
-        for p in processes:
-            logger.debug(f"Ожидание завершения {p.name} после сигнала остановки...")
-            p.join(timeout=5)
-            if p.is_alive():
-                logger.warning(f"{p.name} не завершился вовремя. Принудительное завершение.")
-                p.terminate()
-                p.join()
-
     except Exception as e:
         logger.exception("Ошибка в главном процессе:", exc_info=True)
         stop_event.set()
-        for p in processes:
-            p.terminate()
-            p.join()
         sys.exit(1)
 
+    finally:
+        metrics.stop()
+        if link_manager is not None:
+            logger.info(f"Очередь ссылок: {link_queue.stats()}")
+            link_queue.close()
+            link_manager.shutdown()
+
     logger.info("=== Все процессы завершены ===")
 
 
@@ -0,0 +1,235 @@
+import time
+import asyncio
+import logging
+
+from uiautomator2 import Device
+from typing import Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from parsers.utils import create_parser, parser_package
+from parsers.common import configure_worker_logging
+from parsers.warmup import warm_up
+from parsers.instrumented_device import InstrumentedDevice
+from parsers.recording import RecordingDevice, SessionRecorder, session_path
+from parsers.tracing import Tracer, trace_parser, trace_path
+from parsers.metrics import MetricsReporter, registry
+
+
+logger = logging.getLogger(__name__)
+
+# Движок "поток на устройство": цикл событий управляет жизненным циклом
+# устройств (подготовка, запуск, остановка), а каждый синхронный parser.run()
+# занимает свой поток пула на всё время работы. Поэтому потоков в пуле не
+# меньше, чем устройств, и цикл событий не уменьшает их число - он экономит
+# процессы (одна группа устройств на процесс вместо процесса на устройство).
+
+# Потоки сверх количества устройств - для коротких блокирующих вызовов
+# (создание Device, app_stop_all), пока циклы парсеров заняты
+EXTRA_RPC_THREADS = 4
+
+
+async def run_device(
+    serial: str,
+    duration: float,
+    parsing: str,
+    stop_event,
+    executor: ThreadPoolExecutor,
+    ocr_client=None,
+    link_queue=None,
+    instrument: bool = False,
+    device_factory: Callable[[str], Device] = Device,
+    parser_options: Optional[Dict] = None,
+    record_dir: Optional[str] = None,
+    trace_dir: Optional[str] = None,
+) -> None:
+    """Корутина одного устройства: подготовка (warm_up) и запуск парсера.
+
+    Блокирующие вызовы uiautomator2 выполняются в пуле потоков `executor`.
+    Парсеры синхронные, поэтому цикл парсера занимает один поток пула
+    до остановки через `stop_event` (поток на устройство, а не на вызов).
+
+    Args:
+        serial: Серийный номер устройства
+        duration: Длительность свайпа в секундах
+        parsing: Тип парсинга: links, recommendations, google
+        stop_event: Событие остановки
+        executor: Пул потоков для блокирующих вызовов
+        ocr_client: Клиент общего OCR-сервиса
+        link_queue: Общая очередь ссылок
+        instrument: Замерять ли RPC устройства для метрик
+        device_factory: Конструктор устройства по серийному номеру (для бенчмарков - FakeDevice)
+        parser_options: Дополнительные параметры create_parser
+        record_dir: Каталог для записи сессии устройства, None - без записи
+        trace_dir: Каталог для трассировки устройства, None - без трассировки
+    """
+    loop = asyncio.get_running_loop()
+    logger.info(f"[{serial}] Запуск корутины устройства")
+
+    device: Optional[Device] = None
+    recorder: Optional[SessionRecorder] = None
+    tracer: Optional[Tracer] = None
+    started = time.monotonic()
+
+    try:
+        device = await loop.run_in_executor(executor, device_factory, serial)
+        observers = [registry.observe_rpc] if instrument else []
+        if trace_dir:
+            tracer = Tracer(trace_path(trace_dir, serial), serial)
+            observers.append(tracer.observe_rpc)
+        if observers:
+            device = InstrumentedDevice(device, observers=observers)
+        if record_dir:
+            recorder = SessionRecorder(
+                session_path(record_dir, serial),
+                header=dict(parsing=parsing, duration=duration, parser_options=parser_options or {}),
+            )
+            device = RecordingDevice(device, recorder)
+
+        timings = await loop.run_in_executor(
+            executor, warm_up, device, parser_package(parsing), stop_event, started,
+        )
+        if timings is None:
+            logger.info(f"[{serial}] Получен сигнал остановки до старта")
+            return
+
+        parser = create_parser(
+            device=device,
+            duration=duration,
+            parsing=parsing,
+            stop_event=stop_event,
+            ocr_client=ocr_client,
+            link_queue=link_queue,
+            **(parser_options or {}),
+        )
+        if tracer is not None:
+            trace_parser(parser, tracer)
+
+        logger.info(f"[{serial}] Старт парсинга ({parsing})")
+        await loop.run_in_executor(executor, parser.run)
+
+    except asyncio.CancelledError:
+        stop_event.set()
+        raise
+
+    except Exception as e:
+        logger.exception(f"[{serial}] Ошибка в корутине устройства: {e}", exc_info=True)
+
+    finally:
+        if device is not None:
+            await asyncio.shield(loop.run_in_executor(executor, device.app_stop_all))
+        if recorder is not None:
+            recorder.close()
+        if tracer is not None:
+            tracer.close()
+        logger.info(f"[{serial}] Корутина устройства завершила работу")
+
+
+async def run_devices(
+    serials: List[str],
+    duration: float,
+    parsing: str,
+    stop_event,
+    ocr_clients: Optional[Dict[str, object]] = None,
+    link_queue=None,
+    instrument: bool = False,
+    device_factory: Callable[[str], Device] = Device,
+    parser_options: Optional[Dict] = None,
+    record_dir: Optional[str] = None,
+    trace_dir: Optional[str] = None,
+) -> None:
+    """Запускает корутины всех устройств в одном цикле событий.
+
+    Пул потоков рассчитан на поток на устройство (его занимает parser.run())
+    плюс EXTRA_RPC_THREADS для коротких вызовов.
+
+    Args:
+        serials: Серийные номера устройств
+        duration: Длительность свайпа в секундах
+        parsing: Тип парсинга: links, recommendations, google
+        stop_event: Событие остановки
+        ocr_clients: Клиенты общего OCR-сервиса по серийным номерам
+        link_queue: Общая очередь ссылок
+        instrument: Замерять ли RPC устройств для метрик
+        device_factory: Конструктор устройства по серийному номеру
+        parser_options: Дополнительные параметры create_parser
+        record_dir: Каталог для записи сессий устройств, None - без записи
+        trace_dir: Каталог для трассировок устройств, None - без трассировки
+    """
+    ocr_clients = ocr_clients or {}
+    executor = ThreadPoolExecutor(
+        max_workers=len(serials) + EXTRA_RPC_THREADS,
+        thread_name_prefix="device",
+    )
+
+    try:
+        await asyncio.gather(*(
+            run_device(
+                serial=serial,
+                duration=duration,
+                parsing=parsing,
+                stop_event=stop_event,
+                executor=executor,
+                ocr_client=ocr_clients.get(serial),
+                link_queue=link_queue,
+                instrument=instrument,
+                device_factory=device_factory,
+                parser_options=parser_options,
+                record_dir=record_dir,
+                trace_dir=trace_dir,
+            )
+            for serial in serials
+        ))
+    except BaseException:
+        # Потоки с циклами парсеров нельзя прервать, они завершаются по stop_event
+        stop_event.set()
+        raise
+    finally:
+        executor.shutdown(wait=True)
+
+
+def run_event_loop(
+    serials: List[str],
+    duration: float,
+    parsing: str,
+    stop_event,
+    ocr_clients: Optional[Dict[str, object]] = None,
+    link_queue=None,
+    metrics_queue=None,
+    parser_options: Optional[Dict] = None,
+    record_dir: Optional[str] = None,
+    trace_dir: Optional[str] = None,
+    log_queue=None,
+    log_rate: float = 10.0,
+    name: Optional[str] = None,
+) -> None:
+    """Точка входа процесса с циклом событий для группы устройств.
+
+    `name` - постоянное имя группы у супервизора (loop-N): под ним процесс отправляет
+    метрики, поэтому перезапуск группы с другим составом устройств заменяет её
+    прежний снимок в MetricsCollector, а не добавляет второй.
+    """
+    configure_worker_logging(log_queue, rate=log_rate)
+
+    reporter = None
+    if metrics_queue is not None:
+        reporter = MetricsReporter(metrics_queue, source=name or f"loop-{serials[0]}").start()
+
+    try:
+        asyncio.run(run_devices(
+            serials=serials,
+            duration=duration,
+            parsing=parsing,
+            stop_event=stop_event,
+            ocr_clients=ocr_clients,
+            link_queue=link_queue,
+            instrument=metrics_queue is not None,
+            parser_options=parser_options,
+            record_dir=record_dir,
+            trace_dir=trace_dir,
+        ))
+    except KeyboardInterrupt:
+        # Подавляем Ctrl+C в дочернем процессе
+        logger.info(f"Прерывание по Ctrl+C — завершение цикла событий {serials}")
+    finally:
+        if reporter is not None:
+            reporter.stop()
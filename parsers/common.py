@@ -1,10 +1,241 @@
+import os
+import re
+import json
+import time
 import logging
+import threading
+import contextlib
+import contextvars
+import multiprocessing
+import logging.handlers
+
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+
+LOG_FORMAT = "[%(asctime)s.%(msecs)03d] %(module)10s:%(lineno)-3d %(levelname)-7s - %(message)s"
+LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Серийный номер в начале сообщения: "[SERIAL] ..."
+SERIAL_PREFIX = re.compile(r"^\[([^\]\s]+)\] ")
+
+# Атрибуты, которые есть у любой записи; остальные пришли через extra и попадают в JSON как поля
+_RECORD_ATTRIBUTES = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "taskName"}
+
+# Поля, общие для всех записей процесса или задачи (serial, phase)
+_log_context: contextvars.ContextVar[Dict] = contextvars.ContextVar("log_context", default={})
 
 
 def configure_logging(level=logging.INFO):
     logging.basicConfig(
         level=level,
-        datefmt="%Y-%m-%d %H:%M:%S",
-        format="[%(asctime)s.%(msecs)03d] %(module)10s:%(lineno)-3d %(levelname)-7s - %(message)s",
+        datefmt=LOG_DATE_FORMAT,
+        format=LOG_FORMAT,
     )
 
+
+@contextlib.contextmanager
+def log_context(**fields) -> Iterator[None]:
+    """Добавляет поля (serial, phase) ко всем записям журнала внутри блока.
+
+    Контекст наследуется корутинами asyncio, но не потоками пула: для них
+    серийный номер берётся из префикса "[SERIAL]" сообщения.
+    """
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Дописывает в запись поля log_context и серийный номер из префикса сообщения."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        if not hasattr(record, "serial"):
+            match = SERIAL_PREFIX.match(str(record.msg))
+            if match:
+                record.serial = match.group(1)
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Ограничивает частоту записей с одного места в коде (маркерное ведро на logger:строка).
+
+    Записи уровня ERROR и выше не ограничиваются. Число отброшенных записей
+    дописывается к следующей пропущенной записи того же места.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: int = 50) -> None:
+        """
+        Args:
+            rate: Сколько записей в секунду пропускать с одного места в среднем
+            burst: Сколько записей подряд пропускать без ограничения
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, int], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR or self.rate <= 0:
+            return True
+
+        key = (record.name, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            # [маркеры, время последнего пополнения, отброшено записей]
+            bucket = self._buckets.setdefault(key, [float(self.burst), now, 0])
+            bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} (пропущено похожих: {suppressed})"
+            record.args = None
+            record.suppressed = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись журнала одной строкой JSON: время, уровень, место, serial, phase, длительности и поля extra."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "line": f"{record.module}:{record.lineno}",
+            "process": record.processName,
+            "serial": getattr(record, "serial", None),
+            "phase": getattr(record, "phase", None),
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который не склеивает трассировку с сообщением (в JSON она - отдельное поле)."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _install_queue_handler(log_queue, rate: float, burst: int) -> None:
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    handler.addFilter(RateLimitFilter(rate=rate, burst=burst))
+
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+
+
+def configure_worker_logging(log_queue, level=logging.INFO, rate: float = 10.0, burst: int = 50) -> None:
+    """Направляет журнал дочернего процесса в очередь LogPipeline главного процесса.
+
+    Запись журнала в процессе устройства - только постановка в очередь (запись
+    в поток stderr и файл выполняет главный процесс), поэтому ввод-вывод журнала
+    не задерживает цикл парсера.
+
+    Args:
+        log_queue: LogPipeline.queue, None - оставить журнал процесса как есть
+        level: Уровень журнала процесса
+        rate: Записей в секунду с одного места в коде, 0 - без ограничения
+        burst: Записей подряд с одного места без ограничения
+    """
+    if log_queue is None:
+        return
+    _install_queue_handler(log_queue, rate=rate, burst=burst)
+    logging.getLogger().setLevel(level)
+
+
+class LogPipeline:
+    """Централизованный журнал главного процесса.
+
+    Все процессы (и главный) кладут записи в общую очередь, поток QueueListener
+    пишет их в stderr в обычном текстовом формате и, если задан файл, - строками
+    JSON с ротацией по размеру.
+    """
+
+    def __init__(
+        self,
+        log_file: Optional[str] = None,
+        max_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 5,
+        rate: float = 10.0,
+        burst: int = 50,
+    ) -> None:
+        """
+        Args:
+            log_file: Файл журнала JSON, None - только stderr
+            max_bytes: Размер файла, после которого он ротируется
+            backup_count: Сколько старых файлов хранить
+            rate: Записей в секунду с одного места в коде, 0 - без ограничения
+            burst: Записей подряд с одного места без ограничения
+        """
+        self.log_file = log_file
+        self.rate = rate
+        self.burst = burst
+        self.queue = multiprocessing.Queue(-1)
+
+        root = logging.getLogger()
+        handlers = [handler for handler in root.handlers if not isinstance(handler, _QueueHandler)]
+        if not handlers:
+            console = logging.StreamHandler()
+            console.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+            handlers.append(console)
+
+        if log_file:
+            directory = os.path.dirname(log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8",
+            )
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+
+        self._handlers = handlers
+        self._listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+
+    def start(self) -> "LogPipeline":
+        self._listener.start()
+        _install_queue_handler(self.queue, rate=self.rate, burst=self.burst)
+        return self
+
+    def stop(self) -> None:
+        """Дописывает записи из очереди и возвращает главному процессу прямой вывод."""
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        self._listener.stop()
+        for handler in self._handlers:
+            if isinstance(handler, logging.FileHandler):
+                handler.close()
+            else:
+                root.addHandler(handler)
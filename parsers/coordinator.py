@@ -0,0 +1,262 @@
+import time
+import queue
+import socket
+import logging
+import secrets
+import ipaddress
+import threading
+
+from multiprocessing.managers import BaseManager
+from typing import Dict, List, Optional, Tuple
+
+from parsers.link_queue import LinkQueue
+
+
+logger = logging.getLogger(__name__)
+
+
+class Coordinator:
+    """Общее состояние фермы устройств на нескольких компьютерах.
+
+    Координатор хранит параметры запуска и список агентов с их устройствами.
+    Агенты регистрируются, присылают heartbeat и метрики; ссылки они берут из
+    общей LinkQueue координатора. Если агент пропал (нет heartbeat дольше
+    `agent_timeout`), взятые его устройствами ссылки возвращаются в очередь.
+    """
+
+    def __init__(
+        self,
+        config: Dict,
+        link_queue: Optional[LinkQueue] = None,
+        metrics_queue=None,
+        agent_timeout: float = 30.0,
+    ) -> None:
+        """
+        Args:
+            config: Параметры запуска, которые получают агенты (parsing, duration, ...)
+            link_queue: Общая очередь ссылок для режима links
+            metrics_queue: Очередь MetricsCollector для снимков метрик агентов
+            agent_timeout: Через сколько секунд без heartbeat агент считается потерянным
+        """
+        self.config = dict(config)
+        self.link_queue = link_queue
+        self.metrics_queue = metrics_queue
+        self.agent_timeout = agent_timeout
+
+        self._lock = threading.Lock()
+        self._agents: Dict[str, Dict] = {}
+        self._stopping = False
+
+    def _owner(self, serial: str) -> Optional[str]:
+        for agent, state in self._agents.items():
+            if serial in state["serials"]:
+                return agent
+        return None
+
+    def register(self, agent: str, serials: List[str]) -> Dict:
+        """Регистрирует агента и его устройства.
+
+        Серийный номер, уже занятый другим агентом, не принимается: по нему
+        адресуются ссылки в очереди и метрики.
+
+        Args:
+            agent: Имя агента (уникальное для запуска)
+            serials: Серийные номера устройств агента
+
+        Returns:
+            {"config": параметры запуска, "serials": принятые серийные номера}
+        """
+        with self._lock:
+            accepted = []
+            for serial in serials:
+                owner = self._owner(serial)
+                if owner not in (None, agent):
+                    logger.error(f"[{serial}] Устройство уже обслуживает агент {owner}, отклонено для {agent}")
+                    continue
+                accepted.append(serial)
+
+            self._agents[agent] = {
+                "serials": accepted,
+                "online": [],
+                "registered_at": time.time(),
+                "last_seen": time.monotonic(),
+            }
+        logger.info(f"Агент {agent} зарегистрирован, устройства: {accepted}")
+        return {"config": dict(self.config), "serials": accepted}
+
+    def heartbeat(self, agent: str, online: List[str]) -> str:
+        """Отмечает агента живым.
+
+        Args:
+            agent: Имя агента
+            online: Устройства агента, которые сейчас подключены
+
+        Returns:
+            "ok"; "stop" - координатор завершает работу; "unknown" - агент был
+            признан потерянным и должен зарегистрироваться заново
+        """
+        with self._lock:
+            if self._stopping:
+                return "stop"
+            state = self._agents.get(agent)
+            if state is None:
+                return "unknown"
+            state["last_seen"] = time.monotonic()
+            state["online"] = [serial for serial in online if serial in state["serials"]]
+            return "ok"
+
+    def report_metrics(self, source: str, snapshot: Dict) -> None:
+        """Принимает снимок метрик агента (кумулятивный, как у MetricsReporter)."""
+        if self.metrics_queue is None:
+            return
+        try:
+            self.metrics_queue.put_nowait((source, snapshot))
+        except queue.Full:
+            pass
+
+    def unregister(self, agent: str) -> None:
+        """Снимает агента с учёта и возвращает в очередь ссылки его устройств."""
+        with self._lock:
+            state = self._agents.pop(agent, None)
+        if state is None:
+            return
+        self._release(agent, state["serials"])
+        logger.info(f"Агент {agent} отключился")
+
+    def _release(self, agent: str, serials: List[str]) -> None:
+        if self.link_queue is None:
+            return
+        for serial in serials:
+            released = self.link_queue.release(serial)
+            if released:
+                logger.warning(f"[{serial}] Возвращено в очередь ссылок от агента {agent}: {len(released)}")
+
+    def expire(self) -> List[str]:
+        """Снимает с учёта агентов без heartbeat дольше agent_timeout.
+
+        Returns:
+            Имена потерянных агентов
+        """
+        now = time.monotonic()
+        with self._lock:
+            lost = [
+                (agent, state["serials"]) for agent, state in self._agents.items()
+                if now - state["last_seen"] > self.agent_timeout
+            ]
+            for agent, _ in lost:
+                del self._agents[agent]
+
+        for agent, serials in lost:
+            logger.warning(f"Агент {agent} не отвечает дольше {self.agent_timeout:.0f} сек, снят с учёта")
+            self._release(agent, serials)
+        return [agent for agent, _ in lost]
+
+    def agents(self) -> Dict[str, Dict]:
+        """Состояние агентов: устройства, подключённые устройства, секунды с последнего heartbeat."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                agent: {
+                    "serials": list(state["serials"]),
+                    "online": list(state["online"]),
+                    "seen_ago": round(now - state["last_seen"], 1),
+                }
+                for agent, state in self._agents.items()
+            }
+
+    def stop(self) -> None:
+        """Просит агентов остановиться (ответ на следующий heartbeat)."""
+        self._stopping = True
+
+
+class CoordinatorManager(BaseManager):
+    """Менеджер, через который агенты обращаются к Coordinator и LinkQueue по TCP."""
+
+
+# Объекты, которые отдаёт сервер координатора (сервер работает в потоке процесса координатора)
+_served: Dict[str, object] = {}
+
+CoordinatorManager.register("Coordinator", callable=lambda: _served["coordinator"])
+CoordinatorManager.register("LinkQueue", callable=lambda: _served["link_queue"])
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """Разбирает адрес вида "host:port" (":port" - только этот компьютер, 127.0.0.1)."""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def is_loopback(host: str) -> bool:
+    """Доступен ли адрес только с этого компьютера (127.0.0.0/8, ::1, localhost)."""
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        pass
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def serve_coordinator(
+    coordinator: Coordinator,
+    address: Tuple[str, int],
+    authkey: Optional[bytes] = None,
+):
+    """Запускает TCP-сервер координатора в фоновом потоке.
+
+    Менеджер распаковывает (pickle) всё, что принимает, поэтому ключ - единственная
+    защита от выполнения чужого кода. Без ключа сервер слушает только loopback
+    со случайным ключом, который пишется в журнал.
+
+    Args:
+        coordinator: Общее состояние фермы
+        address: Адрес (host, port) для агентов
+        authkey: Общий ключ координатора и агентов, None - сгенерировать (только для loopback)
+
+    Returns:
+        Сервер менеджера; остановка - server.stop_event.set()
+
+    Raises:
+        ValueError: Адрес доступен из сети, а ключ не задан
+    """
+    if authkey is None:
+        if not is_loopback(address[0]):
+            raise ValueError(f"Координатор на {address[0]} доступен из сети: задайте ключ --authkey")
+        authkey = secrets.token_urlsafe(16).encode()
+        logger.warning(f"Ключ координатора не задан, сгенерирован случайный: --authkey {authkey.decode()}")
+
+    _served.update(coordinator=coordinator, link_queue=coordinator.link_queue)
+
+    server = CoordinatorManager(address=address, authkey=authkey).get_server()
+    threading.Thread(target=server.serve_forever, name="coordinator", daemon=True).start()
+    logger.info(f"Координатор принимает агентов на {address[0]}:{server.address[1]}")
+    return server
+
+
+def connect_coordinator(
+    address: Tuple[str, int],
+    authkey: bytes,
+    retry_interval: float = 5.0,
+    stop_event=None,
+) -> Optional[CoordinatorManager]:
+    """Подключается к координатору, повторяя попытки, пока он недоступен.
+
+    Args:
+        address: Адрес координатора (host, port)
+        authkey: Общий ключ координатора и агентов
+        retry_interval: Пауза между попытками в секундах
+        stop_event: Событие остановки, прерывающее попытки
+
+    Returns:
+        Подключённый менеджер или None, если получен сигнал остановки
+    """
+    while stop_event is None or not stop_event.is_set():
+        manager = CoordinatorManager(address=address, authkey=authkey)
+        try:
+            manager.connect()
+            return manager
+        except (ConnectionError, OSError) as e:
+            logger.warning(f"Координатор {address[0]}:{address[1]} недоступен: {e}. Повтор через {retry_interval:.0f} сек")
+            time.sleep(retry_interval)
+    return None
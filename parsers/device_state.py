@@ -0,0 +1,218 @@
+import logging
+
+from uiautomator2 import Device
+from typing import Dict, Optional, Set, Tuple
+
+from parsers.snapshot import HierarchySnapshot
+from parsers.layout_cache import LayoutCache
+from parsers.shell_pool import ShellPool
+
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceState:
+    """Кеш геометрии и состояния устройства поверх uiautomator2.Device.
+
+    Размер экрана, ориентация и границы опорных элементов (батарея, нижняя панель)
+    читаются с устройства один раз и сбрасываются только при смене ориентации
+    или текущего пакета.
+
+    С `layout_cache` границы опорных элементов переживают перезапуск: при промахе
+    кеша в памяти они берутся с диска по отпечатку раскладки (layout_key). Границы
+    с диска считаются непроверенными (has_anchor - False), пока не сверены с живым
+    UI: парсер снимает один снимок иерархии до первого свайпа по ним, дальше они
+    сверяются по снимкам, которые парсер и так получает.
+    """
+
+    def __init__(
+        self,
+        device: Device,
+        layout_cache: Optional[LayoutCache] = None,
+        shell: Optional[ShellPool] = None,
+    ) -> None:
+        """
+        Args:
+            device: Экземпляр устройства uiautomator2
+            layout_cache: Сохраняемый кеш границ опорных элементов, None - без него
+            shell: Пул shell-сессий для запуска приложений, None - device.app_start
+        """
+        self.device = device
+        self.layout_cache = layout_cache
+        self.shell = shell
+
+        self._info: Optional[Dict] = None
+        self._anchors: Dict[Tuple, Tuple[int, int, int, int]] = {}
+        self._unverified: Set[Tuple] = set()
+        self._app_versions: Dict[str, str] = {}
+
+    def _load_info(self) -> Dict:
+        if self._info is None:
+            info = self.device.info
+            self._info = {
+                "displayWidth": info["displayWidth"],
+                "displayHeight": info["displayHeight"],
+                "displayRotation": info.get("displayRotation"),
+                "currentPackageName": info.get("currentPackageName"),
+                "productName": info.get("productName"),
+                "displaySizeDpX": info.get("displaySizeDpX"),
+            }
+        return self._info
+
+    @property
+    def display_width(self) -> int:
+        return self._load_info()["displayWidth"]
+
+    @property
+    def display_height(self) -> int:
+        return self._load_info()["displayHeight"]
+
+    @property
+    def rotation(self) -> Optional[int]:
+        return self._load_info()["displayRotation"]
+
+    @property
+    def package(self) -> Optional[str]:
+        return self._load_info()["currentPackageName"]
+
+    def app_version(self, package_name: str) -> str:
+        """Версия приложения (один запрос за сессию на пакет)."""
+        version = self._app_versions.get(package_name)
+        if version is None:
+            try:
+                version = str(self.device.app_info(package_name)["versionName"])
+            except Exception as e:
+                logger.debug(f"[{self.device.serial}] Версия {package_name} неизвестна: {e}")
+                version = "unknown"
+            self._app_versions[package_name] = version
+        return version
+
+    def layout_key(self) -> str:
+        """Отпечаток раскладки экрана: модель, разрешение, плотность, поворот и версия текущего приложения."""
+        info = self._load_info()
+        width_dp = info["displaySizeDpX"]
+        density = round(info["displayWidth"] * 160 / width_dp) if width_dp else "unknown"
+        package = info["currentPackageName"] or "unknown"
+        return (
+            f"{info['productName'] or 'unknown'}|{info['displayWidth']}x{info['displayHeight']}|"
+            f"{density}dpi|rotation{info['displayRotation']}|{package}@{self.app_version(package)}"
+        )
+
+    def has_anchor(self, **selector) -> bool:
+        """Известны ли сверенные с UI границы элемента, так что снимок иерархии для них не нужен.
+
+        Границы из кеша раскладок до сверки со снимком не считаются известными:
+        они могли устареть (другая версия интерфейса при той же версии приложения).
+        """
+        key = tuple(sorted(selector.items()))
+        return key in self._anchors and key not in self._unverified
+
+    def anchor_bounds(self, snapshot: Optional[HierarchySnapshot] = None, **selector) -> Tuple[int, int, int, int]:
+        """Возвращает границы опорного элемента, запрашивая их только при промахе кеша.
+
+        Args:
+            snapshot: Снимок иерархии текущего шага; при промахе кеша границы берутся
+                из него, а RPC селектора выполняется, только если элемента в снимке нет
+            **selector: Параметры селектора uiautomator2 (resourceId, description, ...)
+
+        Returns:
+            Границы элемента (left, top, right, bottom)
+        """
+        key = tuple(sorted(selector.items()))
+        bounds = self._anchors.get(key)
+        if bounds is not None:
+            return bounds
+
+        layout = self.layout_key() if self.layout_cache is not None else None
+        if layout is not None:
+            bounds = self.layout_cache.get(layout, selector)
+            if bounds is not None:
+                self._anchors[key] = bounds
+                self._unverified.add(key)
+                if snapshot is not None:
+                    self.verify_anchors(snapshot)
+                return self._anchors[key]
+
+        if snapshot is not None and snapshot.exists(**selector):
+            bounds = snapshot.bounds(**selector)
+        else:
+            bounds = tuple(self.device(**selector).bounds())
+        self._anchors[key] = bounds
+        if layout is not None:
+            self.layout_cache.put(layout, selector, bounds)
+        return bounds
+
+    def verify_anchors(self, snapshot: HierarchySnapshot) -> bool:
+        """Сверяет взятые с диска границы со снимком иерархии (без RPC).
+
+        Каждая запись проверяется один раз - в первом снимке, где есть её элемент;
+        при расхождении границы обновляются в памяти и на диске.
+
+        Args:
+            snapshot: Снимок иерархии, уже полученный парсером
+
+        Returns:
+            True, если какие-то границы изменились
+        """
+        changed = False
+        for key in list(self._unverified):
+            selector = dict(key)
+            if not snapshot.exists(**selector):
+                continue
+
+            self._unverified.discard(key)
+            bounds = snapshot.bounds(**selector)
+            if bounds != self._anchors.get(key):
+                logger.info(
+                    f"[{self.device.serial}] Границы {selector} изменились: {self._anchors.get(key)} -> {bounds}"
+                )
+                self._anchors[key] = bounds
+                self.layout_cache.put(self.layout_key(), selector, bounds)
+                changed = True
+        return changed
+
+    def invalidate(self) -> None:
+        """Сбрасывает все закешированные значения."""
+        self._info = None
+        self._anchors.clear()
+        self._unverified.clear()
+
+    def check(self) -> bool:
+        """Сверяет ориентацию и текущий пакет с устройством (один RPC).
+
+        Returns:
+            True, если состояние изменилось и кеш был сброшен
+        """
+        cached = self._info
+        self._info = None
+        current = self._load_info()
+
+        if cached is None:
+            return False
+
+        changed = (
+            cached["displayRotation"] != current["displayRotation"]
+            or cached["currentPackageName"] != current["currentPackageName"]
+        )
+        if changed:
+            logger.debug(
+                f"[{self.device.serial}] Состояние устройства изменилось: "
+                f"{cached['currentPackageName']}/{cached['displayRotation']} -> "
+                f"{current['currentPackageName']}/{current['displayRotation']}"
+            )
+            self._anchors.clear()
+            self._unverified.clear()
+        return changed
+
+    def set_orientation(self, orientation: str) -> None:
+        """Устанавливает ориентацию экрана и сбрасывает кеш."""
+        self.device.orientation = orientation
+        self.invalidate()
+
+    def app_start(self, package_name: str) -> None:
+        """Запускает приложение и сбрасывает кеш."""
+        if self.shell is not None:
+            self.shell.app_start(package_name)
+        else:
+            self.device.app_start(package_name=package_name)
+        self.invalidate()
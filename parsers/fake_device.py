@@ -0,0 +1,268 @@
+import time
+import random
+import threading
+import xml.etree.ElementTree as ElementTree
+
+from pathlib import Path
+from PIL import Image
+from typing import Dict, List, Optional, Tuple
+
+from parsers.snapshot import SELECTOR_ATTRIBUTES, parse_bounds
+
+
+def synthetic_hierarchy(width: int, height: int, labels: Tuple[str, ...] = (), loading: bool = False) -> str:
+    """Строит минимальный дамп иерархии с опорными элементами парсеров.
+
+    Args:
+        width: Ширина экрана
+        height: Высота экрана
+        labels: Дополнительные узлы с content-desc (например, "Comments", "More stories")
+        loading: Добавить индикатор загрузки (ProgressBar) по центру экрана
+
+    Returns:
+        XML в формате device.dump_hierarchy()
+    """
+    nodes = [
+        ("com.android.systemui:id/battery", "", "android.widget.LinearLayout", (width - 150, 0, width - 50, 60)),
+        ("com.google.android.youtube:id/bottom_bar_container", "", "android.widget.FrameLayout", (0, height - 180, width, height)),
+        ("", "Home", "android.widget.Button", (0, height - 180, width // 5, height)),
+        ("com.google.android.youtube:id/watch_player", "", "android.view.ViewGroup", (0, 60, width, 60 + width * 9 // 16)),
+        ("com.google.android.youtube:id/action_bar_root", "", "android.widget.LinearLayout", (0, 0, width, height)),
+        ("com.google.android.googlequicksearchbox:id/googleapp_navigation_bar_discover", "", "android.widget.Button", (0, height - 160, width // 3, height)),
+    ]
+    nodes += [("", label, "android.view.View", (0, height // 2, width, height // 2 + 80)) for label in labels]
+    if loading:
+        nodes.append(("", "", "android.widget.ProgressBar", (width // 2 - 60, height // 2 - 60, width // 2 + 60, height // 2 + 60)))
+
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<hierarchy rotation="0">']
+    for index, (resource_id, description, class_name, (left, top, right, bottom)) in enumerate(nodes):
+        lines.append(
+            f'<node index="{index}" text="" resource-id="{resource_id}" class="{class_name}" '
+            f'content-desc="{description}" bounds="[{left},{top}][{right},{bottom}]" />'
+        )
+    lines.append("</hierarchy>")
+    return "\n".join(lines)
+
+
+class FakeUiObject:
+    """Результат селектора FakeDevice(...): поиск выполняется по текущему дампу иерархии."""
+
+    def __init__(self, device: "FakeDevice", selector: Dict[str, str]) -> None:
+        self.device = device
+        self.selector = selector
+
+    def _find(self) -> Optional[ElementTree.Element]:
+        root = ElementTree.fromstring(self.device.current_hierarchy())
+        for node in root.iter("node"):
+            if all(node.get(SELECTOR_ATTRIBUTES.get(key, key), "") == value for key, value in self.selector.items()):
+                return node
+        return None
+
+    def exists(self, timeout: float = 0) -> bool:
+        self.device.rpc("selector.exists")
+        return self._find() is not None
+
+    def bounds(self) -> Tuple[int, int, int, int]:
+        self.device.rpc("selector.bounds")
+        node = self._find()
+        if node is None:
+            raise LookupError(f"Элемент не найден: {self.selector}")
+        return parse_bounds(node.get("bounds"))
+
+    def click(self, timeout: Optional[float] = None) -> None:
+        self.device.rpc("selector.click")
+        self.device.record_gesture("click", selector=self.selector)
+        if self.selector.get("resourceId", "").endswith("googleapp_navigation_bar_discover"):
+            self.device.position = 0
+        if self.selector.get("description") == "Home":
+            self.device.position = 0
+
+
+class FakeDevice:
+    """Имитация uiautomator2.Device для бенчмарков без подключённых телефонов.
+
+    Отдаёт записанные скриншоты и дампы иерархии (или синтетические), добавляет
+    задержку к каждому RPC, хранит позицию прокрутки и журнал жестов.
+
+    Формат записи: каталог с парами файлов <кадр>.png и <кадр>.xml; кадры
+    сортируются по имени, каждый свайп вниз переходит к следующему кадру.
+    """
+
+    def __init__(
+        self,
+        serial: str = "fake-0",
+        recording: Optional[str] = None,
+        latency: float = 0.02,
+        jitter: float = 0.005,
+        size: Tuple[int, int] = (1080, 2400),
+        feed_length: int = 30,
+        video_label: str = "Comments",
+        seed: Optional[int] = None,
+        load_time: float = 0.3,
+    ) -> None:
+        """
+        Args:
+            serial: Серийный номер
+            recording: Каталог с записанными кадрами, None - синтетические кадры
+            latency: Средняя задержка RPC в секундах
+            jitter: Разброс задержки RPC в секундах
+            size: Размер экрана (ширина, высота) для синтетических кадров
+            feed_length: Через сколько свайпов синтетическая лента Google показывает "More stories"
+            video_label: Метка синтетической страницы видео после открытия ссылки
+            seed: Начальное значение генератора задержек
+            load_time: Сколько секунд после открытия ссылки страница видео загружается (спиннер без меток)
+        """
+        self.serial = serial
+        self.latency = latency
+        self.jitter = jitter
+        self.width, self.height = size
+        self.feed_length = feed_length
+        self.video_label = video_label
+        self.load_time = load_time
+
+        self.position: int = 0
+        self.orientation: str = "natural"
+        self.current_package: str = "com.android.launcher"
+        self.gestures: List[Tuple[float, str, Dict]] = []
+        self.rpc_calls: Dict[str, int] = {}
+        # Состояние для `dumpsys battery` / `dumpsys thermalservice` (можно менять во время бенчмарка)
+        self.battery_level: int = 80
+        self.battery_temperature: float = 32.0
+        self.thermal_status: int = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._watching = False
+        self._loading_until = 0.0
+        self._frames: List[Tuple[Path, Path]] = []
+        if recording is not None:
+            directory = Path(recording)
+            self._frames = [
+                (image, image.with_suffix(".xml"))
+                for image in sorted(directory.glob("*.png"))
+                if image.with_suffix(".xml").is_file()
+            ]
+            if not self._frames:
+                raise FileNotFoundError(f"В {recording} нет пар кадров .png/.xml")
+
+    def rpc(self, method: str) -> None:
+        """Имитирует задержку RPC и считает вызовы."""
+        with self._lock:
+            self.rpc_calls[method] = self.rpc_calls.get(method, 0) + 1
+            delay = max(0.0, self._random.gauss(self.latency, self.jitter))
+        time.sleep(delay)
+
+    def record_gesture(self, kind: str, **details) -> None:
+        with self._lock:
+            self.gestures.append((time.monotonic(), kind, details))
+
+    def current_hierarchy(self) -> str:
+        if self._frames:
+            return self._frames[self.position % len(self._frames)][1].read_text(encoding="utf-8")
+
+        labels: Tuple[str, ...] = ()
+        if self._watching and time.monotonic() < self._loading_until:
+            return synthetic_hierarchy(self.width, self.height, loading=True)
+        if self._watching:
+            labels = (self.video_label,)
+        elif self.position and self.position % self.feed_length == 0:
+            labels = ("More stories",)
+        return synthetic_hierarchy(self.width, self.height, labels)
+
+    @property
+    def info(self) -> Dict:
+        self.rpc("info")
+        return {
+            "displayWidth": self.width,
+            "displayHeight": self.height,
+            "displayRotation": 0,
+            "displaySizeDpX": round(self.width * 160 / 420),
+            "currentPackageName": self.current_package,
+            "productName": "fake",
+        }
+
+    def __call__(self, **selector) -> FakeUiObject:
+        return FakeUiObject(self, selector)
+
+    def click(self, x: int, y: int) -> None:
+        self.rpc("click")
+        self.record_gesture("click", point=(x, y))
+
+    def dump_hierarchy(self, *args, **kwargs) -> str:
+        self.rpc("dump_hierarchy")
+        return self.current_hierarchy()
+
+    def screenshot(self, *args, **kwargs) -> Image.Image:
+        self.rpc("screenshot")
+        if self._frames:
+            with Image.open(self._frames[self.position % len(self._frames)][0]) as image:
+                return image.convert("RGB")
+        return Image.new("RGB", (self.width, self.height), (255, 255, 255))
+
+    def swipe_points(self, points: List[Tuple[int, int]], duration: float = 0.5) -> None:
+        self.rpc("swipe_points")
+        time.sleep(duration)
+        (_, start_y), (_, end_y) = points[0], points[-1]
+        if end_y < start_y:
+            self.position += 1
+        else:
+            # Свайп вниз у верхней границы - обновление ленты
+            self.position = 0
+        self.record_gesture("swipe", points=points, duration=duration)
+
+    def shell(self, command, *args, **kwargs) -> str:
+        """Выполняет shell-команду: открытие ссылки, `input swipe`, `sleep`, `echo` с $EPOCHREALTIME и `dumpsys` батареи."""
+        self.rpc("shell")
+        output = []
+
+        for part in str(command).split(";"):
+            words = part.split()
+            if not words:
+                continue
+
+            if "android.intent.action.VIEW" in part:
+                self.position = 0
+                self._watching = True
+                self._loading_until = time.monotonic() + self.load_time
+            elif words[:2] == ["input", "swipe"] and len(words) >= 6:
+                start_y, end_y = int(words[3]), int(words[5])
+                time.sleep(int(words[6]) / 1000 if len(words) > 6 else 0.3)
+                self.position = self.position + 1 if end_y < start_y else 0
+                self.record_gesture("swipe", points=[(int(words[2]), start_y), (int(words[4]), end_y)])
+                continue
+            elif words[0] == "sleep" and len(words) > 1:
+                time.sleep(float(words[1]))
+                continue
+            elif words[:2] == ["dumpsys", "battery"]:
+                output.append(
+                    f"Current Battery Service state:\n  AC powered: false\n  USB powered: true\n"
+                    f"  level: {self.battery_level}\n  scale: 100\n  temperature: {round(self.battery_temperature * 10)}"
+                )
+                continue
+            elif words[:2] == ["dumpsys", "thermalservice"]:
+                output.append(f"Thermal Status: {self.thermal_status}")
+                continue
+            elif words[0] == "echo":
+                output.append(part.strip()[len("echo"):].strip().strip('"').replace("$EPOCHREALTIME", f"{time.time():.6f}"))
+                continue
+
+            self.record_gesture("shell", command=part.strip())
+
+        return "\n".join(output)
+
+    def app_start(self, package_name: str, *args, **kwargs) -> None:
+        self.rpc("app_start")
+        self.current_package = package_name
+        self.position = 0
+
+    def app_info(self, package_name: str) -> Dict:
+        self.rpc("app_info")
+        return {"versionName": "1.0", "versionCode": 1}
+
+    def app_stop(self, package_name: str, *args, **kwargs) -> None:
+        self.rpc("app_stop")
+        self.current_package = "com.android.launcher"
+        self._watching = False
+
+    def app_stop_all(self, *args, **kwargs) -> None:
+        self.app_stop(self.current_package)
@@ -0,0 +1,164 @@
+import time
+import logging
+import threading
+
+from collections import deque
+from PIL import Image
+from typing import Callable, Deque, Iterator, NamedTuple, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class Frame(NamedTuple):
+    index: int
+    captured_at: float
+    image: Image.Image
+    rows_cropped: bool
+
+
+class FrameRing:
+    """Кольцевой буфер последних кадров.
+
+    Производитель добавляет кадры, не дожидаясь потребителя: при заполнении
+    вытесняется самый старый. Потребитель берёт самый новый кадр, а более
+    старые отбрасывает - распознавать устаревший экран незачем.
+    """
+
+    def __init__(self, capacity: int = 2) -> None:
+        """
+        Args:
+            capacity: Сколько кадров хранить
+        """
+        self.dropped = 0
+        # Ошибка производителя, из-за которой кадров больше не будет
+        self.error: Optional[BaseException] = None
+
+        self._frames: Deque[Frame] = deque(maxlen=max(1, capacity))
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def put(self, frame: Frame) -> None:
+        with self._condition:
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+            self._frames.append(frame)
+            self._condition.notify_all()
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        """Новых кадров не будет: ожидающий потребитель получает оставшиеся и завершается.
+
+        Args:
+            error: Ошибка, из-за которой снимки прекратились, None - штатное завершение
+        """
+        with self._condition:
+            if error is not None and self.error is None:
+                self.error = error
+            self._closed = True
+            self._condition.notify_all()
+
+    def newest(self, timeout: Optional[float] = None) -> Optional[Frame]:
+        """Забирает самый новый кадр, отбрасывая остальные.
+
+        Args:
+            timeout: Сколько ждать кадра в секундах, None - пока буфер не закрыт
+
+        Returns:
+            Кадр или None, если буфер закрыт и пуст (или истёк timeout)
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._frames or self._closed, timeout=timeout):
+                return None
+            if not self._frames:
+                return None
+            frame = self._frames.pop()
+            self.dropped += len(self._frames)
+            self._frames.clear()
+            return frame
+
+
+class FrameCapture:
+    """Поток, снимающий экран с постоянным периодом в FrameRing.
+
+    Снимок и распознавание идут параллельно: пока OCR разбирает кадр,
+    поток уже снимает следующий. Период отсчитывается от плановых моментов,
+    а не от конца снимка, поэтому медленный снимок не сдвигает расписание.
+
+    Ошибка снимка останавливает поток и поднимается в `frames()` после уже
+    снятых кадров - так же, как последовательный снимок в цикле потребителя.
+    """
+
+    def __init__(
+        self,
+        capture: Callable[[], Tuple[Image.Image, bool]],
+        interval: float = 1.0,
+        max_frames: int = 10,
+        capacity: int = 2,
+        stop_event=None,
+        name: str = "capture",
+    ) -> None:
+        """
+        Args:
+            capture: Функция снимка экрана -> (изображение, обрезано ли по строкам OCR)
+            interval: Период снимков в секундах (первый снимок - через interval после старта)
+            max_frames: Сколько снимков сделать, после этого буфер закрывается
+            capacity: Размер кольцевого буфера
+            stop_event: Событие остановки парсера
+            name: Имя потока
+        """
+        self.capture = capture
+        self.interval = interval
+        self.max_frames = max_frames
+        self.stop_event = stop_event
+        self.ring = FrameRing(capacity)
+        self.captured = 0
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def __enter__(self) -> "FrameCapture":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def stop(self) -> None:
+        """Останавливает снимки и ждёт завершения текущего."""
+        self._stop.set()
+        self.ring.close()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _stopped(self) -> bool:
+        return self._stop.is_set() or (self.stop_event is not None and self.stop_event.is_set())
+
+    def _run(self) -> None:
+        started = time.monotonic()
+        try:
+            for index in range(self.max_frames):
+                delay = started + (index + 1) * self.interval - time.monotonic()
+                if self._stop.wait(max(0.0, delay)) or self._stopped():
+                    return
+                image, rows_cropped = self.capture()
+                self.captured += 1
+                self.ring.put(Frame(index, time.monotonic(), image, rows_cropped))
+        except Exception as e:
+            logger.debug(f"Ошибка снимка экрана в потоке {self._thread.name}: {e}")
+            self.ring.close(error=e)
+        finally:
+            self.ring.close()
+
+    def frames(self) -> Iterator[Frame]:
+        """Самые новые кадры по мере появления, пока снимки не закончились или не запрошена остановка.
+
+        Raises:
+            Exception: Ошибка снимка экрана в потоке
+        """
+        while not self._stopped():
+            frame = self.ring.newest()
+            if frame is None:
+                if self.ring.error is not None:
+                    raise self.ring.error
+                return
+            yield frame
@@ -0,0 +1,122 @@
+import time
+import logging
+
+from uiautomator2 import Device
+from typing import List, Optional, Tuple
+
+from parsers.shell_pool import ShellPool
+
+
+logger = logging.getLogger(__name__)
+
+Point = Tuple[int, int]
+Swipe = Tuple[Point, Point, float]
+
+MARKER = "__gesture__"
+
+
+def build_swipe_script(swipes: List[Swipe], gap: float) -> str:
+    """Формирует shell-скрипт из последовательности команд `input swipe`.
+
+    Перед каждым жестом и после последнего выводится метка со временем устройства
+    ($EPOCHREALTIME в mksh), по которой считается длительность каждого жеста.
+
+    Args:
+        swipes: Жесты (начало, конец, длительность в секундах)
+        gap: Пауза между жестами в секундах
+
+    Returns:
+        Shell-команда
+    """
+    commands = []
+    for index, ((start_x, start_y), (end_x, end_y), duration) in enumerate(swipes):
+        if index and gap > 0:
+            commands.append(f"sleep {gap:.3f}")
+        commands.append(f'echo "{MARKER} {index} $EPOCHREALTIME"')
+        commands.append(
+            f"input swipe {round(start_x)} {round(start_y)} {round(end_x)} {round(end_y)} {round(duration * 1000)}"
+        )
+    commands.append(f'echo "{MARKER} end $EPOCHREALTIME"')
+    return "; ".join(commands)
+
+
+def parse_swipe_timings(output: str, count: int) -> Optional[List[float]]:
+    """Извлекает длительности жестов из вывода скрипта build_swipe_script.
+
+    Args:
+        output: Вывод shell-команды
+        count: Количество жестов в пакете
+
+    Returns:
+        Длительность каждого жеста (включая паузу после него) или None,
+        если устройство не вывело метки времени
+    """
+    stamps: List[float] = []
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) == 3 and parts[0] == MARKER:
+            try:
+                stamps.append(float(parts[2].replace(",", ".")))
+            except ValueError:
+                return None
+
+    if len(stamps) != count + 1:
+        return None
+    return [end - start for start, end in zip(stamps, stamps[1:])]
+
+
+class GestureBatcher:
+    """Выполняет пакет свайпов одной shell-командой вместо RPC на каждый свайп.
+
+    С пулом `shell` пакет пишется в уже открытую shell-сессию, и на пакет
+    не открывается новое соединение adb.
+    """
+
+    def __init__(self, device: Device, gap: float = 0.05, shell: Optional[ShellPool] = None) -> None:
+        """
+        Args:
+            device: Экземпляр устройства uiautomator2
+            gap: Пауза между жестами пакета в секундах
+            shell: Пул shell-сессий парсера, None - device.shell
+        """
+        self.device = device
+        self.gap = gap
+        self.shell = shell
+
+        self.last_timings: List[float] = []
+
+    def swipe_batch(self, swipes: List[Swipe]) -> List[float]:
+        """Выполняет свайпы и возвращается после завершения последнего.
+
+        Args:
+            swipes: Жесты (начало, конец, длительность в секундах)
+
+        Returns:
+            Длительность каждого жеста в секундах; если устройство не вывело
+            метки времени - общее время пакета, поделённое поровну
+        """
+        if not swipes:
+            return []
+
+        script = build_swipe_script(swipes, gap=self.gap)
+        timeout = sum(duration for _, _, duration in swipes) + self.gap * len(swipes) + 30
+
+        started = time.monotonic()
+        if self.shell is not None:
+            response = self.shell.run(script, timeout=timeout)
+        else:
+            response = self.device.shell(script, timeout=timeout)
+        elapsed = time.monotonic() - started
+
+        output = getattr(response, "output", response) or ""
+        timings = parse_swipe_timings(output, len(swipes))
+        if timings is None:
+            logger.debug(f"[{self.device.serial}] Нет меток времени жестов, используется общее время пакета")
+            timings = [elapsed / len(swipes)] * len(swipes)
+
+        self.last_timings = timings
+        logger.debug(
+            f"[{self.device.serial}] Пакет из {len(swipes)} свайпов за {elapsed:.2f} сек: "
+            + ", ".join(f"{seconds * 1000:.0f}ms" for seconds in timings)
+        )
+        return timings
@@ -1,8 +1,15 @@
-import time
-
 from uiautomator2 import Device
 from typing import Optional
 
+from parsers.pacing import Pacer
+from parsers.governor import ThermalGovernor
+from parsers.gestures import GestureBatcher
+from parsers.metrics import registry
+from parsers.device_state import DeviceState
+from parsers.snapshot import HierarchySnapshot
+from parsers.layout_cache import LayoutCache
+from parsers.shell_pool import ShellPool
+
 
 class GoogleParser:
     PACKAGE_NAME = "com.google.android.googlequicksearchbox"
@@ -17,19 +24,41 @@ class GoogleParser:
         self,
         device: Device,
         duration: float = 0.5,
+        stop_event=None,
+        gesture_batch: int = 1,
+        layout_cache: Optional[LayoutCache] = None,
+        governor_interval: float = 0.0,
+        shell_sessions: int = 2,
     ) -> None:
         """Парсер новостей Google.
 
         Args:
             device: Экземпляр устройства uiautomator2
             duration: Длительность свайпа в секундах
+            stop_event: Событие остановки (threading/multiprocessing Event), None - работать бесконечно
+            gesture_batch: Сколько свайпов отправлять одной shell-командой между проверками конца ленты
+            layout_cache: Сохраняемый кеш границ опорных элементов, None - искать их в UI при каждом запуске
+            governor_interval: Период замеров нагрева и заряда для ThermalGovernor в секундах, 0 - без регулятора
+            shell_sessions: Сколько постоянных shell-сессий держать для запуска и остановки приложения
+                и dumpsys, 0 - отдельное соединение adb на каждую команду
         """
         self.device = device
+        self.shell = ShellPool(device, size=shell_sessions)
+        self.state = DeviceState(device, layout_cache=layout_cache, shell=self.shell)
         self.duration = duration
+        self.stop_event = stop_event
+        self.pacer = Pacer(device, stop_event=stop_event)
+        self.governor = ThermalGovernor(device, stop_event=stop_event, interval=governor_interval, shell=self.shell)
+        self.gesture_batch = max(1, gesture_batch)
+        self.gestures = GestureBatcher(device, shell=self.shell)
 
         self.top_y: Optional[int] = None
         self.bottom_y: Optional[int] = None
 
+    def stopped(self) -> bool:
+        """Проверяет, запрошена ли остановка парсера."""
+        return self.stop_event is not None and self.stop_event.is_set()
+
     def swipe(self, duration: float, shift_top: int = 25, shift_bottom: int = 25) -> None:
         """Выполняет свайп.
 
@@ -38,7 +67,7 @@ class GoogleParser:
             shift_top: Отступ от верхней границы
             shift_bottom: Отступ от нижней границы
         """
-        center_x = round(self.device.info["displayWidth"] / 2)
+        center_x = round(self.state.display_width / 2)
         start_point = (center_x, self.bottom_y - shift_bottom)
         end_point = (center_x, self.top_y + shift_top)
 
@@ -46,11 +75,31 @@ class GoogleParser:
             points=[start_point, end_point],
             duration=duration
         )
+        registry.inc("swipes_total", serial=self.device.serial)
+
+    def swipe_series(self, count: int, duration: float, shift_top: int = 25, shift_bottom: int = 25) -> None:
+        """Выполняет серию одинаковых свайпов (при count > 1 - одной shell-командой).
+
+        Args:
+            count: Количество свайпов
+            duration: Длительность свайпа
+            shift_top: Отступ от верхней границы
+            shift_bottom: Отступ от нижней границы
+        """
+        if count == 1:
+            self.swipe(duration=duration, shift_top=shift_top, shift_bottom=shift_bottom)
+            return
+
+        center_x = round(self.state.display_width / 2)
+        start_point = (center_x, self.bottom_y - shift_bottom)
+        end_point = (center_x, self.top_y + shift_top)
+        self.gestures.swipe_batch([(start_point, end_point, duration)] * count)
+        registry.inc("swipes_total", count, serial=self.device.serial)
 
     def refresh_content(self) -> None:
         """Обновляет рекомендации
         """
-        center_x = round(self.device.info["displayWidth"] / 2)
+        center_x = round(self.state.display_width / 2)
         duration=0.2
         shift_bottom = 25
         shift_top = 100
@@ -62,36 +111,56 @@ class GoogleParser:
             ],
             duration=duration
         )
+        registry.inc("refresh_cycles_total", serial=self.device.serial)
 
     def parse_news(self):
         """Парсинг новостной ленты Google."""
         home_button = self.device(resourceId=self.DISCOVER_BUTTON_ID)
         home_button.click()
 
-        top_obj = self.device(resourceId=self.BATTERY)
-        self.top_y = top_obj.bounds()[3]
+        self.update_bounds()
 
-        self.bottom_y = home_button.bounds()[1]
+        while not self.stopped():
+            self.governor.pace()
+            self.swipe_series(count=self.gesture_batch, duration=self.governor.duration(self.duration), shift_bottom=100)
 
-        site_end = self.device(description=self.MORE_STORIES_DESC)
-        site_end_ru = self.device(description=self.MORE_STORIES_DESC_RU)
-        while True:
-            self.swipe(duration=self.duration, shift_bottom=100)
-
-            if site_end.exists() or site_end_ru.exists():
-                time.sleep(3)
+            # Один дамп иерархии на шаг вместо RPC exists() на каждую метку конца ленты
+            snapshot = HierarchySnapshot.capture(self.device)
+            if self.state.verify_anchors(snapshot):
+                self.update_bounds(snapshot)
+            if snapshot.exists(description=self.MORE_STORIES_DESC) or snapshot.exists(description=self.MORE_STORIES_DESC_RU):
+                self.pacer.wait_for_stable_hierarchy("feed_settle", timeout=3)
                 home_button.click()
 
-                time.sleep(3)
+                self.pacer.wait_for_stable_hierarchy("home_open", timeout=3)
                 self.refresh_content()
 
-                time.sleep(7)
+                self.pacer.wait_for_refresh("feed_refresh", timeout=7)
+
+                if self.state.check():
+                    self.update_bounds()
+
+    def update_bounds(self, snapshot: Optional[HierarchySnapshot] = None) -> None:
+        """Обновляет границы области свайпа по опорным элементам.
+
+        Args:
+            snapshot: Снимок иерархии, из которого берутся границы при промахе кеша;
+                None - снять его, только если сверенных границ нет в памяти (границы из кеша
+                раскладок сверяются с ним до первого свайпа)
+        """
+        if snapshot is None and not (
+            self.state.has_anchor(resourceId=self.BATTERY) and self.state.has_anchor(resourceId=self.DISCOVER_BUTTON_ID)
+        ):
+            snapshot = HierarchySnapshot.capture(self.device)
+
+        self.top_y = self.state.anchor_bounds(snapshot, resourceId=self.BATTERY)[3]
+        self.bottom_y = self.state.anchor_bounds(snapshot, resourceId=self.DISCOVER_BUTTON_ID)[1]
 
 
     def run(self):
         """Запуск парсера."""
-        self.device.app_start(package_name=self.PACKAGE_NAME)
-        self.device.orientation = "natural"
+        self.state.app_start(package_name=self.PACKAGE_NAME)
+        self.state.set_orientation("natural")
 
         try:
             self.parse_news()
@@ -100,4 +169,5 @@ class GoogleParser:
             print(e)
 
         finally:
-            self.device.app_stop(package_name=self.PACKAGE_NAME)
+            self.shell.app_stop(self.PACKAGE_NAME)
+            self.shell.close()
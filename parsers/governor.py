@@ -0,0 +1,251 @@
+import re
+import time
+import logging
+
+from collections import deque
+from uiautomator2 import Device
+from typing import Deque, Dict, NamedTuple, Optional, Tuple
+
+from parsers.metrics import registry
+from parsers.shell_pool import ShellPool
+
+
+logger = logging.getLogger(__name__)
+
+# Одна shell-команда на замер: состояние батареи и термального сервиса
+SAMPLE_COMMAND = "dumpsys battery; echo __thermal__; dumpsys thermalservice 2>/dev/null"
+
+BATTERY_FIELD = re.compile(r"^\s*(level|scale|temperature|status|AC powered|USB powered|Wireless powered):\s*(\S+)", re.MULTILINE)
+THERMAL_STATUS = re.compile(r"Thermal Status:\s*(\d+)")
+HAL_TEMPERATURE = re.compile(r"Temperature\{mValue=([-\d.]+), mType=(-?\d+)")
+
+# Типы датчиков Temperature из android.os.Temperature
+TEMPERATURE_TYPES = {0: "cpu", 1: "gpu", 2: "battery", 3: "skin"}
+
+# Уровни нагрузки: название, множитель длительности свайпа, пауза перед шагом парсера (сек)
+LEVELS: Tuple[Tuple[str, float, float], ...] = (
+    ("normal", 1.0, 0.0),
+    ("warm", 1.3, 0.5),
+    ("hot", 1.6, 2.0),
+    ("critical", 2.0, 10.0),
+)
+
+# Температура батареи (°C), с которой включается уровень warm, hot, critical
+BATTERY_THRESHOLDS = (40.0, 43.0, 46.0)
+# Термальный статус Android (THROTTLING_LIGHT=1, MODERATE=2, SEVERE=3...), с которого включается уровень
+THERMAL_THRESHOLDS = (1, 2, 3)
+# На сколько градусов ниже порога должна опуститься температура, чтобы понизить уровень
+HYSTERESIS = 1.5
+# Заряд (%), ниже которого без зарядки работаем не быстрее уровня warm
+LOW_BATTERY = 15
+
+
+class ThermalSample(NamedTuple):
+    battery_level: Optional[int]
+    battery_temperature: Optional[float]
+    charging: bool
+    thermal_status: Optional[int]
+    temperatures: Dict[str, float]
+
+
+def parse_sample(output: str) -> ThermalSample:
+    """Разбирает вывод SAMPLE_COMMAND.
+
+    Args:
+        output: Вывод `dumpsys battery` и `dumpsys thermalservice`
+
+    Returns:
+        Заряд (%), температура батареи (°C), идёт ли зарядка, термальный статус
+        и максимальные температуры датчиков HAL по типам
+    """
+    battery, _, thermal = output.partition("__thermal__")
+
+    fields: Dict[str, str] = {}
+    for name, value in BATTERY_FIELD.findall(battery):
+        fields.setdefault(name, value)
+
+    level = None
+    if fields.get("level", "").isdigit():
+        scale = int(fields["scale"]) if fields.get("scale", "").isdigit() and int(fields["scale"]) else 100
+        level = round(int(fields["level"]) * 100 / scale)
+
+    temperature = None
+    if fields.get("temperature", "").lstrip("-").isdigit():
+        # dumpsys battery выводит десятые доли градуса
+        temperature = int(fields["temperature"]) / 10
+
+    charging = any(fields.get(name) == "true" for name in ("AC powered", "USB powered", "Wireless powered"))
+
+    match = THERMAL_STATUS.search(thermal)
+    status = int(match.group(1)) if match else None
+
+    temperatures: Dict[str, float] = {}
+    for value, kind in HAL_TEMPERATURE.findall(thermal):
+        name = TEMPERATURE_TYPES.get(int(kind))
+        if name is not None:
+            temperatures[name] = max(temperatures.get(name, float("-inf")), float(value))
+
+    return ThermalSample(level, temperature, charging, status, temperatures)
+
+
+def target_level(sample: ThermalSample, current: int) -> int:
+    """Уровень нагрузки для замера с учётом гистерезиса.
+
+    Уровень повышается сразу, как только превышен порог, а понижается не более
+    чем на шаг за замер и только когда температура ниже порога на HYSTERESIS:
+    устройство не перегревается снова сразу после паузы.
+
+    Args:
+        sample: Замер состояния устройства
+        current: Текущий уровень (индекс LEVELS)
+
+    Returns:
+        Индекс уровня в LEVELS
+    """
+    def reached(level: int, margin: float) -> bool:
+        if sample.thermal_status is not None and sample.thermal_status >= THERMAL_THRESHOLDS[level - 1]:
+            return True
+        return (
+            sample.battery_temperature is not None
+            and sample.battery_temperature >= BATTERY_THRESHOLDS[level - 1] - margin
+        )
+
+    level = 0
+    for candidate in range(len(LEVELS) - 1, 0, -1):
+        # Для текущего и более низких уровней порог снижен на гистерезис: уровень держится, пока не остынет
+        if reached(candidate, HYSTERESIS if candidate <= current else 0.0):
+            level = candidate
+            break
+
+    if (
+        sample.battery_level is not None
+        and sample.battery_level < LOW_BATTERY
+        and not sample.charging
+    ):
+        level = max(level, 1)
+
+    return max(level, current - 1)
+
+
+class ThermalGovernor:
+    """Регулятор темпа парсера по нагреву и заряду устройства.
+
+    Раз в `interval` секунд одной shell-командой читает `dumpsys battery` и
+    `dumpsys thermalservice` и выбирает уровень нагрузки (LEVELS). На горячем
+    устройстве свайпы становятся длиннее, а между шагами парсера появляется
+    пауза: устройство не доходит до троттлинга, при котором кадры растягиваются
+    и свайпы теряются, поэтому за длительную работу свайпов получается больше.
+
+    Решения пишутся в журнал (phase="governor") и в метрики
+    governor_level_changes_total, governor_level_seconds_total и governor_pause_seconds_total.
+    """
+
+    def __init__(
+        self,
+        device: Device,
+        stop_event=None,
+        interval: float = 30.0,
+        history: int = 100,
+        shell: Optional[ShellPool] = None,
+    ) -> None:
+        """
+        Args:
+            device: Экземпляр устройства uiautomator2
+            stop_event: Событие остановки, прерывающее паузу
+            interval: Период замеров в секундах, 0 - регулятор отключён
+            history: Сколько последних решений хранить в `decisions`
+            shell: Пул shell-сессий для замеров, None - device.shell
+        """
+        self.device = device
+        self.shell = shell
+        self.stop_event = stop_event
+        self.interval = interval
+
+        self.level: int = 0
+        self.sample: Optional[ThermalSample] = None
+        # (время, уровень, замер) при каждой смене уровня
+        self.decisions: Deque[Tuple[float, str, ThermalSample]] = deque(maxlen=history)
+
+        self._sampled_at: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    @property
+    def level_name(self) -> str:
+        return LEVELS[self.level][0]
+
+    def duration(self, base: float) -> float:
+        """Длительность свайпа для текущего уровня.
+
+        Args:
+            base: Длительность свайпа из параметров запуска
+        """
+        return base * LEVELS[self.level][1]
+
+    def update(self) -> None:
+        """Делает замер, если с прошлого прошло `interval` секунд, и пересчитывает уровень."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if self._sampled_at is not None and now - self._sampled_at < self.interval:
+            return
+
+        serial = self.device.serial
+        if self._sampled_at is not None:
+            registry.inc("governor_level_seconds_total", now - self._sampled_at, serial=serial, level=self.level_name)
+        self._sampled_at = now
+
+        try:
+            if self.shell is not None:
+                response = self.shell.run(SAMPLE_COMMAND, timeout=10)
+            else:
+                response = self.device.shell(SAMPLE_COMMAND, timeout=10)
+        except Exception as e:
+            logger.debug(f"[{serial}] Состояние батареи недоступно: {e}")
+            return
+
+        sample = parse_sample(getattr(response, "output", response) or "")
+        self.sample = sample
+        logger.debug(
+            f"[{serial}] Батарея {sample.battery_level}%, {sample.battery_temperature} °C, "
+            f"термальный статус {sample.thermal_status}",
+            extra={"phase": "governor", "sample": sample._asdict()},
+        )
+
+        level = target_level(sample, self.level)
+        if level == self.level:
+            return
+
+        name, factor, pause = LEVELS[level]
+        registry.inc("governor_level_changes_total", serial=serial, level=name)
+        logger.info(
+            f"[{serial}] Уровень нагрузки {self.level_name} -> {name}: батарея {sample.battery_temperature} °C, "
+            f"термальный статус {sample.thermal_status}; свайп x{factor}, пауза {pause:.1f} сек",
+            extra={
+                "phase": "governor",
+                "level": name,
+                "previous": self.level_name,
+                "swipe_factor": factor,
+                "pause": pause,
+                "sample": sample._asdict(),
+            },
+        )
+        self.decisions.append((time.time(), name, sample))
+        self.level = level
+
+    def pace(self) -> None:
+        """Шаг регулятора перед очередной порцией работы парсера: замер (если пора) и пауза уровня."""
+        if not self.enabled:
+            return
+        self.update()
+
+        pause = LEVELS[self.level][2]
+        if pause <= 0:
+            return
+        registry.inc("governor_pause_seconds_total", pause, serial=self.device.serial)
+        if self.stop_event is not None:
+            self.stop_event.wait(pause)
+        else:
+            time.sleep(pause)
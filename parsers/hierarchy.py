@@ -0,0 +1,125 @@
+import logging
+import xml.etree.ElementTree as ElementTree
+
+from typing import Dict, Literal, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+VideoType = Literal["comments", "concept", "sponsored"]
+
+YOUTUBE_ID_PREFIX = "com.google.android.youtube:id/"
+
+# Признаки типа видео в дереве UI: resource-id элементов (точное совпадение) и
+# заголовки панелей в content-desc/text (точное совпадение без учёта регистра и
+# пробелов по краям). Название или описание видео, в котором встречается
+# "comments" или "sponsored", признаком не считается. Порядок задаёт приоритет,
+# как и в OCR-проверке wait_load_video.
+VIDEO_TYPE_SIGNALS: Tuple[Tuple[VideoType, Tuple[str, ...], Tuple[str, ...]], ...] = (
+    (
+        "comments",
+        tuple(YOUTUBE_ID_PREFIX + name for name in ("comments_entry_point", "comments_teaser", "engagement_panel_comments")),
+        ("comments",),
+    ),
+    (
+        "concept",
+        tuple(YOUTUBE_ID_PREFIX + name for name in ("key_concepts", "concepts_entry_point")),
+        ("key concepts",),
+    ),
+    (
+        "sponsored",
+        tuple(YOUTUBE_ID_PREFIX + name for name in ("ad_badge", "ad_progress_text")),
+        ("sponsored",),
+    ),
+)
+
+
+def find_video_type_signals(xml: str) -> Dict[VideoType, bool]:
+    """Ищет в дампе иерархии признаки каждого типа видео.
+
+    Args:
+        xml: Результат device.dump_hierarchy()
+
+    Returns:
+        Словарь {тип видео: найден ли признак}
+    """
+    found: Dict[VideoType, bool] = {video_type: False for video_type, _, _ in VIDEO_TYPE_SIGNALS}
+
+    try:
+        root = ElementTree.fromstring(xml)
+    except ElementTree.ParseError as e:
+        logger.warning(f"Не удалось разобрать иерархию UI: {e}")
+        return found
+
+    for node in root.iter("node"):
+        resource_id = node.get("resource-id", "")
+        texts = {node.get("content-desc", "").strip().casefold(), node.get("text", "").strip().casefold()}
+
+        for video_type, resource_ids, labels in VIDEO_TYPE_SIGNALS:
+            if found[video_type]:
+                continue
+            if resource_id in resource_ids or not texts.isdisjoint(labels):
+                found[video_type] = True
+
+    return found
+
+
+def classify_hierarchy(xml: str) -> Optional[VideoType]:
+    """Определяет тип видео по дампу иерархии UI.
+
+    Args:
+        xml: Результат device.dump_hierarchy()
+
+    Returns:
+        Тип видео с наивысшим приоритетом среди найденных или None
+    """
+    found = find_video_type_signals(xml)
+    for video_type, _, _ in VIDEO_TYPE_SIGNALS:
+        if found[video_type]:
+            return video_type
+    return None
+
+
+def hierarchy_signature(xml: str) -> int:
+    """Отпечаток структуры экрана для проверки, что интерфейс перестал меняться.
+
+    Учитываются только resource-id, класс и границы узлов: текст и content-desc
+    (таймеры, счётчики просмотров) меняются и на неподвижном экране.
+
+    Args:
+        xml: Результат device.dump_hierarchy()
+
+    Returns:
+        Хеш структуры; для нераспознанного XML - хеш самой строки
+    """
+    try:
+        root = ElementTree.fromstring(xml)
+    except ElementTree.ParseError:
+        return hash(xml)
+
+    return hash(tuple(
+        (node.get("resource-id", ""), node.get("class", ""), node.get("bounds", ""))
+        for node in root.iter("node")
+    ))
+
+
+def has_progress_indicator(xml: str) -> bool:
+    """Проверяет, отображается ли индикатор загрузки (спиннер обновления ленты).
+
+    Args:
+        xml: Результат device.dump_hierarchy()
+
+    Returns:
+        True, если в иерархии есть ProgressBar или элемент со "spinner" в resource-id
+    """
+    try:
+        root = ElementTree.fromstring(xml)
+    except ElementTree.ParseError:
+        return False
+
+    for node in root.iter("node"):
+        class_name = node.get("class", "")
+        resource_id = node.get("resource-id", "").lower()
+        if class_name.endswith("ProgressBar") or "spinner" in resource_id:
+            return True
+    return False
@@ -0,0 +1,78 @@
+import time
+
+from uiautomator2 import Device
+from typing import Callable, List
+
+
+# Свойства Device, чтение которых выполняет RPC к агенту на устройстве
+RPC_PROPERTIES = frozenset(("info", "device_info", "orientation", "clipboard"))
+
+Observer = Callable[[str, str, float], None]
+
+
+class _Instrumented:
+    """Общая часть обёрток: замер времени вызовов и уведомление наблюдателей."""
+
+    def __init__(self, target, serial: str, observers: List[Observer], prefix: str = "") -> None:
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_serial", serial)
+        object.__setattr__(self, "_observers", observers)
+        object.__setattr__(self, "_prefix", prefix)
+
+    def _notify(self, method: str, seconds: float) -> None:
+        for observer in self._observers:
+            observer(self._serial, f"{self._prefix}{method}", seconds)
+
+    def _wrap(self, name: str, method: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._notify(name, time.perf_counter() - started)
+
+        timed.__name__ = name
+        timed.__doc__ = method.__doc__
+        return timed
+
+    def __getattr__(self, name: str):
+        if name in RPC_PROPERTIES:
+            started = time.perf_counter()
+            value = getattr(self._target, name)
+            self._notify(name, time.perf_counter() - started)
+            return value
+
+        value = getattr(self._target, name)
+        if callable(value) and not name.startswith("_"):
+            return self._wrap(name, value)
+        return value
+
+    def __setattr__(self, name: str, value) -> None:
+        started = time.perf_counter()
+        setattr(self._target, name, value)
+        if name in RPC_PROPERTIES:
+            self._notify(f"set_{name}", time.perf_counter() - started)
+
+
+class _InstrumentedObject(_Instrumented):
+    """Обёртка над UiObject, возвращаемым селектором device(...)."""
+
+
+class InstrumentedDevice(_Instrumented):
+    """Прокси над uiautomator2.Device, замеряющий длительность каждого RPC.
+
+    Наблюдатели вызываются как observer(serial, method, seconds). Вызовы
+    селекторов device(...) возвращают обёрнутый UiObject, методы которого
+    замеряются с префиксом "selector.".
+    """
+
+    def __init__(self, device: Device, observers: List[Observer]) -> None:
+        """
+        Args:
+            device: Экземпляр устройства uiautomator2
+            observers: Функции observer(serial, method, seconds)
+        """
+        super().__init__(device, device.serial, observers)
+
+    def __call__(self, **kwargs) -> _InstrumentedObject:
+        return _InstrumentedObject(self._target(**kwargs), self._serial, self._observers, prefix="selector.")
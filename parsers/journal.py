@@ -0,0 +1,113 @@
+import time
+import sqlite3
+import logging
+
+from typing import Dict, Optional, Set
+
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATES = ("done", "failed")
+
+
+class LinkJournal:
+    """Журнал состояний ссылок в SQLite (WAL) для продолжения после перезапуска.
+
+    Записи накапливаются в открытой транзакции и фиксируются пачкой: каждые
+    `batch_size` записей или раз в `flush_interval` секунд. Фиксация пачки
+    синхронизируется на диск (synchronous=FULL): зафиксированная пачка
+    переживает и сбой питания, а не только падение процесса. Цена fsync
+    платится раз на пачку, а не на запись.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, flush_interval: float = 5.0) -> None:
+        """
+        Args:
+            path: Путь к файлу журнала
+            batch_size: Количество записей в одной транзакции
+            flush_interval: Максимальное время между фиксациями в секундах
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # Журнал пишет менеджер очереди ссылок из разных потоков под своей блокировкой
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS links ("
+            "link TEXT PRIMARY KEY, "
+            "state TEXT NOT NULL, "
+            "result TEXT, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "serial TEXT, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+        self._unflushed: int = 0
+        self._flushed_at = time.monotonic()
+
+    def finished_links(self) -> Set[str]:
+        """Ссылки, обработка которых завершена (успешно или исчерпаны попытки)."""
+        placeholders = ", ".join("?" for _ in FINISHED_STATES)
+        rows = self._connection.execute(
+            f"SELECT link FROM links WHERE state IN ({placeholders})",
+            FINISHED_STATES,
+        )
+        return {link for link, in rows}
+
+    def retry_attempts(self) -> Dict[str, int]:
+        """Число неудачных попыток незавершённых ссылок (состояние retry)."""
+        rows = self._connection.execute("SELECT link, attempts FROM links WHERE state = 'retry'")
+        return {link: attempts for link, attempts in rows}
+
+    def record(
+        self,
+        link: str,
+        state: str,
+        result: Optional[str] = None,
+        attempts: int = 0,
+        serial: Optional[str] = None,
+    ) -> None:
+        """Записывает состояние ссылки.
+
+        Args:
+            link: Ссылка
+            state: Состояние: done, retry, failed
+            result: Результат wait_load_video
+            attempts: Количество неудачных попыток
+            serial: Серийный номер устройства, обработавшего ссылку
+        """
+        self._connection.execute(
+            "INSERT INTO links (link, state, result, attempts, serial, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(link) DO UPDATE SET "
+            "state = excluded.state, result = excluded.result, attempts = excluded.attempts, "
+            "serial = excluded.serial, updated_at = excluded.updated_at",
+            (link, state, result, attempts, serial, time.time()),
+        )
+        self._unflushed += 1
+
+        if self._unflushed >= self.batch_size:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self) -> None:
+        """Фиксирует накопленные записи, если с прошлой фиксации прошло flush_interval секунд."""
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Фиксирует накопленные записи."""
+        if self._unflushed:
+            self._connection.commit()
+            self._unflushed = 0
+        self._flushed_at = time.monotonic()
+
+    def close(self) -> None:
+        """Фиксирует записи и закрывает журнал."""
+        self.flush()
+        self._connection.close()
@@ -0,0 +1,84 @@
+import os
+import json
+import logging
+import threading
+
+from typing import Dict, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+Bounds = Tuple[int, int, int, int]
+
+
+def selector_key(selector: Dict[str, str]) -> str:
+    """Строковый ключ селектора для JSON: "description=Home;resourceId=..."."""
+    return ";".join(f"{key}={value}" for key, value in sorted(selector.items()))
+
+
+class LayoutCache:
+    """Сохраняемый на диск кеш границ опорных элементов.
+
+    Границы хранятся по отпечатку раскладки экрана: модель устройства, разрешение,
+    плотность, поворот и версия приложения. Пока отпечаток совпадает, парсер
+    получает границы без обращения к UI.
+
+    Файл общий для всех процессов: запись сливает изменения с текущим содержимым
+    файла и атомарно заменяет его. При одновременной записи одна из новых записей
+    может потеряться - она будет найдена заново при следующем запуске.
+    """
+
+    def __init__(self, path: str = "layout_cache.json") -> None:
+        """
+        Args:
+            path: Путь к JSON-файлу кеша
+        """
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._layouts: Dict[str, Dict[str, Bounds]] = self._read()
+
+    def _read(self) -> Dict[str, Dict[str, Bounds]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Не удалось прочитать кеш раскладок {self.path}: {e}")
+            return {}
+
+        return {
+            layout: {selector: tuple(bounds) for selector, bounds in anchors.items()}
+            for layout, anchors in data.items()
+        }
+
+    def get(self, layout: str, selector: Dict[str, str]) -> Optional[Bounds]:
+        """Возвращает сохранённые границы элемента или None.
+
+        Args:
+            layout: Отпечаток раскладки (DeviceState.layout_key)
+            selector: Параметры селектора uiautomator2
+        """
+        with self._lock:
+            return self._layouts.get(layout, {}).get(selector_key(selector))
+
+    def put(self, layout: str, selector: Dict[str, str], bounds: Bounds) -> None:
+        """Сохраняет границы элемента и записывает файл.
+
+        Args:
+            layout: Отпечаток раскладки (DeviceState.layout_key)
+            selector: Параметры селектора uiautomator2
+            bounds: Границы (left, top, right, bottom)
+        """
+        with self._lock:
+            self._layouts = self._read()
+            self._layouts.setdefault(layout, {})[selector_key(selector)] = tuple(bounds)
+
+            temporary = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(temporary, "w", encoding="utf-8") as file:
+                    json.dump(self._layouts, file, ensure_ascii=False, indent=2)
+                os.replace(temporary, self.path)
+            except OSError as e:
+                logger.warning(f"Не удалось записать кеш раскладок {self.path}: {e}")
@@ -0,0 +1,224 @@
+import time
+import heapq
+import signal
+import logging
+import threading
+
+from collections import deque
+from multiprocessing.managers import BaseManager
+from typing import Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from parsers.journal import LinkJournal
+from parsers.link_source import KeySet, LinkSource, link_key, unique_links
+
+
+logger = logging.getLogger(__name__)
+
+# Результаты wait_load_video, после которых видео просмотрено и ссылка не повторяется
+DONE_RESULTS = ("comments", "concept")
+
+
+class LinkQueue:
+    """Очередь ссылок, общая для всех устройств.
+
+    Каждая ссылка выдаётся следующему свободному устройству. Ссылки с результатом
+    'sponsored' или без результата возвращаются в очередь с экспоненциальной
+    задержкой, но не более `max_attempts` раз. Повторы одного видео в исходных
+    ссылках (в том числе в разных формах URL) выдаются один раз.
+    """
+
+    def __init__(
+        self,
+        links: Union[Iterable[str], LinkSource],
+        max_attempts: int = 3,
+        backoff: float = 30.0,
+        max_backoff: float = 600.0,
+        journal_path: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            links: Ссылки для обработки или LinkSource большого файла (читается по мере выдачи)
+            max_attempts: Максимальное количество попыток на ссылку
+            backoff: Задержка перед первой повторной попыткой в секундах
+            max_backoff: Максимальная задержка перед повторной попыткой
+            journal_path: Путь к журналу состояний; завершённые по журналу ссылки
+                пропускаются, а для ссылок на повторе продолжается счёт попыток, None - без журнала
+        """
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._journal: Optional[LinkJournal] = None
+        finished = set()
+        attempts: Dict[str, int] = {}
+        if journal_path is not None:
+            self._journal = LinkJournal(journal_path)
+            finished = self._journal.finished_links()
+            attempts = self._journal.retry_attempts()
+
+        self._lock = threading.Lock()
+        self._pending: Union[Deque[str], LinkSource]
+        if isinstance(links, LinkSource):
+            links.build(exclude=finished)
+            self._pending = links
+        else:
+            self._pending = deque(unique_links(links, KeySet(link_key(link) for link in finished)))
+        self._delayed: List[Tuple[float, str]] = []
+        self._attempts: Dict[str, int] = attempts
+        self._in_flight: Dict[str, str] = {}
+        self._devices: Dict[str, Dict[str, float]] = {}
+        self._results: Dict[str, int] = {"done": 0, "retried": 0, "failed": 0}
+        self._started_at = time.monotonic()
+
+        if finished or attempts:
+            logger.info(
+                f"Журнал {journal_path}: пропущено уже обработанных ссылок {len(finished)}, "
+                f"продолжен счёт попыток для {len(attempts)}"
+            )
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "LinkQueue":
+        """Создаёт очередь из файла со ссылками (по одной на строку), не загружая файл в память."""
+        return cls(LinkSource(path), **kwargs)
+
+    def next(self, serial: str) -> Tuple[Optional[str], float]:
+        """Выдаёт следующую ссылку устройству.
+
+        Args:
+            serial: Серийный номер устройства
+
+        Returns:
+            (ссылка, 0) - ссылка для обработки;
+            (None, секунды) - ссылок пока нет, повторить запрос через указанное время;
+            (None, 0) - все ссылки обработаны
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._journal is not None:
+                self._journal.flush_if_due()
+
+            if self._delayed and self._delayed[0][0] <= now:
+                _, link = heapq.heappop(self._delayed)
+            elif self._pending:
+                link = self._pending.popleft()
+            elif self._delayed:
+                return None, min(self._delayed[0][0] - now, 1.0)
+            elif self._in_flight:
+                # Ссылки в работе у других устройств ещё могут вернуться на повтор
+                return None, 1.0
+            else:
+                return None, 0.0
+
+            self._in_flight[link] = serial
+            self._device(serial)["taken"] += 1
+            return link, 0.0
+
+    def report(self, serial: str, link: str, result: Optional[str], seconds: float) -> None:
+        """Принимает результат обработки ссылки.
+
+        Args:
+            serial: Серийный номер устройства
+            link: Обработанная ссылка
+            result: Тип видео из wait_load_video или None
+            seconds: Время обработки ссылки
+        """
+        with self._lock:
+            self._in_flight.pop(link, None)
+
+            device = self._device(serial)
+            device["busy_seconds"] += seconds
+            device["done" if result in DONE_RESULTS else "not_done"] += 1
+
+            if result in DONE_RESULTS:
+                self._results["done"] += 1
+                if self._journal is not None:
+                    self._journal.record(link, "done", result, self._attempts.get(link, 0), serial)
+                return
+
+            self._retry(link, result=result, serial=serial)
+
+    def release(self, serial: str) -> List[str]:
+        """Возвращает в очередь ссылки, взятые устройством, которое перестало работать.
+
+        Args:
+            serial: Серийный номер устройства
+
+        Returns:
+            Список возвращённых ссылок
+        """
+        with self._lock:
+            links = [link for link, owner in self._in_flight.items() if owner == serial]
+            for link in links:
+                del self._in_flight[link]
+                self._retry(link, result=None, serial=serial)
+            return links
+
+    def _retry(self, link: str, result: Optional[str], serial: str) -> None:
+        attempts = self._attempts.get(link, 0) + 1
+        self._attempts[link] = attempts
+
+        if attempts >= self.max_attempts:
+            self._results["failed"] += 1
+            logger.warning(f"Ссылка {link} пропущена после {attempts} попыток ({result})")
+            state = "failed"
+        else:
+            delay = min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+            heapq.heappush(self._delayed, (time.monotonic() + delay, link))
+            self._results["retried"] += 1
+            state = "retry"
+
+        if self._journal is not None:
+            self._journal.record(link, state, result, attempts, serial)
+
+    def _device(self, serial: str) -> Dict[str, float]:
+        return self._devices.setdefault(serial, {"taken": 0, "done": 0, "not_done": 0, "busy_seconds": 0.0})
+
+    def close(self) -> None:
+        """Фиксирует и закрывает журнал состояний."""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if isinstance(self._pending, LinkSource):
+                self._pending.close()
+
+    def stats(self) -> Dict:
+        """Статистика очереди и пропускная способность по устройствам.
+
+        Returns:
+            Словарь с размерами очереди, итогами и ссылками в минуту по устройствам
+        """
+        with self._lock:
+            minutes = max((time.monotonic() - self._started_at) / 60, 1e-9)
+            return {
+                "pending": len(self._pending),
+                "delayed": len(self._delayed),
+                "in_flight": len(self._in_flight),
+                **self._results,
+                "devices": {
+                    serial: {
+                        **values,
+                        "links_per_minute": round((values["done"] + values["not_done"]) / minutes, 2),
+                    }
+                    for serial, values in self._devices.items()
+                },
+            }
+
+
+class LinkQueueManager(BaseManager):
+    """Менеджер, обслуживающий общую LinkQueue для процессов устройств."""
+
+
+LinkQueueManager.register("LinkQueue", LinkQueue)
+
+
+def start_link_queue_manager() -> LinkQueueManager:
+    """Запускает процесс менеджера очереди ссылок.
+
+    Returns:
+        Запущенный менеджер; очередь создаётся через manager.LinkQueue(...)
+    """
+    manager = LinkQueueManager()
+    # Ctrl+C обрабатывает главный процесс, очередь должна пережить остановку воркеров
+    manager.start(initializer=signal.signal, initargs=(signal.SIGINT, signal.SIG_IGN))
+    return manager
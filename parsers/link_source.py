@@ -0,0 +1,317 @@
+import os
+import re
+import mmap
+import logging
+
+from array import array
+from urllib.parse import parse_qs, urlsplit
+from typing import Callable, Iterable, Iterator, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+VIDEO_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+# Быстрый путь для типичных ссылок на видео; остальные формы разбираются через urlsplit с тем же результатом
+YOUTUBE_LINK = re.compile(
+    r"^(?:https?://)?(?:(?:www|m|music)\.)?"
+    r"(?:youtu\.be/|youtube(?:-nocookie)?\.com/(?:watch\?(?:[^#]*&)?v=|(?:shorts|embed|live|v)/))"
+    r"([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])"
+)
+# Пути youtube.com, в которых идентификатор видео - второй сегмент
+VIDEO_PATHS = ("shorts", "embed", "live", "v")
+HOST_PREFIXES = ("www.", "m.", "music.")
+
+
+def link_key(link: str) -> str:
+    """Ключ ссылки для поиска дубликатов.
+
+    Для видео YouTube - идентификатор видео (watch?v=, youtu.be, shorts, embed, live),
+    поэтому разные формы ссылки на одно видео совпадают. Для остальных ссылок -
+    хост без www, путь без завершающего "/" и запрос, без фрагмента.
+
+    Args:
+        link: Ссылка из файла
+
+    Returns:
+        Ключ ссылки
+    """
+    match = YOUTUBE_LINK.match(link)
+    if match:
+        return f"youtube:{match.group(1)}"
+
+    parts = urlsplit(link if "://" in link else f"https://{link}")
+    host = (parts.hostname or "").lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+
+    video_id = ""
+    if host == "youtu.be":
+        video_id = parts.path.strip("/").split("/")[0]
+    elif host in ("youtube.com", "youtube-nocookie.com"):
+        segments = parts.path.strip("/").split("/")
+        if segments[0] == "watch":
+            video_id = parse_qs(parts.query).get("v", [""])[0]
+        elif segments[0] in VIDEO_PATHS and len(segments) > 1:
+            video_id = segments[1]
+
+    if VIDEO_ID.match(video_id):
+        return f"youtube:{video_id}"
+    return f"{host}{parts.path.rstrip('/')}" + (f"?{parts.query}" if parts.query else "")
+
+
+def _hash64(key: str) -> int:
+    # Встроенный hash (64 бита) одинаков в пределах процесса, а таблица не покидает процесс; 0 - пустая ячейка
+    return hash(key) & 0xFFFFFFFFFFFFFFFF or 1
+
+
+class HashSet64:
+    """Множество ключей в виде 64-битных хешей в одном массиве (открытая адресация).
+
+    Сами ключи не хранятся: рядом с хешем лежит 64-битное значение, по которому
+    владелец находит ключ (смещение строки в файле, индекс в списке). При
+    совпадении хешей add и contains сверяют полный ключ через `same(значение)`,
+    поэтому разные ключи с одинаковым хешем не склеиваются (такие совпадения
+    считаются в `collisions`). 16-32 байта на элемент вместо ~100 байт на строку в set.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        """
+        Args:
+            capacity: Ожидаемое число элементов
+        """
+        size = 16
+        while size < capacity * 2:
+            size *= 2
+        self._table = array("Q", bytes(8 * size))
+        self._values = array("Q", bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+        self.collisions = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, key: str, value: int = 0, same: Optional[Callable[[int], bool]] = None) -> bool:
+        """Добавляет ключ.
+
+        Args:
+            key: Ключ
+            value: Значение, по которому владелец восстановит ключ
+            same: Функция (значение) -> совпадает ли сохранённый ключ с `key`,
+                None - совпадение хешей считается совпадением ключей
+
+        Returns:
+            True, если ключа ещё не было
+        """
+        if not self._insert(_hash64(key), value, same):
+            return False
+        self._count += 1
+        if self._count * 2 > len(self._table):
+            self._grow()
+        return True
+
+    def contains(self, key: str, same: Optional[Callable[[int], bool]] = None) -> bool:
+        """Есть ли ключ (аргументы - как у add)."""
+        hashed = _hash64(key)
+        table, mask = self._table, self._mask
+        index = hashed & mask
+        while table[index]:
+            if table[index] == hashed:
+                if same is None or same(self._values[index]):
+                    return True
+                self.collisions += 1
+            index = (index + 1) & mask
+        return False
+
+    def __contains__(self, key: str) -> bool:
+        return self.contains(key)
+
+    def _insert(self, hashed: int, value: int, same: Optional[Callable[[int], bool]] = None) -> bool:
+        table, mask = self._table, self._mask
+        index = hashed & mask
+        while table[index]:
+            if table[index] == hashed:
+                if same is None or same(self._values[index]):
+                    return False
+                self.collisions += 1
+            index = (index + 1) & mask
+        table[index] = hashed
+        self._values[index] = value
+        return True
+
+    def _grow(self) -> None:
+        old_table, old_values = self._table, self._values
+        self._table = array("Q", bytes(16 * len(old_table)))
+        self._values = array("Q", bytes(16 * len(old_values)))
+        self._mask = len(self._table) - 1
+        for hashed, value in zip(old_table, old_values):
+            if hashed:
+                # Хеши различны или уже сверены при добавлении - повторная сверка не нужна
+                self._insert_unchecked(hashed, value)
+
+    def _insert_unchecked(self, hashed: int, value: int) -> None:
+        table, mask = self._table, self._mask
+        index = hashed & mask
+        while table[index]:
+            index = (index + 1) & mask
+        table[index] = hashed
+        self._values[index] = value
+
+
+class KeySet:
+    """Точное множество ключей ссылок для небольших наборов (журнал, ссылки в памяти).
+
+    Ключи хранятся в списке, HashSet64 - индекс по ним; совпадение хешей
+    сверяется с сохранённым ключом.
+    """
+
+    def __init__(self, keys: Iterable[str] = ()) -> None:
+        self._keys: List[str] = []
+        self._index = HashSet64()
+        for key in keys:
+            self.add(key)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str) -> bool:
+        """Добавляет ключ; True, если его ещё не было."""
+        keys = self._keys
+        if not self._index.add(key, len(keys), lambda index: keys[index] == key):
+            return False
+        keys.append(key)
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        keys = self._keys
+        return self._index.contains(key, lambda index: keys[index] == key)
+
+
+def unique_links(links: Iterable[str], seen: Optional[KeySet] = None) -> Iterator[str]:
+    """Непустые ссылки без повторов (по link_key), в исходном порядке.
+
+    Args:
+        links: Строки со ссылками
+        seen: Ключи, которые уже встречались (например, завершённые по журналу)
+    """
+    seen = seen if seen is not None else KeySet()
+    for line in links:
+        link = line.strip()
+        if link and seen.add(link_key(link)):
+            yield link
+
+
+class LinkSource:
+    """Ссылки из большого файла без загрузки его в память.
+
+    Файл отображается в память (mmap), при первом обращении один проход строит
+    индекс смещений уникальных ссылок (8 байт на ссылку, массив array), дубликаты
+    отсекаются по link_key через HashSet64, значения которого - смещения строк:
+    при совпадении хешей ключ сверяется со строкой по сохранённому смещению.
+    Строки ссылок декодируются из отображения только при выдаче.
+
+    Объект передаётся в другой процесс (например, менеджеру LinkQueue) как путь:
+    файл отображается заново там, где ссылки читаются.
+
+    Поддерживает `len()` (сколько ссылок осталось) и `popleft()`, как deque,
+    которую LinkQueue использует для ссылок в памяти.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path: Путь к файлу со ссылками (по одной на строку)
+        """
+        self.path = path
+
+        self.duplicates = 0
+        self.excluded = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._offsets: Optional[array] = None
+        self._cursor = 0
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state) -> None:
+        self.__init__(state["path"])
+
+    def build(self, exclude: Iterable[str] = ()) -> None:
+        """Строит индекс смещений уникальных ссылок (повторный вызов ничего не делает).
+
+        Args:
+            exclude: Ссылки, которые не нужно выдавать (например, завершённые по журналу)
+        """
+        if self._offsets is not None:
+            return
+
+        offsets = array("Q")
+        self._offsets = offsets
+        with open(self.path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        finished = KeySet(link_key(link.strip()) for link in exclude)
+
+        seen = HashSet64()
+        data = self._mmap
+        size = len(data)
+        position = 0
+        while position < size:
+            end = data.find(b"\n", position)
+            if end < 0:
+                end = size
+            line = data[position:end].strip()
+            if line:
+                link = line.decode("utf-8", errors="replace")
+                key = link_key(link)
+
+                def same(offset: int) -> bool:
+                    stored = self._link(offset)
+                    return stored == link or link_key(stored) == key
+
+                if finished and key in finished:
+                    self.excluded += 1
+                elif seen.add(key, position, same):
+                    offsets.append(position)
+                else:
+                    self.duplicates += 1
+            position = end + 1
+
+        logger.info(
+            f"{self.path}: уникальных ссылок {len(offsets)}, дубликатов {self.duplicates}, "
+            f"пропущено по журналу {self.excluded}, совпадений хешей разных ссылок {seen.collisions}"
+        )
+
+    def _link(self, offset: int) -> str:
+        end = self._mmap.find(b"\n", offset)
+        return self._mmap[offset:end if end >= 0 else len(self._mmap)].strip().decode("utf-8", errors="replace")
+
+    def __len__(self) -> int:
+        self.build()
+        return len(self._offsets) - self._cursor
+
+    def popleft(self) -> str:
+        """Следующая ссылка.
+
+        Raises:
+            IndexError: Ссылки закончились
+        """
+        self.build()
+        if self._cursor >= len(self._offsets):
+            raise IndexError("ссылки закончились")
+        offset = self._offsets[self._cursor]
+        self._cursor += 1
+        return self._link(offset)
+
+    def __iter__(self) -> Iterator[str]:
+        while len(self):
+            yield self.popleft()
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
@@ -0,0 +1,304 @@
+import time
+import queue
+import bisect
+import logging
+import threading
+import multiprocessing
+
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+MetricKey = Tuple[str, Labels]
+
+
+class MetricsRegistry:
+    """Счётчики и гистограммы процесса.
+
+    В каждом процессе есть общий реестр `registry`; метки (например, serial)
+    различают устройства, обслуживаемые одним процессом.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+
+        self._lock = threading.Lock()
+        self._counters: Dict[MetricKey, float] = {}
+        # Гистограмма: (счётчики по корзинам + корзина +Inf, сумма, количество)
+        self._histograms: Dict[MetricKey, Tuple[List[int], float, int]] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, str]) -> MetricKey:
+        return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Увеличивает счётчик."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """Добавляет наблюдение в гистограмму."""
+        key = self._key(name, labels)
+        with self._lock:
+            counts, total, count = self._histograms.get(key) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self._histograms[key] = (counts, total + seconds, count + 1)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Замеряет длительность блока и добавляет её в гистограмму."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def observe_rpc(self, serial: str, method: str, seconds: float) -> None:
+        """Наблюдатель для InstrumentedDevice: задержка RPC по методам."""
+        self.observe("u2_rpc_seconds", seconds, serial=serial, method=method)
+
+    def snapshot(self) -> Dict:
+        """Копия всех значений реестра (сериализуемая через pickle)."""
+        with self._lock:
+            return {
+                "buckets": self.buckets,
+                "counters": dict(self._counters),
+                "histograms": {key: (list(counts), total, count) for key, (counts, total, count) in self._histograms.items()},
+            }
+
+
+registry = MetricsRegistry()
+
+
+def merge_snapshots(snapshots: Iterable[Dict]) -> Dict:
+    """Объединяет снимки нескольких процессов (значения с одинаковыми ключами суммируются)."""
+    merged: Dict = {"buckets": DEFAULT_BUCKETS, "counters": {}, "histograms": {}}
+
+    for snapshot in snapshots:
+        merged["buckets"] = snapshot["buckets"]
+        for key, value in snapshot["counters"].items():
+            merged["counters"][key] = merged["counters"].get(key, 0) + value
+        for key, (counts, total, count) in snapshot["histograms"].items():
+            if key in merged["histograms"]:
+                merged_counts, merged_total, merged_count = merged["histograms"][key]
+                counts = [left + right for left, right in zip(merged_counts, counts)]
+                total += merged_total
+                count += merged_count
+            merged["histograms"][key] = (list(counts), total, count)
+
+    return merged
+
+
+def _escape_label_value(value) -> str:
+    """Экранирует значение метки по текстовому формату Prometheus: \\, \" и перевод строки."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{label}="{_escape_label_value(value)}"' for label, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus(snapshot: Dict) -> str:
+    """Формирует текстовый формат Prometheus из снимка реестра."""
+    lines: List[str] = []
+
+    typed = set()
+    for (name, labels), value in sorted(snapshot["counters"].items()):
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    buckets = snapshot["buckets"]
+    for (name, labels), (counts, total, count) in sorted(snapshot["histograms"].items()):
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, bucket_count in zip([*map(str, buckets), "+Inf"], counts):
+            cumulative += bucket_count
+            lines.append(f"{name}_bucket{_format_labels(labels, (('le', bound),))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsReporter:
+    """Периодически отправляет снимок реестра процесса в главный процесс."""
+
+    def __init__(self, metrics_queue, source: str, interval: float = 5.0) -> None:
+        """
+        Args:
+            metrics_queue: Очередь MetricsCollector.queue
+            source: Имя процесса-источника
+            interval: Период отправки в секундах
+        """
+        self.metrics_queue = metrics_queue
+        self.source = source
+        self.interval = interval
+
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"metrics-{source}", daemon=True)
+
+    def start(self) -> "MetricsReporter":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join(timeout=self.interval)
+        self._push()
+
+    def _push(self) -> None:
+        try:
+            # Снимки кумулятивные, поэтому потеря одного при переполнении не искажает данные
+            self.metrics_queue.put_nowait((self.source, registry.snapshot()))
+        except queue.Full:
+            pass
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._push()
+
+
+class MetricsCollector:
+    """Сбор метрик всех процессов устройств в главном процессе.
+
+    Отдаёт метрики по HTTP в формате Prometheus (GET /metrics) и раз в
+    `summary_interval` секунд пишет в лог строку со скоростями.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9108, summary_interval: float = 60.0) -> None:
+        """
+        Args:
+            host: Адрес HTTP-сервера метрик
+            port: Порт HTTP-сервера метрик, 0 - без HTTP-сервера
+            summary_interval: Период строки-сводки в логе в секундах
+        """
+        self.host = host
+        self.port = port
+        self.summary_interval = summary_interval
+
+        self.queue = multiprocessing.Queue(maxsize=1000)
+
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, Dict] = {}
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._previous_summary: Tuple[float, Dict] = (time.monotonic(), {})
+
+    def start(self) -> "MetricsCollector":
+        self._threads = [
+            threading.Thread(target=self._consume, name="metrics-consumer", daemon=True),
+            threading.Thread(target=self._summarize, name="metrics-summary", daemon=True),
+        ]
+
+        if self.port:
+            collector = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = render_prometheus(collector.snapshot()).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+            self._threads.append(threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True))
+            logger.info(f"Метрики доступны на http://{self.host}:{self._server.server_port}/metrics")
+
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self._drain()
+        logger.info(self.summary())
+
+    def snapshot(self) -> Dict:
+        """Объединённый снимок: последние снимки процессов и реестр главного процесса."""
+        with self._lock:
+            snapshots = list(self._snapshots.values())
+        return merge_snapshots([*snapshots, registry.snapshot()])
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                source, snapshot = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                self._snapshots[source] = snapshot
+
+    def _consume(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                source, snapshot = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                self._snapshots[source] = snapshot
+
+    def summary(self) -> str:
+        """Строка со скоростями по устройствам с момента предыдущей сводки."""
+        now = time.monotonic()
+        snapshot = self.snapshot()
+        previous_at, previous = self._previous_summary
+        self._previous_summary = (now, snapshot["counters"])
+        elapsed = max(now - previous_at, 1e-9)
+
+        per_device: Dict[str, Dict[str, float]] = {}
+        for (name, labels), value in snapshot["counters"].items():
+            serial = dict(labels).get("serial", "-")
+            delta = value - previous.get((name, labels), 0)
+            per_device.setdefault(serial, {})[name] = per_device.get(serial, {}).get(name, 0) + delta
+
+        rpc_latency: Dict[str, Tuple[float, int]] = {}
+        for (name, labels), (_, total, count) in snapshot["histograms"].items():
+            if name == "u2_rpc_seconds":
+                serial = dict(labels).get("serial", "-")
+                rpc_total, rpc_count = rpc_latency.get(serial, (0.0, 0))
+                rpc_latency[serial] = (rpc_total + total, rpc_count + count)
+
+        parts = []
+        for serial in sorted(set(per_device) | set(rpc_latency)):
+            counters = per_device.get(serial, {})
+            rpc_total, rpc_count = rpc_latency.get(serial, (0.0, 0))
+            parts.append(
+                f"{serial}: swipes/s={counters.get('swipes_total', 0) / elapsed:.2f} "
+                f"links/min={counters.get('links_classified_total', 0) / elapsed * 60:.2f} "
+                f"refresh={counters.get('refresh_cycles_total', 0):.0f} "
+                f"rpc_avg={rpc_total / rpc_count * 1000 if rpc_count else 0:.1f}ms"
+            )
+        return "Метрики: " + ("; ".join(parts) if parts else "нет данных")
+
+    def _summarize(self) -> None:
+        while not self._stopped.wait(self.summary_interval):
+            logger.info(self.summary())
@@ -0,0 +1,274 @@
+import time
+import logging
+import pytesseract
+
+from PIL import Image, ImageEnhance, ImageOps, ImageStat
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Полоса экрана (доли ширины/высоты: left, top, right, bottom), в которой
+# на странице видео появляются "Comments", "Key concepts" и "Sponsored".
+WATCH_LABELS_REGION: Tuple[float, float, float, float] = (0.0, 0.25, 1.0, 0.85)
+
+
+def dhash(image: Image.Image, hash_size: int = 16) -> int:
+    """Вычисляет разностный перцептивный хеш (dHash) изображения.
+
+    Args:
+        image: Изображение
+        hash_size: Сторона сетки хеша, длина хеша - hash_size ** 2 бит
+
+    Returns:
+        Хеш в виде целого числа
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), resample=Image.Resampling.BILINEAR)
+    pixels = list(small.getdata())
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for column in range(hash_size):
+            value = (value << 1) | (pixels[offset + column] > pixels[offset + column + 1])
+    return value
+
+
+class OcrCache:
+    """LRU-кеш результатов OCR по перцептивному хешу кадра.
+
+    Кадр считается неизменившимся, если расстояние Хэмминга между хешами
+    не превышает `threshold`. Сетка хеша должна быть достаточно мелкой, чтобы
+    появление короткой надписи меняло хеш, поэтому по умолчанию 16x16.
+
+    Похожие кадры разных видео тоже совпадают по хешу, поэтому владелец
+    очищает кеш (`clear`) перед каждой новой ссылкой.
+    """
+
+    def __init__(self, capacity: int = 32, threshold: int = 2, hash_size: int = 16) -> None:
+        """
+        Args:
+            capacity: Максимальное количество хранимых результатов
+            threshold: Допустимое расстояние Хэмминга между хешами (в битах)
+            hash_size: Сторона сетки dHash
+        """
+        if capacity < 1:
+            raise ValueError(f"Некорректный размер кеша: {capacity}")
+
+        self.capacity = capacity
+        self.threshold = threshold
+        self.hash_size = hash_size
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: "OrderedDict[Tuple[str, int], Dict]" = OrderedDict()
+
+    def key(self, image: Image.Image, lang: str) -> Tuple[str, int]:
+        """Ключ кеша для подготовленного изображения."""
+        return lang, dhash(image, hash_size=self.hash_size)
+
+    def get(self, key: Tuple[str, int]) -> Optional[Dict]:
+        """Возвращает результат для похожего кадра или None.
+
+        Args:
+            key: Ключ, полученный через `key`
+
+        Returns:
+            Сохранённый результат OCR или None
+        """
+        lang, frame_hash = key
+
+        for cached_key in reversed(self._entries):
+            cached_lang, cached_hash = cached_key
+            if cached_lang == lang and bin(cached_hash ^ frame_hash).count("1") <= self.threshold:
+                self._entries.move_to_end(cached_key)
+                self.hits += 1
+                return self._entries[cached_key]
+
+        self.misses += 1
+        return None
+
+    def put(self, key: Tuple[str, int], data: Dict) -> None:
+        """Сохраняет результат OCR, вытесняя самый давний при переполнении."""
+        self._entries[key] = data
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Удаляет сохранённые результаты (счётчики попаданий и промахов сохраняются)."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Счётчики попаданий и промахов."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+class OcrPipeline:
+    """Конвейер предобработки скриншота перед OCR.
+
+    Этапы выполняются в порядке: обрезка -> масштабирование -> оттенки серого ->
+    контраст -> бинаризация -> распознавание. Время каждого этапа (в секундах)
+    сохраняется в `timings` после каждого вызова `recognize`.
+    """
+
+    def __init__(
+        self,
+        region: Optional[Tuple[float, float, float, float]] = WATCH_LABELS_REGION,
+        grayscale: bool = True,
+        threshold: Optional[int] = None,
+        scale: float = 1.0,
+        contrast: float = 1.5,
+        engine=None,
+        cache: Optional[OcrCache] = None,
+        recorder=None,
+    ) -> None:
+        """
+        Args:
+            region: Область интереса в долях экрана (left, top, right, bottom), None - весь кадр
+            grayscale: Переводить ли изображение в оттенки серого
+            threshold: Порог бинаризации 0-255, None - без бинаризации
+            scale: Коэффициент масштабирования (< 1 уменьшает, > 1 увеличивает)
+            contrast: Коэффициент усиления контраста, 1.0 - без изменений
+            engine: Объект с методом image_to_data(image, lang) (например, OcrClient),
+                None - pytesseract в текущем процессе
+            cache: Кеш результатов по перцептивному хешу, None - без кеша
+            recorder: Запись сессии (SessionRecorder), куда сохраняются результаты OCR
+        """
+        if region is not None:
+            left, top, right, bottom = region
+            if not (0.0 <= left < right <= 1.0 and 0.0 <= top < bottom <= 1.0):
+                raise ValueError(f"Некорректная область интереса: {region}")
+        if scale <= 0:
+            raise ValueError(f"Некорректный коэффициент масштабирования: {scale}")
+
+        self.region = region
+        self.grayscale = grayscale
+        self.threshold = threshold
+        self.scale = scale
+        self.contrast = contrast
+        self.engine = engine
+        self.cache = cache
+        self.recorder = recorder
+
+        self.timings: Dict[str, float] = {}
+
+    @classmethod
+    def legacy(cls, scale: bool = False, engine=None) -> "OcrPipeline":
+        """Конвейер, повторяющий исходную обработку полного кадра.
+
+        Args:
+            scale: Увеличивать ли изображение в 4 раза
+            engine: Движок OCR, см. `__init__`
+
+        Returns:
+            Конвейер без обрезки, оттенков серого и бинаризации
+        """
+        return cls(region=None, grayscale=False, scale=4.0 if scale else 1.0, engine=engine)
+
+    def prepare(self, image: Image.Image, rows_cropped: bool = False) -> Image.Image:
+        """Выполняет предобработку изображения.
+
+        Args:
+            image: Исходный скриншот
+            rows_cropped: Кадр уже обрезан по вертикали до полосы `region`
+                (например, на устройстве), обрезается только по горизонтали
+
+        Returns:
+            Подготовленное для OCR изображение
+        """
+        self.timings = {}
+
+        if self.region is not None:
+            started = time.perf_counter()
+            left, top, right, bottom = self.region
+            if rows_cropped:
+                top, bottom = 0.0, 1.0
+            image = image.crop((
+                round(image.width * left),
+                round(image.height * top),
+                round(image.width * right),
+                round(image.height * bottom),
+            ))
+            self.timings["crop"] = time.perf_counter() - started
+
+        if self.scale != 1.0:
+            started = time.perf_counter()
+            size = (max(1, round(image.width * self.scale)), max(1, round(image.height * self.scale)))
+            resample = Image.Resampling.BILINEAR if self.scale < 1.0 else Image.Resampling.BICUBIC
+            image = image.resize(size=size, resample=resample)
+            self.timings["scale"] = time.perf_counter() - started
+
+        if self.grayscale or self.threshold is not None:
+            started = time.perf_counter()
+            image = image.convert("L")
+            # Tesseract лучше распознает тёмный текст на светлом фоне (тёмная тема YouTube)
+            if ImageStat.Stat(image).mean[0] < 128:
+                image = ImageOps.invert(image)
+            self.timings["grayscale"] = time.perf_counter() - started
+
+        if self.contrast != 1.0:
+            started = time.perf_counter()
+            image = ImageEnhance.Contrast(image).enhance(self.contrast)
+            self.timings["contrast"] = time.perf_counter() - started
+
+        if self.threshold is not None:
+            started = time.perf_counter()
+            threshold = self.threshold
+            image = image.point(lambda value: 255 if value > threshold else 0, mode="1")
+            self.timings["binarize"] = time.perf_counter() - started
+
+        return image
+
+    def recognize(self, image: Image.Image, lang: str, rows_cropped: bool = False) -> Dict:
+        """Подготавливает изображение и распознаёт текст.
+
+        Args:
+            image: Исходный скриншот
+            lang: Язык для распознавания
+            rows_cropped: См. `prepare`
+
+        Returns:
+            Словарь с распознанным текстом и метаданными в формате pytesseract
+        """
+        image = self.prepare(image, rows_cropped=rows_cropped)
+
+        key = None
+        if self.cache is not None:
+            started = time.perf_counter()
+            key = self.cache.key(image=image, lang=lang)
+            data = self.cache.get(key)
+            self.timings["cache"] = time.perf_counter() - started
+
+            if data is not None:
+                logger.debug(f"OCR: кадр не изменился, результат из кеша ({self.cache.stats()})")
+                return data
+
+        started = time.perf_counter()
+        if self.engine is not None:
+            data: dict = self.engine.image_to_data(image=image, lang=lang)
+        else:
+            data: dict = pytesseract.image_to_data(
+                image=image,
+                lang=lang,
+                output_type=pytesseract.Output.DICT
+            )
+        self.timings["ocr"] = time.perf_counter() - started
+
+        if self.recorder is not None:
+            self.recorder.write_json("ocr", {"lang": lang, "seconds": self.timings["ocr"], "data": data})
+
+        if key is not None:
+            self.cache.put(key, data)
+
+        stages = ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in self.timings.items())
+        logger.debug(f"OCR {image.width}x{image.height}: {stages}")
+        return data
@@ -0,0 +1,312 @@
+import os
+import time
+import queue
+import signal
+import logging
+import itertools
+import pytesseract
+import multiprocessing
+
+from PIL import Image
+from typing import Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+TSV_COLUMNS = (
+    "level", "page_num", "block_num", "par_num", "line_num", "word_num",
+    "left", "top", "width", "height", "conf", "text",
+)
+
+
+def tsv_to_dict(tsv: str) -> Dict[str, list]:
+    """Преобразует TSV-вывод tesseract в словарь формата pytesseract.Output.DICT.
+
+    Args:
+        tsv: TSV без строки заголовка (как возвращает TessBaseAPI.GetTSVText)
+
+    Returns:
+        Словарь {колонка: список значений}
+    """
+    data: Dict[str, list] = {column: [] for column in TSV_COLUMNS}
+
+    for line in tsv.splitlines():
+        values = line.split("\t")
+        if len(values) < len(TSV_COLUMNS) - 1:
+            continue
+        values += [""] * (len(TSV_COLUMNS) - len(values))
+
+        for column, value in zip(TSV_COLUMNS, values):
+            if column == "text":
+                data[column].append(value)
+            elif column == "conf":
+                data[column].append(float(value))
+            else:
+                data[column].append(int(value))
+
+    return data
+
+
+class _Engine:
+    """Тёплый движок OCR внутри процесса сервиса.
+
+    Использует tesserocr (C-API, модель загружается один раз на язык), а если он
+    не установлен - pytesseract, ограниченный числом процессов сервиса.
+    """
+
+    def __init__(self) -> None:
+        try:
+            import tesserocr
+        except ImportError:
+            tesserocr = None
+            logger.info("tesserocr не установлен, OCR-сервис использует pytesseract")
+
+        self._tesserocr = tesserocr
+        self._apis: Dict[str, object] = {}
+
+    def image_to_data(self, image: Image.Image, lang: str) -> Dict:
+        if self._tesserocr is None:
+            return pytesseract.image_to_data(
+                image=image,
+                lang=lang,
+                output_type=pytesseract.Output.DICT
+            )
+
+        api = self._apis.get(lang)
+        if api is None:
+            api = self._tesserocr.PyTessBaseAPI(lang=lang)
+            self._apis[lang] = api
+
+        api.SetImage(image)
+        api.Recognize()
+        return tsv_to_dict(api.GetTSVText(0))
+
+    def close(self) -> None:
+        for api in self._apis.values():
+            api.End()
+        self._apis.clear()
+
+
+def _engine_loop(requests, responses: Dict[int, object], counters: Dict[str, object]) -> None:
+    """Цикл процесса OCR-движка: берёт запросы из общей очереди и отвечает клиенту."""
+    # Ctrl+C обрабатывает главный процесс, он же останавливает сервис
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    engine = _Engine()
+    try:
+        while True:
+            request = requests.get()
+            if request is None:
+                break
+
+            client_id, request_id, lang, mode, size, payload, enqueued_at = request
+            started = time.monotonic()
+            _add(counters["wait_ms"], round((started - enqueued_at) * 1000))
+
+            try:
+                image = Image.frombytes(mode, size, payload)
+                result = (request_id, engine.image_to_data(image=image, lang=lang), None)
+                _add(counters["completed"], 1)
+            except Exception as e:
+                result = (request_id, None, f"{type(e).__name__}: {e}")
+                _add(counters["failed"], 1)
+
+            _add(counters["ocr_ms"], round((time.monotonic() - started) * 1000))
+            responses[client_id].put(result)
+    finally:
+        engine.close()
+
+
+def _add(counter, value: int) -> None:
+    with counter.get_lock():
+        counter.value += value
+
+
+class OcrClient:
+    """Клиент OCR-сервиса для процесса устройства.
+
+    Повторяет интерфейс pytesseract.image_to_data(output_type=DICT), поэтому
+    подключается к OcrPipeline как `engine`.
+
+    Идентификатор запроса - (pid процесса, номер): клиент передаётся в каждый
+    перезапуск процесса устройства, и ответ, оставшийся в очереди после
+    упавшего процесса, не совпадёт с запросом нового.
+    """
+
+    def __init__(self, client_id: int, requests, responses, counters: Dict[str, object], timeout: float) -> None:
+        """
+        Args:
+            client_id: Номер очереди ответов клиента в сервисе
+            requests: Общая очередь запросов
+            responses: Очередь ответов клиента
+            counters: Общие счётчики сервиса
+            timeout: Время ожидания постановки в очередь и ответа
+        """
+        self.client_id = client_id
+        self.timeout = timeout
+
+        self._requests = requests
+        self._responses = responses
+        self._counters = counters
+        self._request_ids = itertools.count()
+
+    def image_to_data(self, image: Image.Image, lang: str) -> Dict:
+        """Отправляет изображение в сервис и ждёт результат.
+
+        Args:
+            image: Подготовленное изображение
+            lang: Язык для распознавания
+
+        Returns:
+            Словарь с распознанным текстом и метаданными в формате pytesseract
+
+        Raises:
+            TimeoutError: Очередь сервиса переполнена или ответ не получен вовремя
+            RuntimeError: Ошибка распознавания в процессе сервиса
+        """
+        request_id: Tuple[int, int] = (os.getpid(), next(self._request_ids))
+        request = (
+            self.client_id, request_id, lang,
+            image.mode, image.size, image.tobytes(), time.monotonic(),
+        )
+
+        try:
+            # Ограниченная очередь: при перегрузке клиент ждёт, а не копит запросы
+            self._requests.put(request, timeout=self.timeout)
+        except queue.Full:
+            _add(self._counters["rejected"], 1)
+            raise TimeoutError(f"Очередь OCR-сервиса переполнена ({self.timeout} сек)")
+        _add(self._counters["submitted"], 1)
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"OCR-сервис не ответил за {self.timeout} сек")
+            try:
+                response_id, data, error = self._responses.get(timeout=remaining)
+            except queue.Empty:
+                continue
+
+            # Ответы на запросы, по которым клиент уже не дождался, пропускаем
+            if response_id != request_id:
+                continue
+            if error is not None:
+                raise RuntimeError(f"Ошибка OCR-сервиса: {error}")
+            return data
+
+
+class OcrService:
+    """Долгоживущий пул OCR-движков, общий для всех процессов устройств."""
+
+    def __init__(self, engines: int = 2, max_pending: int = 32, timeout: float = 30.0, max_clients: int = 32) -> None:
+        """
+        Args:
+            engines: Количество процессов с тёплыми движками
+            max_pending: Максимальная длина очереди запросов (backpressure)
+            timeout: Время ожидания постановки в очередь и ответа для клиентов
+            max_clients: Сколько клиентов можно зарегистрировать (очереди ответов
+                создаются заранее: процессы движков получают их при запуске)
+        """
+        if engines < 1:
+            raise ValueError(f"Некорректное количество OCR-движков: {engines}")
+
+        self.engines = engines
+        self.max_pending = max_pending
+        self.timeout = timeout
+
+        self._requests = multiprocessing.Queue(maxsize=max_pending)
+        self._responses: Dict[int, object] = {client_id: multiprocessing.Queue() for client_id in range(max_clients)}
+        self._clients: Dict[str, OcrClient] = {}
+        self._counters: Dict[str, object] = {
+            name: multiprocessing.Value("q", 0)
+            for name in ("submitted", "completed", "failed", "rejected", "wait_ms", "ocr_ms")
+        }
+        self._processes: List[multiprocessing.Process] = []
+
+    def client(self, name: str) -> OcrClient:
+        """Клиент с именем `name` (например, серийным номером устройства).
+
+        Можно вызывать и после `start`, когда процесс устройства запускается:
+        клиент получает свободную очередь ответов из созданных заранее. Повторный
+        вызов с тем же именем возвращает того же клиента.
+
+        Returns:
+            Клиент, который передаётся в процесс устройства
+
+        Raises:
+            RuntimeError: Все max_clients очередей ответов заняты
+        """
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+
+        client_id = len(self._clients)
+        if client_id >= len(self._responses):
+            raise RuntimeError(f"OCR-сервис: все {len(self._responses)} очередей ответов заняты")
+
+        client = self._clients[name] = OcrClient(
+            client_id=client_id,
+            requests=self._requests,
+            responses=self._responses[client_id],
+            counters=self._counters,
+            timeout=self.timeout,
+        )
+        return client
+
+    def start(self) -> None:
+        """Запускает процессы OCR-движков."""
+        for index in range(self.engines):
+            process = multiprocessing.Process(
+                name=f"ocr-{index}",
+                target=_engine_loop,
+                args=(self._requests, self._responses, self._counters),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+
+        logger.info(f"OCR-сервис запущен: движков {self.engines}, очередь {self.max_pending}")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Останавливает процессы OCR-движков."""
+        for _ in self._processes:
+            try:
+                self._requests.put(None, timeout=timeout)
+            except queue.Full:
+                break
+
+        for process in self._processes:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        self._processes.clear()
+        logger.info(f"OCR-сервис остановлен: {self.stats()}")
+
+    def queue_depth(self) -> Optional[int]:
+        """Текущая длина очереди запросов (None, если платформа не поддерживает qsize)."""
+        try:
+            return self._requests.qsize()
+        except NotImplementedError:
+            return None
+
+    def stats(self) -> Dict[str, float]:
+        """Статистика сервиса.
+
+        Returns:
+            Словарь со счётчиками запросов, глубиной очереди и средними задержками
+        """
+        values = {name: counter.value for name, counter in self._counters.items()}
+        handled = max(values["completed"] + values["failed"], 1)
+
+        return {
+            "queue_depth": self.queue_depth(),
+            "submitted": values["submitted"],
+            "completed": values["completed"],
+            "failed": values["failed"],
+            "rejected": values["rejected"],
+            "avg_wait_ms": round(values["wait_ms"] / handled, 1),
+            "avg_ocr_ms": round(values["ocr_ms"] / handled, 1),
+        }
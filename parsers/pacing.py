@@ -0,0 +1,142 @@
+import time
+import logging
+
+from collections import deque
+from uiautomator2 import Device
+from typing import Callable, Deque, Optional, Tuple
+
+from parsers.metrics import registry
+from parsers.hierarchy import has_progress_indicator, hierarchy_signature
+
+
+logger = logging.getLogger(__name__)
+
+
+class Pacer:
+    """Ожидание готовности интерфейса вместо фиксированных пауз.
+
+    Каждое ожидание ограничено таймаутом (прежней фиксированной паузой), поэтому
+    медленное устройство ждёт не дольше, чем раньше, а быстрое продолжает сразу,
+    как только сигнал готовности получен. Фактическая длительность ожиданий
+    сохраняется в `records` и в метрике wait_seconds.
+    """
+
+    def __init__(
+        self,
+        device: Device,
+        stop_event=None,
+        interval: float = 0.25,
+        history: int = 100,
+    ) -> None:
+        """
+        Args:
+            device: Экземпляр устройства uiautomator2
+            stop_event: Событие остановки, прерывающее ожидание
+            interval: Период опроса сигнала в секундах
+            history: Сколько последних ожиданий хранить в `records`
+        """
+        self.device = device
+        self.stop_event = stop_event
+        self.interval = interval
+
+        # (название, длительность, дождались ли сигнала)
+        self.records: Deque[Tuple[str, float, bool]] = deque(maxlen=history)
+        # Последний дамп иерархии, полученный при ожидании (можно использовать без нового RPC)
+        self.last_hierarchy: Optional[str] = None
+
+    def _stopped(self) -> bool:
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def wait_until(
+        self,
+        name: str,
+        condition: Callable[[], bool],
+        timeout: float,
+        interval: Optional[float] = None,
+    ) -> bool:
+        """Ждёт выполнения условия, опрашивая его каждые `interval` секунд.
+
+        Args:
+            name: Название ожидания для журнала и метрик
+            condition: Функция без аргументов, возвращающая True при готовности
+            timeout: Максимальное время ожидания в секундах
+            interval: Период опроса, None - период Pacer
+
+        Returns:
+            True, если условие выполнилось до таймаута
+        """
+        interval = self.interval if interval is None else interval
+        started = time.monotonic()
+        satisfied = False
+
+        while True:
+            if condition():
+                satisfied = True
+                break
+
+            remaining = timeout - (time.monotonic() - started)
+            if remaining <= 0 or self._stopped():
+                break
+            time.sleep(min(interval, remaining))
+
+        seconds = time.monotonic() - started
+        self.records.append((name, seconds, satisfied))
+
+        serial = self.device.serial
+        registry.observe("wait_seconds", seconds, serial=serial, wait=name)
+        if not satisfied:
+            registry.inc("wait_timeouts_total", serial=serial, wait=name)
+        logger.debug(
+            f"[{serial}] Ожидание {name}: {seconds:.2f} сек ({'готово' if satisfied else 'таймаут'})",
+            extra={"phase": name, "seconds": round(seconds, 3), "satisfied": satisfied},
+        )
+        return satisfied
+
+    def wait_for_stable_hierarchy(self, name: str, timeout: float, stable_count: int = 2) -> bool:
+        """Ждёт, пока структура экрана перестанет меняться (прокрутка и анимации завершились).
+
+        Args:
+            name: Название ожидания
+            timeout: Максимальное время ожидания в секундах
+            stable_count: Сколько одинаковых дампов подряд считать устойчивым состоянием
+
+        Returns:
+            True, если экран стабилизировался до таймаута
+        """
+        state = {"signature": None, "streak": 0}
+
+        def is_stable() -> bool:
+            self.last_hierarchy = self.device.dump_hierarchy()
+            signature = hierarchy_signature(self.last_hierarchy)
+            state["streak"] = state["streak"] + 1 if signature == state["signature"] else 1
+            state["signature"] = signature
+            return state["streak"] >= stable_count
+
+        return self.wait_until(name, is_stable, timeout)
+
+    def wait_for_refresh(self, name: str, timeout: float, stable_count: int = 2) -> bool:
+        """Ждёт окончания обновления ленты: спиннер исчез, структура экрана устойчива.
+
+        Args:
+            name: Название ожидания
+            timeout: Максимальное время ожидания в секундах
+            stable_count: Сколько одинаковых дампов без спиннера подряд требуется
+
+        Returns:
+            True, если лента обновилась до таймаута
+        """
+        state = {"signature": None, "streak": 0}
+
+        def is_refreshed() -> bool:
+            xml = self.last_hierarchy = self.device.dump_hierarchy()
+            if has_progress_indicator(xml):
+                state["streak"] = 0
+                state["signature"] = None
+                return False
+
+            signature = hierarchy_signature(xml)
+            state["streak"] = state["streak"] + 1 if signature == state["signature"] else 1
+            state["signature"] = signature
+            return state["streak"] >= stable_count
+
+        return self.wait_until(name, is_refreshed, timeout)
@@ -0,0 +1,285 @@
+import io
+import os
+import re
+import json
+import mmap
+import time
+import zlib
+import struct
+import logging
+import threading
+
+from PIL import Image
+from uiautomator2 import Device
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GASREC1\n"
+INDEX_MAGIC = b"GASIDX1\n"
+
+# Заголовок блока: тип, время (unix, сек), длина данных
+CHUNK_HEADER = struct.Struct("<BdI")
+# Запись индекса: смещение данных, тип, время, длина данных
+INDEX_ENTRY = struct.Struct("<QBdI")
+# Хвост файла: смещение индекса, метка индекса
+TRAILER = struct.Struct("<Q8s")
+
+# Типы блоков: вызов устройства (JSON), дамп иерархии (zlib), скриншот (PNG),
+# результат OCR (JSON), произвольная метка (JSON)
+KINDS = ("call", "hierarchy", "screenshot", "ocr", "mark")
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+
+def session_path(directory: str, serial: str) -> str:
+    """Путь к новому файлу записи устройства: <каталог>/<serial>-<дата-время>.gasrec."""
+    os.makedirs(directory, exist_ok=True)
+    name = re.sub(r"[^\w.-]", "_", serial)
+    return os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.gasrec")
+
+
+class Entry(NamedTuple):
+    kind: str
+    timestamp: float
+    payload: memoryview
+
+
+class SessionRecorder:
+    """Запись сессии парсера в файл блоков с индексом.
+
+    Блоки дописываются в конец файла и сбрасываются на диск сразу, поэтому
+    запись, оборванная падением процесса, читается (индекс строится сканированием).
+    `close` дописывает индекс для быстрого открытия.
+
+    Первым блоком записывается заголовок (метка {"header": ...}) с режимом и
+    параметрами парсера: replay.py создаёт парсер с теми же параметрами, иначе
+    последовательность вызовов устройства расходится с записью.
+    """
+
+    def __init__(self, path: str, header: Optional[Dict] = None) -> None:
+        """
+        Args:
+            path: Путь к файлу записи (перезаписывается)
+            header: Параметры сессии: parsing, duration и parser_options (параметры create_parser)
+        """
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._index: List[Tuple[int, int, float, int]] = []
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        if header is not None:
+            self.write_json("mark", {"header": header})
+
+    def write(self, kind: str, payload: bytes, timestamp: Optional[float] = None) -> None:
+        """Дописывает блок.
+
+        Args:
+            kind: Тип блока из KINDS
+            payload: Данные блока
+            timestamp: Время события, None - текущее
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        code = KIND_CODES[kind]
+        with self._lock:
+            if self._file.closed:
+                return
+            offset = self._file.tell() + CHUNK_HEADER.size
+            self._file.write(CHUNK_HEADER.pack(code, timestamp, len(payload)))
+            self._file.write(payload)
+            self._file.flush()
+            self._index.append((offset, code, timestamp, len(payload)))
+
+    def write_json(self, kind: str, value) -> None:
+        self.write(kind, json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+    def write_hierarchy(self, xml: str) -> None:
+        self.write("hierarchy", zlib.compress(xml.encode("utf-8"), 1))
+
+    def write_screenshot(self, image: Image.Image) -> None:
+        buffer = io.BytesIO()
+        # Быстрое сжатие: запись не должна заметно замедлять парсер
+        image.save(buffer, format="PNG", compress_level=1)
+        self.write("screenshot", buffer.getvalue())
+
+    def close(self) -> None:
+        """Дописывает индекс и закрывает файл."""
+        with self._lock:
+            if self._file.closed:
+                return
+            index_offset = self._file.tell()
+            for entry in self._index:
+                self._file.write(INDEX_ENTRY.pack(*entry))
+            self._file.write(TRAILER.pack(index_offset, INDEX_MAGIC))
+            self._file.close()
+        logger.info(f"Запись сессии сохранена: {self.path} ({len(self._index)} блоков)")
+
+
+class SessionRecording:
+    """Чтение записи сессии через mmap: данные блоков не копируются до декодирования."""
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path: Путь к файлу записи
+        """
+        self.path = path
+
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC):
+            raise ValueError(f"{path} не является записью сессии")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} не является записью сессии")
+
+        self.index: List[Tuple[int, int, float, int]] = self._read_index() or self._scan()
+
+    def _read_index(self) -> Optional[List[Tuple[int, int, float, int]]]:
+        size = len(self._mmap)
+        if size < len(MAGIC) + TRAILER.size:
+            return None
+        index_offset, magic = TRAILER.unpack_from(self._mmap, size - TRAILER.size)
+        if magic != INDEX_MAGIC or (size - TRAILER.size - index_offset) % INDEX_ENTRY.size:
+            return None
+        return [
+            INDEX_ENTRY.unpack_from(self._mmap, offset)
+            for offset in range(index_offset, size - TRAILER.size, INDEX_ENTRY.size)
+        ]
+
+    def _scan(self) -> List[Tuple[int, int, float, int]]:
+        """Строит индекс проходом по блокам (запись без хвоста)."""
+        index = []
+        offset = len(MAGIC)
+        size = len(self._mmap)
+        while offset + CHUNK_HEADER.size <= size:
+            code, timestamp, length = CHUNK_HEADER.unpack_from(self._mmap, offset)
+            start = offset + CHUNK_HEADER.size
+            if code >= len(KINDS) or start + length > size:
+                break
+            index.append((start, code, timestamp, length))
+            offset = start + length
+        logger.info(f"{self.path}: индекс восстановлен сканированием ({len(index)} блоков)")
+        return index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __iter__(self) -> Iterator[Entry]:
+        return self.entries()
+
+    def entries(self, kind: Optional[str] = None) -> Iterator[Entry]:
+        """Блоки записи по порядку (опционально - только одного типа)."""
+        code = None if kind is None else KIND_CODES[kind]
+        view = memoryview(self._mmap)
+        for offset, entry_code, timestamp, length in self.index:
+            if code is None or entry_code == code:
+                yield Entry(KINDS[entry_code], timestamp, view[offset:offset + length])
+
+    @staticmethod
+    def decode(entry: Entry):
+        """Декодирует данные блока: dict для JSON, str для иерархии, Image для скриншота."""
+        if entry.kind == "hierarchy":
+            return zlib.decompress(entry.payload).decode("utf-8")
+        if entry.kind == "screenshot":
+            with Image.open(io.BytesIO(entry.payload)) as image:
+                return image.convert("RGB")
+        return json.loads(bytes(entry.payload))
+
+    def header(self) -> Dict:
+        """Заголовок записи (SessionRecorder header) или пустой словарь для записей без него."""
+        for entry in self.entries("mark"):
+            mark = self.decode(entry)
+            if "header" in mark:
+                return mark["header"]
+        return {}
+
+    def duration(self) -> float:
+        """Длительность записи в секундах."""
+        if not self.index:
+            return 0.0
+        return self.index[-1][2] - self.index[0][2]
+
+    def close(self) -> None:
+        self._mmap.close()
+        self._file.close()
+
+
+def _jsonable(value):
+    if isinstance(value, tuple):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, list):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)
+
+
+class _Recording:
+    """Общая часть прокси записи: вызовы методов сохраняются блоками "call"."""
+
+    def __init__(self, target, recorder: SessionRecorder, prefix: str = "", selector: Optional[Dict] = None) -> None:
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_prefix", prefix)
+        object.__setattr__(self, "_selector", selector)
+        object.__setattr__(self, "recorder", recorder)
+
+    def _record_call(self, method: str, args, kwargs, result) -> None:
+        call = {"method": f"{self._prefix}{method}", "args": _jsonable(args), "kwargs": _jsonable(kwargs)}
+        if self._selector is not None:
+            call["selector"] = self._selector
+        if method == "shell" and hasattr(result, "output"):
+            call["result"] = {"output": result.output, "exit_code": result.exit_code}
+        else:
+            call["result"] = _jsonable(result)
+        self.recorder.write_json("call", call)
+
+    def __getattr__(self, name: str):
+        if name == "info":
+            value = self._target.info
+            self._record_call("info", (), {}, value)
+            return value
+
+        value = getattr(self._target, name)
+        if not callable(value) or name.startswith("_"):
+            return value
+
+        def recorded(*args, **kwargs):
+            result = value(*args, **kwargs)
+            if name == "dump_hierarchy" and not self._prefix:
+                self.recorder.write_hierarchy(result)
+            elif name == "screenshot" and not self._prefix and isinstance(result, Image.Image):
+                self.recorder.write_screenshot(result)
+            else:
+                self._record_call(name, args, kwargs, result)
+            return result
+
+        recorded.__name__ = name
+        return recorded
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._target, name, value)
+        self._record_call(f"set_{name}", (value,), {}, None)
+
+
+class RecordingDevice(_Recording):
+    """Прокси над uiautomator2.Device, записывающий каждый вызов и его результат.
+
+    Дампы иерархии и скриншоты сохраняются отдельными блоками (zlib и PNG),
+    остальные вызовы, включая селекторы device(...), - блоками "call" в JSON.
+    Запись воспроизводится через parsers.replay.ReplayDevice.
+    """
+
+    def __init__(self, device: Device, recorder: SessionRecorder) -> None:
+        """
+        Args:
+            device: Экземпляр устройства uiautomator2 (можно InstrumentedDevice)
+            recorder: Файл записи сессии
+        """
+        super().__init__(device, recorder)
+
+    def __call__(self, **selector) -> _Recording:
+        return _Recording(self._target(**selector), self.recorder, prefix="selector.", selector=selector)
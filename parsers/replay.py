@@ -0,0 +1,187 @@
+import re
+import json
+import time
+import logging
+import contextlib
+
+from collections import deque
+from uiautomator2 import ShellResponse
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from parsers.recording import Entry, SessionRecording
+
+
+logger = logging.getLogger(__name__)
+
+# Вызовы, результат которых берётся из записи; когда результаты кончились, воспроизведение завершается.
+# Остальные вызовы (жесты, запуск приложений) при воспроизведении ничего не делают.
+DATA_METHODS = frozenset((
+    "info", "dump_hierarchy", "screenshot", "shell", "app_info",
+    "selector.exists", "selector.bounds",
+))
+
+LINK_PATTERN = re.compile(r"android\.intent\.action\.VIEW -d \"([^\"]+)\"")
+
+
+class ReplayFinished(Exception):
+    """Записанные ответы устройства закончились."""
+
+
+def _call_key(method: str, selector: Optional[Dict] = None) -> str:
+    if selector is None:
+        return method
+    return f"{method}:{json.dumps(selector, sort_keys=True, ensure_ascii=False)}"
+
+
+class ReplayUiObject:
+    """Результат селектора ReplayDevice(...)."""
+
+    def __init__(self, device: "ReplayDevice", selector: Dict) -> None:
+        self.device = device
+        self.selector = selector
+
+    def exists(self, *args, **kwargs) -> bool:
+        return self.device.next_result("selector.exists", self.selector)
+
+    def bounds(self, *args, **kwargs) -> Tuple[int, int, int, int]:
+        return tuple(self.device.next_result("selector.bounds", self.selector))
+
+    def click(self, *args, **kwargs) -> None:
+        self.device.next_result("selector.click", self.selector)
+
+
+class ReplayDevice:
+    """Воспроизводит запись RecordingDevice вместо подключённого телефона.
+
+    Каждый вызов получает следующий записанный результат того же метода
+    (для селекторов - того же метода с тем же селектором) без задержек RPC.
+    Дампы иерархии и скриншоты декодируются из mmap только при запросе.
+    """
+
+    # Воспроизведение не пишется повторно
+    recorder = None
+
+    def __init__(self, recording: SessionRecording, serial: Optional[str] = None) -> None:
+        """
+        Args:
+            recording: Открытая запись сессии
+            serial: Серийный номер для журналов и метрик, None - по имени файла
+        """
+        object.__setattr__(self, "recording", recording)
+        object.__setattr__(self, "serial", serial or f"replay-{recording.path.rsplit('/', 1)[-1]}")
+        object.__setattr__(self, "consumed", {})
+        object.__setattr__(self, "_queues", {})
+
+        for entry in recording.entries():
+            if entry.kind == "hierarchy":
+                self._queues.setdefault("dump_hierarchy", deque()).append(entry)
+            elif entry.kind == "screenshot":
+                self._queues.setdefault("screenshot", deque()).append(entry)
+            elif entry.kind == "call":
+                call = SessionRecording.decode(entry)
+                key = _call_key(call["method"], call.get("selector"))
+                self._queues.setdefault(key, deque()).append(call.get("result"))
+
+    def next_result(self, method: str, selector: Optional[Dict] = None):
+        """Возвращает следующий записанный результат вызова.
+
+        Raises:
+            ReplayFinished: Результаты вызова, влияющего на решения парсера, закончились
+        """
+        key = _call_key(method, selector)
+        self.consumed[method] = self.consumed.get(method, 0) + 1
+
+        queue: Deque = self._queues.get(key, deque())
+        if not queue:
+            if method in DATA_METHODS:
+                raise ReplayFinished(f"Запись закончилась на вызове {key}")
+            return None
+
+        result = queue.popleft()
+        if isinstance(result, Entry):
+            return SessionRecording.decode(result)
+        return result
+
+    @property
+    def info(self) -> Dict:
+        return self.next_result("info")
+
+    def dump_hierarchy(self, *args, **kwargs) -> str:
+        return self.next_result("dump_hierarchy")
+
+    def screenshot(self, *args, **kwargs):
+        return self.next_result("screenshot")
+
+    def shell(self, *args, **kwargs) -> ShellResponse:
+        result = self.next_result("shell")
+        if isinstance(result, dict):
+            return ShellResponse(result.get("output", ""), result.get("exit_code", 0))
+        return ShellResponse(result or "", 0)
+
+    def __call__(self, **selector) -> ReplayUiObject:
+        return ReplayUiObject(self, selector)
+
+    def __getattr__(self, name: str):
+        # Сырой снимок экрана через adb при воспроизведении недоступен, парсер использует записанные скриншоты
+        if name.startswith("_") or name == "adb_device":
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.next_result(name)
+
+    def __setattr__(self, name: str, value) -> None:
+        # Установка ориентации и подобных свойств при воспроизведении не нужна
+        self.next_result(f"set_{name}")
+
+
+class RecordedOcr:
+    """Движок OCR, возвращающий записанные результаты по порядку (интерфейс OcrClient)."""
+
+    def __init__(self, recording: SessionRecording) -> None:
+        self._results: Iterator[Entry] = recording.entries("ocr")
+        self.recorded_seconds: List[float] = []
+
+    def image_to_data(self, image, lang: str) -> Dict:
+        entry = next(self._results, None)
+        if entry is None:
+            raise ReplayFinished("Записанные результаты OCR закончились")
+        record = SessionRecording.decode(entry)
+        self.recorded_seconds.append(record.get("seconds", 0.0))
+        return record["data"]
+
+
+def recorded_links(recording: SessionRecording) -> List[str]:
+    """Ссылки, открытые в записанной сессии (из команд am start)."""
+    links = []
+    for entry in recording.entries("call"):
+        call = SessionRecording.decode(entry)
+        if call["method"] != "shell" or not call["args"]:
+            continue
+        match = LINK_PATTERN.search(str(call["args"][0]))
+        if match:
+            links.append(match.group(1))
+    return links
+
+
+@contextlib.contextmanager
+def fast_forward() -> Iterator[Dict[str, float]]:
+    """Виртуальное время для воспроизведения на полной скорости.
+
+    time.sleep не ждёт, а сдвигает time.monotonic вперёд, поэтому таймауты
+    ожиданий срабатывают после того же числа опросов, что и при записи.
+
+    Yields:
+        Словарь с ключом "skipped" - сколько секунд ожидания пропущено
+    """
+    state = {"skipped": 0.0}
+    real_sleep, real_monotonic = time.sleep, time.monotonic
+
+    def sleep(seconds: float) -> None:
+        state["skipped"] += max(0.0, seconds)
+
+    def monotonic() -> float:
+        return real_monotonic() + state["skipped"]
+
+    time.sleep, time.monotonic = sleep, monotonic
+    try:
+        yield state
+    finally:
+        time.sleep, time.monotonic = real_sleep, real_monotonic
@@ -0,0 +1,176 @@
+import struct
+import logging
+
+from PIL import Image
+from uiautomator2 import Device
+from typing import Dict, NamedTuple, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Форматы пикселей screencap (android.graphics.PixelFormat): формат -> (байт на пиксель, raw-режим PIL)
+PIXEL_FORMATS: Dict[int, Tuple[int, str]] = {
+    1: (4, "RGBA"),  # RGBA_8888
+    2: (4, "RGBX"),  # RGBX_8888
+    3: (3, "RGB"),   # RGB_888
+    4: (2, "BGR;16"),  # RGB_565
+    5: (4, "BGRA"),  # BGRA_8888
+}
+
+# Заголовок: width, height, format (uint32 LE) и, начиная с Android 9, ещё colorSpace
+HEADER_SIZES = (16, 12)
+
+
+class RawFrame(NamedTuple):
+    """Кадр screencap без PNG: пиксели остаются в буфере, полученном от устройства."""
+
+    width: int
+    height: int
+    pixel_format: int
+    pixels: memoryview
+    top: int = 0
+
+    @property
+    def bytes_per_pixel(self) -> int:
+        return PIXEL_FORMATS[self.pixel_format][0]
+
+    def to_image(self) -> Image.Image:
+        """Оборачивает пиксели в изображение PIL.
+
+        Для RGBA_8888 изображение использует буфер кадра без копирования;
+        для остальных форматов PIL конвертирует пиксели при создании.
+        """
+        _, raw_mode = PIXEL_FORMATS[self.pixel_format]
+        image_mode = "RGBA" if raw_mode in ("RGBA", "BGRA") else "RGB"
+        return Image.frombuffer(image_mode, (self.width, self.height), self.pixels, "raw", raw_mode, 0, 1)
+
+
+def parse_header(data: bytes, total_size: Optional[int] = None) -> Tuple[int, int, int, int]:
+    """Разбирает заголовок вывода `screencap` без `-p`.
+
+    Args:
+        data: Начало вывода screencap (не меньше 16 байт)
+        total_size: Полный размер вывода; по нему определяется размер заголовка
+
+    Returns:
+        (ширина, высота, формат, размер заголовка)
+
+    Raises:
+        ValueError: Неизвестный формат пикселей или размер данных не совпадает с заголовком
+    """
+    if len(data) < 12:
+        raise ValueError(f"Слишком короткий заголовок screencap: {len(data)} байт")
+
+    width, height, pixel_format = struct.unpack_from("<III", data, 0)
+    if pixel_format not in PIXEL_FORMATS:
+        raise ValueError(f"Неизвестный формат пикселей screencap: {pixel_format}")
+
+    bytes_per_pixel, _ = PIXEL_FORMATS[pixel_format]
+    if total_size is None:
+        return width, height, pixel_format, HEADER_SIZES[0]
+
+    for header_size in HEADER_SIZES:
+        if total_size == header_size + width * height * bytes_per_pixel:
+            return width, height, pixel_format, header_size
+
+    raise ValueError(
+        f"Размер вывода screencap {total_size} не соответствует кадру {width}x{height} формата {pixel_format}"
+    )
+
+
+def parse_raw_screencap(data: bytes) -> RawFrame:
+    """Разбирает полный вывод `screencap` без `-p` без копирования пикселей.
+
+    Args:
+        data: Вывод screencap
+
+    Returns:
+        Кадр с memoryview на пиксели внутри `data`
+    """
+    width, height, pixel_format, header_size = parse_header(data, total_size=len(data))
+    return RawFrame(width, height, pixel_format, memoryview(data)[header_size:])
+
+
+class RawScreenCapture:
+    """Снимок экрана через `exec:screencap` без кодирования и декодирования PNG.
+
+    Первый вызов снимает полный кадр и запоминает геометрию. Если задана полоса
+    строк `rows`, последующие снимки обрезаются на устройстве (tail/head по байтам),
+    и по adb передаётся только нужная полоса.
+    """
+
+    def __init__(self, device: Device, rows: Optional[Tuple[float, float]] = None) -> None:
+        """
+        Args:
+            device: Экземпляр устройства uiautomator2
+            rows: Полоса строк в долях высоты (top, bottom), None - весь кадр
+        """
+        self.device = device
+        self.rows = rows
+
+        self._geometry: Optional[Tuple[int, int, int, int]] = None
+
+    def _exec(self, command: str) -> bytes:
+        adb_device = self.device.adb_device
+        with adb_device.open_transport() as connection:
+            connection.send_command(f"exec:{command}")
+            connection.check_okay()
+            return connection.read_until_close(encoding=None)
+
+    def capture(self) -> RawFrame:
+        """Снимает кадр (или полосу кадра).
+
+        Returns:
+            Кадр; для полосы `top` - номер первой строки в полном кадре
+        """
+        if self._geometry is None or self.rows is None:
+            frame = parse_raw_screencap(self._exec("screencap"))
+            self._geometry = (
+                frame.width, frame.height, frame.pixel_format,
+                len(frame.pixels.obj) - len(frame.pixels),
+            )
+            if self.rows is None:
+                return frame
+            return self._slice(frame)
+
+        width, height, pixel_format, header_size = self._geometry
+        top, bottom = self._row_range(height)
+        row_size = width * PIXEL_FORMATS[pixel_format][0]
+        size = (bottom - top) * row_size
+
+        # Заголовок передаётся вместе с полосой (dd по байту не читает из канала лишнего),
+        # чтобы поворот с тем же числом байт не обрезался по старой геометрии
+        data = self._exec(
+            f"screencap | {{ dd bs=1 count={header_size} 2>/dev/null; "
+            f"tail -c +{top * row_size + 1} | head -c {size}; }}"
+        )
+        try:
+            geometry = parse_header(data[:header_size])[:3]
+        except ValueError:
+            geometry = None
+        if geometry != (width, height, pixel_format) or len(data) != header_size + size:
+            # Геометрия изменилась (поворот экрана) - снимаем полный кадр заново
+            logger.debug(
+                f"[{self.device.serial}] Полоса screencap: заголовок {geometry} вместо "
+                f"{(width, height, pixel_format)}, {len(data)} байт вместо {header_size + size}, полный снимок"
+            )
+            self._geometry = None
+            return self.capture()
+
+        return RawFrame(width, bottom - top, pixel_format, memoryview(data)[header_size:], top)
+
+    def _row_range(self, height: int) -> Tuple[int, int]:
+        top, bottom = self.rows
+        return round(height * top), max(round(height * bottom), round(height * top) + 1)
+
+    def _slice(self, frame: RawFrame) -> RawFrame:
+        top, bottom = self._row_range(frame.height)
+        row_size = frame.width * frame.bytes_per_pixel
+        return RawFrame(
+            frame.width, bottom - top, frame.pixel_format,
+            frame.pixels[top * row_size:bottom * row_size], top,
+        )
+
+    def screenshot(self) -> Image.Image:
+        """Снимок в виде изображения PIL (аналог device.screenshot() для полосы `rows`)."""
+        return self.capture().to_image()
@@ -0,0 +1,259 @@
+import time
+import queue
+import socket
+import logging
+import secrets
+import threading
+import itertools
+
+from uiautomator2 import Device, ShellResponse
+from typing import List, Sequence
+
+from parsers.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+# Сколько раз переподключаться при обрыве сессии, прежде чем выполнить команду через device.shell
+RECONNECT_ATTEMPTS = 1
+
+
+class ShellSession:
+    """Одна долгоживущая сессия `sh` на устройстве через `exec:sh`.
+
+    Соединение adb открывается один раз, команды пишутся в stdin оболочки.
+    После каждой команды оболочка печатает маркер завершения с кодом возврата,
+    по нему вывод делится между командами. Несколько команд можно отправить
+    одной записью (`run_many`) и затем прочитать их результаты по порядку.
+
+    stdin команд перенаправлен из /dev/null, чтобы команда не съела
+    следующие за ней строки сессии; stderr объединён с stdout, как у device.shell.
+    """
+
+    def __init__(self, device: Device) -> None:
+        """
+        Args:
+            device: Экземпляр устройства uiautomator2 (нужен adb_device)
+        """
+        self.device = device
+
+        self._connection = None
+        self._buffer = b""
+        self._token = secrets.token_hex(4)
+        self._ids = itertools.count()
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None
+
+    def connect(self) -> None:
+        connection = self.device.adb_device.open_transport()
+        try:
+            connection.send_command("exec:sh")
+            connection.check_okay()
+        except Exception:
+            connection.close()
+            raise
+        self._connection = connection
+        self._buffer = b""
+
+    def close(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+        self._buffer = b""
+
+    def _marker(self, command_id: int) -> bytes:
+        return f"__shell_{self._token}_{command_id}__".encode()
+
+    def _script(self, command: str, command_id: int) -> bytes:
+        # Перевод строки перед "}" завершает команду, даже если она кончается комментарием или "&"
+        marker = self._marker(command_id).decode()
+        return f"{{ {command}\n}} </dev/null 2>&1; printf '\\n%s %d\\n' {marker} $?\n".encode()
+
+    def _read_result(self, command_id: int, deadline: float) -> ShellResponse:
+        marker = b"\n" + self._marker(command_id) + b" "
+        sock = self._connection.conn
+        while True:
+            index = self._buffer.find(marker)
+            if index >= 0:
+                end = self._buffer.find(b"\n", index + len(marker))
+                if end >= 0:
+                    output = self._buffer[:index].decode("utf-8", errors="replace")
+                    exit_code = int(self._buffer[index + len(marker):end] or -1)
+                    self._buffer = self._buffer[end + 1:]
+                    return ShellResponse(output, exit_code)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("нет маркера завершения команды")
+            sock.settimeout(remaining)
+            chunk = sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("сессия shell закрыта устройством")
+            self._buffer += chunk
+
+    def run_many(self, commands: Sequence[str], timeout: float = 60.0) -> List[ShellResponse]:
+        """Отправляет команды одной записью и читает их результаты по порядку.
+
+        Args:
+            commands: Shell-команды
+            timeout: Общее время ожидания всех результатов в секундах
+
+        Returns:
+            Вывод и код возврата каждой команды
+
+        Raises:
+            TimeoutError: Маркер завершения не пришёл вовремя (сессия закрывается)
+            OSError: Соединение оборвалось (сессия закрывается)
+        """
+        if self._connection is None:
+            self.connect()
+
+        ids = [next(self._ids) for _ in commands]
+        try:
+            self._connection.conn.sendall(b"".join(self._script(command, command_id) for command, command_id in zip(commands, ids)))
+            deadline = time.monotonic() + timeout
+            return [self._read_result(command_id, deadline) for command_id in ids]
+        except BaseException:
+            # Недочитанный вывод рассинхронизирует сессию - дальше только новая
+            self.close()
+            raise
+
+    def run(self, command: str, timeout: float = 60.0) -> ShellResponse:
+        return self.run_many([command], timeout=timeout)[0]
+
+
+class ShellPool:
+    """Пул постоянных shell-сессий одного устройства.
+
+    `device.shell` открывает новое соединение adb на каждую команду; пул
+    держит до `size` открытых сессий ShellSession и раздаёт их потокам парсера
+    (основной цикл, ThermalGovernor, поток снимков экрана), так что открытие
+    ссылки, запуск и остановка приложения и запросы dumpsys идут по уже
+    открытому соединению.
+
+    Оборванная сессия переоткрывается, и команда повторяется (RECONNECT_ATTEMPTS);
+    команда, не уложившаяся в timeout, не повторяется. Если постоянные сессии
+    недоступны (FakeDevice, ReplayDevice, устройство без `exec:`) или устройство
+    записывается RecordingDevice, пул вызывает методы устройства как раньше.
+
+    Длительность команд пишется в гистограмму adb_shell_seconds (mode=session или device).
+    """
+
+    def __init__(self, device: Device, size: int = 2) -> None:
+        """
+        Args:
+            device: Экземпляр устройства uiautomator2
+            size: Сколько сессий держать открытыми, 0 - всегда через device.shell
+        """
+        self.device = device
+        self.size = size
+
+        self._idle: "queue.LifoQueue[ShellSession]" = queue.LifoQueue()
+        self._available = threading.Semaphore(max(1, size))
+        # Запись сессии сохраняет вызовы device.shell, поэтому при записи пул не используется
+        self._enabled = size > 0 and getattr(device, "recorder", None) is None and self._has_adb()
+
+    def _has_adb(self) -> bool:
+        try:
+            return callable(getattr(self.device.adb_device, "open_transport", None))
+        except Exception:
+            return False
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def _acquire(self) -> ShellSession:
+        self._available.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return ShellSession(self.device)
+
+    def _release(self, session: ShellSession) -> None:
+        self._idle.put(session)
+        self._available.release()
+
+    def _disable(self, error: Exception) -> None:
+        self._enabled = False
+        logger.warning(f"[{self.device.serial}] Постоянные shell-сессии недоступны, используется device.shell: {error}")
+
+    def _observe(self, mode: str, started: float) -> None:
+        registry.observe("adb_shell_seconds", time.perf_counter() - started, serial=self.device.serial, mode=mode)
+
+    def run_many(self, commands: Sequence[str], timeout: float = 60.0) -> List[ShellResponse]:
+        """Выполняет команды по порядку в одной сессии, отправляя их одной записью.
+
+        Args:
+            commands: Shell-команды
+            timeout: Время ожидания всех результатов в секундах
+
+        Returns:
+            Вывод и код возврата каждой команды
+        """
+        started = time.perf_counter()
+        if self._enabled:
+            session = self._acquire()
+            try:
+                for attempt in range(RECONNECT_ATTEMPTS + 1):
+                    try:
+                        results = session.run_many(commands, timeout=timeout)
+                        self._observe("session", started)
+                        return results
+                    except (TimeoutError, socket.timeout):
+                        raise
+                    except Exception as e:
+                        if attempt < RECONNECT_ATTEMPTS:
+                            logger.debug(f"[{self.device.serial}] Shell-сессия оборвалась, переподключение: {e}")
+                            registry.inc("adb_shell_reconnects_total", serial=self.device.serial)
+                            continue
+                        self._disable(e)
+            finally:
+                self._release(session)
+
+        results = []
+        for command in commands:
+            response = self.device.shell(command, timeout=timeout)
+            results.append(response if hasattr(response, "output") else ShellResponse(response, 0))
+        self._observe("device", started)
+        return results
+
+    def run(self, command: str, timeout: float = 60.0) -> ShellResponse:
+        """Выполняет shell-команду.
+
+        Args:
+            command: Shell-команда
+            timeout: Время ожидания результата в секундах
+
+        Returns:
+            Вывод и код возврата
+        """
+        return self.run_many([command], timeout=timeout)[0]
+
+    def app_start(self, package_name: str) -> None:
+        """Запускает приложение так же, как device.app_start без activity (monkey с категорией LAUNCHER)."""
+        if not self._enabled:
+            self.device.app_start(package_name=package_name)
+            return
+        self.run(f"monkey -p {package_name} -c android.intent.category.LAUNCHER 1")
+
+    def app_stop(self, package_name: str) -> None:
+        """Останавливает приложение (`am force-stop`, как device.app_stop)."""
+        if not self._enabled:
+            self.device.app_stop(package_name=package_name)
+            return
+        self.run(f"am force-stop {package_name}")
+
+    def close(self) -> None:
+        """Закрывает простаивающие сессии."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
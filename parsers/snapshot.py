@@ -0,0 +1,115 @@
+import re
+import logging
+import xml.etree.ElementTree as ElementTree
+
+from uiautomator2 import Device
+from typing import Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+BOUNDS_PATTERN = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+# Соответствие параметров селектора uiautomator2 атрибутам узлов иерархии
+SELECTOR_ATTRIBUTES = {
+    "resourceId": "resource-id",
+    "description": "content-desc",
+    "className": "class",
+    "text": "text",
+    "packageName": "package",
+}
+
+# Атрибуты, по которым строятся индексы снимка
+INDEXED_ATTRIBUTES = ("resource-id", "content-desc", "class")
+
+
+def parse_bounds(value: str) -> Optional[Tuple[int, int, int, int]]:
+    """Разбирает атрибут bounds вида "[left,top][right,bottom]"."""
+    match = BOUNDS_PATTERN.match(value or "")
+    if match is None:
+        return None
+    return tuple(int(number) for number in match.groups())
+
+
+class HierarchySnapshot:
+    """Снимок иерархии UI, на котором селекторы проверяются локально.
+
+    Дамп разбирается один раз и индексируется по resource-id, content-desc и class,
+    поэтому любое количество запросов exists/bounds к снимку стоит одного
+    RPC dump_hierarchy вместо RPC на каждый селектор.
+    """
+
+    def __init__(self, xml: str) -> None:
+        """
+        Args:
+            xml: Результат device.dump_hierarchy()
+        """
+        self.xml = xml
+        self.nodes: List[Dict[str, str]] = []
+        self._index: Dict[str, Dict[str, List[int]]] = {attribute: {} for attribute in INDEXED_ATTRIBUTES}
+
+        try:
+            root = ElementTree.fromstring(xml)
+        except ElementTree.ParseError as e:
+            logger.warning(f"Не удалось разобрать иерархию UI: {e}")
+            return
+
+        for node in root.iter("node"):
+            position = len(self.nodes)
+            self.nodes.append(node.attrib)
+            for attribute in INDEXED_ATTRIBUTES:
+                value = node.get(attribute)
+                if value:
+                    self._index[attribute].setdefault(value, []).append(position)
+
+    @classmethod
+    def capture(cls, device: Device) -> "HierarchySnapshot":
+        """Снимает иерархию с устройства (один RPC) и разбирает её."""
+        return cls(device.dump_hierarchy())
+
+    def find(self, **selector) -> Optional[Dict[str, str]]:
+        """Возвращает атрибуты первого узла, совпадающего с селектором.
+
+        Args:
+            **selector: Параметры селектора uiautomator2 (resourceId, description, className, text, packageName)
+
+        Returns:
+            Атрибуты узла или None
+        """
+        criteria = [(SELECTOR_ATTRIBUTES.get(key, key), value) for key, value in selector.items()]
+
+        candidates = None
+        for attribute, value in criteria:
+            if attribute in self._index:
+                positions = self._index[attribute].get(value, [])
+                if candidates is None or len(positions) < len(candidates):
+                    candidates = positions
+        if candidates is None:
+            candidates = range(len(self.nodes))
+
+        for position in candidates:
+            node = self.nodes[position]
+            if all(node.get(attribute, "") == value for attribute, value in criteria):
+                return node
+        return None
+
+    def exists(self, **selector) -> bool:
+        """Проверяет, есть ли в снимке узел, совпадающий с селектором."""
+        return self.find(**selector) is not None
+
+    def bounds(self, **selector) -> Tuple[int, int, int, int]:
+        """Возвращает границы узла, совпадающего с селектором.
+
+        Raises:
+            LookupError: Узел не найден или у него нет границ
+        """
+        node = self.find(**selector)
+        bounds = parse_bounds(node.get("bounds", "")) if node is not None else None
+        if bounds is None:
+            raise LookupError(f"Элемент не найден в снимке иерархии: {selector}")
+        return bounds
+
+    def center(self, **selector) -> Tuple[int, int]:
+        """Возвращает центр узла (для клика по координатам без RPC селектора)."""
+        left, top, right, bottom = self.bounds(**selector)
+        return (left + right) // 2, (top + bottom) // 2
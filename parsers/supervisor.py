@@ -0,0 +1,252 @@
+import time
+import logging
+import threading
+
+from multiprocessing import Event, Process
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import adbutils
+
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceWatcher:
+    """Следит за списком устройств adb через `host:track-devices`.
+
+    Поток получает события подключения и отключения от adb-сервера; при обрыве
+    соединения (например, перезапуск adb-сервера) переподключается и заново
+    строит список устройств.
+    """
+
+    def __init__(self, reconnect_delay: float = 2.0) -> None:
+        """
+        Args:
+            reconnect_delay: Пауза перед переподключением к adb-серверу в секундах
+        """
+        self.reconnect_delay = reconnect_delay
+        # Взводится при каждом изменении списка устройств
+        self.changed = threading.Event()
+
+        self._lock = threading.Lock()
+        self._online: Set[str] = set()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def online(self) -> Set[str]:
+        """Серийные номера устройств в состоянии 'device'."""
+        with self._lock:
+            return set(self._online)
+
+    def start(self) -> "DeviceWatcher":
+        self._thread = threading.Thread(target=self._run, name="device-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        # Поток блокируется на чтении из adb и завершится вместе с процессом (daemon)
+        self._stopped.set()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                with self._lock:
+                    self._online.clear()
+                for event in adbutils.adb.track_devices():
+                    if self._stopped.is_set():
+                        return
+                    with self._lock:
+                        if event.present and event.status == "device":
+                            self._online.add(event.serial)
+                        else:
+                            self._online.discard(event.serial)
+                    logger.info(f"[{event.serial}] adb: {event.status}")
+                    self.changed.set()
+            except Exception as e:
+                logger.warning(f"Потеряно соединение с adb-сервером: {e}. Переподключение через {self.reconnect_delay} сек")
+
+            self.changed.set()
+            self._stopped.wait(self.reconnect_delay)
+
+
+class _Unit:
+    """Процесс, обслуживающий группу устройств, и его история перезапусков."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.serials: List[str] = []
+        self.running_serials: List[str] = []
+        self.process: Optional[Process] = None
+        self.stop_event = None
+        self.started_at: float = 0.0
+        self.failures: int = 0
+        self.next_start: float = 0.0
+
+
+class Supervisor:
+    """Держит процессы парсеров запущенными, пока устройства подключены.
+
+    - новые устройства из белого списка подключаются, как только adb видит их;
+    - процессы отключённых устройств останавливаются;
+    - упавший процесс перезапускается с экспоненциальной задержкой
+      (backoff, 2 * backoff, ... до max_backoff); после `stable_after` секунд
+      безотказной работы счётчик неудач сбрасывается.
+
+    С `loops` устройства распределяются по `loops` процессам (режим --engine async);
+    при изменении состава группы её процесс перезапускается с новым списком.
+    """
+
+    def __init__(
+        self,
+        allowlist: Iterable[str],
+        start_unit: Callable[[str, List[str], object], Process],
+        on_exit: Optional[Callable[[str, List[str]], None]] = None,
+        finished: Optional[Callable[[], bool]] = None,
+        loops: Optional[int] = None,
+        backoff: float = 5.0,
+        max_backoff: float = 300.0,
+        stable_after: float = 600.0,
+        stop_timeout: float = 10.0,
+        watcher: Optional[DeviceWatcher] = None,
+    ) -> None:
+        """
+        Args:
+            allowlist: Серийные номера устройств, которые разрешено подключать
+            start_unit: Функция (имя, серийные номера, событие остановки) -> запущенный Process
+            on_exit: Вызывается после завершения процесса с его серийными номерами
+                (например, чтобы вернуть в очередь взятые им ссылки)
+            finished: Возвращает True, когда работа закончена и перезапуски не нужны
+            loops: Количество процессов-групп, None - отдельный процесс на устройство
+            backoff: Начальная задержка перезапуска в секундах
+            max_backoff: Максимальная задержка перезапуска в секундах
+            stable_after: Через сколько секунд работы процесс считается стабильным
+            stop_timeout: Сколько ждать процесс после сигнала остановки перед terminate
+            watcher: Источник списка устройств, None - DeviceWatcher по track-devices
+        """
+        self.allowlist = list(dict.fromkeys(allowlist))
+        self.start_unit = start_unit
+        self.on_exit = on_exit
+        self.finished = finished
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.stop_timeout = stop_timeout
+        self.watcher = watcher or DeviceWatcher()
+
+        if loops is None:
+            self.units: Dict[str, _Unit] = {serial: _Unit(serial) for serial in self.allowlist}
+        else:
+            self.units = {f"loop-{index}": _Unit(f"loop-{index}") for index in range(max(1, loops))}
+        self._per_device = loops is None
+
+    def _assign(self, online: Set[str]) -> None:
+        """Приводит состав групп к списку подключённых устройств."""
+        for unit in self.units.values():
+            unit.serials = [serial for serial in unit.serials if serial in online]
+
+        assigned = {serial for unit in self.units.values() for serial in unit.serials}
+        for serial in self.allowlist:
+            if serial not in online or serial in assigned:
+                continue
+            if self._per_device:
+                unit = self.units[serial]
+            else:
+                unit = min(self.units.values(), key=lambda candidate: len(candidate.serials))
+            unit.serials.append(serial)
+            logger.info(f"[{serial}] Устройство подключено к {unit.name}")
+
+    def _stop(self, unit: _Unit) -> None:
+        unit.stop_event.set()
+        unit.process.join(timeout=self.stop_timeout)
+        if unit.process.is_alive():
+            logger.warning(f"{unit.name} не завершился вовремя. Принудительное завершение.")
+            unit.process.terminate()
+            unit.process.join()
+        self._exited(unit)
+
+    def _exited(self, unit: _Unit) -> None:
+        if self.on_exit is not None:
+            self.on_exit(unit.name, unit.running_serials)
+        unit.process = None
+        unit.running_serials = []
+
+    def _step(self) -> None:
+        now = time.monotonic()
+        self._assign(self.watcher.online())
+
+        for unit in self.units.values():
+            if unit.process is None:
+                continue
+
+            if not unit.process.is_alive():
+                exitcode = unit.process.exitcode
+                uptime = now - unit.started_at
+                if uptime >= self.stable_after:
+                    unit.failures = 0
+                unit.failures += 1
+                delay = min(self.max_backoff, self.backoff * 2 ** (unit.failures - 1))
+                unit.next_start = now + delay
+                self._exited(unit)
+                if not (self.finished is not None and self.finished()):
+                    logger.warning(
+                        f"{unit.name} завершился (код {exitcode}, "
+                        f"{uptime:.0f} сек работы), перезапуск через {delay:.1f} сек"
+                    )
+            elif unit.serials != unit.running_serials:
+                logger.info(f"{unit.name}: состав устройств изменился {unit.running_serials} -> {unit.serials}")
+                self._stop(unit)
+                unit.next_start = now
+
+        if self.finished is not None and self.finished():
+            return
+
+        for unit in self.units.values():
+            if unit.process is None and unit.serials and now >= unit.next_start:
+                unit.stop_event = Event()
+                unit.running_serials = list(unit.serials)
+                unit.process = self.start_unit(unit.name, unit.running_serials, unit.stop_event)
+                unit.started_at = now
+                logger.info(f"{unit.name} запущен для {unit.running_serials}")
+
+    def alive(self) -> List[str]:
+        """Имена работающих процессов."""
+        return [unit.name for unit in self.units.values() if unit.process is not None and unit.process.is_alive()]
+
+    def run(self, stop_event, poll_interval: float = 1.0, on_tick: Optional[Callable[[], None]] = None,
+            tick_interval: float = 60.0) -> None:
+        """Работает до события остановки или до завершения работы (`finished`).
+
+        Args:
+            stop_event: Общее событие остановки
+            poll_interval: Как часто проверять процессы, если список устройств не меняется
+            on_tick: Периодический вызов (например, вывод статистики)
+            tick_interval: Период вызова `on_tick` в секундах
+        """
+        self.watcher.start()
+        last_tick = time.monotonic()
+        try:
+            while not stop_event.is_set():
+                self.watcher.changed.clear()
+                self._step()
+
+                if self.finished is not None and self.finished() and not self.alive():
+                    logger.info("Работа завершена, перезапуски не требуются")
+                    break
+
+                if on_tick is not None and time.monotonic() - last_tick >= tick_interval:
+                    last_tick = time.monotonic()
+                    on_tick()
+
+                self.watcher.changed.wait(poll_interval)
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """Останавливает все процессы."""
+        self.watcher.stop()
+        for unit in self.units.values():
+            if unit.stop_event is not None:
+                unit.stop_event.set()
+        for unit in self.units.values():
+            if unit.process is not None:
+                self._stop(unit)
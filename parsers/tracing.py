@@ -0,0 +1,211 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+import functools
+import contextlib
+
+from typing import Dict, Iterator, List
+
+
+logger = logging.getLogger(__name__)
+
+# Методы парсеров, оборачиваемые в интервалы, и их категории
+PARSER_SPANS: Dict[str, str] = {
+    "swipe": "gesture",
+    "swipe_series": "gesture",
+    "refresh_content": "gesture",
+    "open_link": "parser",
+    "process_link": "parser",
+    "wait_load_video": "parser",
+    "classify_by_hierarchy": "parser",
+    "classify_by_ocr": "parser",
+    "classify_by_ocr_pipelined": "parser",
+    "take_screenshot": "capture",
+    "get_screen_data": "ocr",
+    "update_feed_bounds": "layout",
+    "update_bounds": "layout",
+}
+
+
+def trace_path(directory: str, serial: str) -> str:
+    """Путь к новому файлу трассировки устройства: <каталог>/<serial>-<дата-время>.trace.json."""
+    os.makedirs(directory, exist_ok=True)
+    name = re.sub(r"[^\w.-]", "_", serial)
+    return os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.trace.json")
+
+
+class Tracer:
+    """Трассировка одного устройства в формате Chrome trace event (chrome://tracing, Perfetto).
+
+    Каждый интервал - событие "X" с началом и длительностью в микросекундах;
+    вложенные интервалы (RPC внутри свайпа, OCR внутри wait_load_video) видны
+    в просмотрщике как стек. События дописываются в файл сразу (массив JSON,
+    который просмотрщики читают и без закрывающей скобки), поэтому память не
+    растёт с длительностью сессии.
+
+    Для каждой категории считается собственное время (без вложенных
+    интервалов): сводка пишется в журнал при закрытии.
+    """
+
+    def __init__(self, path: str, serial: str) -> None:
+        """
+        Args:
+            path: Путь к файлу трассировки (перезаписывается)
+            serial: Серийный номер устройства (имя процесса в просмотрщике)
+        """
+        self.path = path
+        self.serial = serial
+        self.self_seconds: Dict[str, float] = {}
+
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started = time.perf_counter()
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write("[\n")
+        self._write({"name": "process_name", "ph": "M", "pid": self._pid, "args": {"name": serial}}, first=True)
+
+    def _write(self, event: Dict, first: bool = False) -> None:
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line if first else f",\n{line}")
+
+    def _stack(self) -> List[List[float]]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+            self._write({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": threading.get_native_id(),
+                "args": {"name": threading.current_thread().name},
+            })
+        return stack
+
+    def _finish(self, name: str, category: str, started: float, seconds: float, children: float, args: Dict) -> None:
+        stack = self._stack()
+        if stack:
+            # Время этого интервала не входит в собственное время родителя
+            stack[-1][0] += seconds
+        with self._lock:
+            self.self_seconds[category] = self.self_seconds.get(category, 0.0) + max(0.0, seconds - children)
+
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((started - self._started) * 1e6, 1),
+            "dur": round(seconds * 1e6, 1),
+            "pid": self._pid,
+            "tid": threading.get_native_id(),
+        }
+        if args:
+            event["args"] = args
+        self._write(event)
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str, **args) -> Iterator[None]:
+        """Интервал вокруг блока кода.
+
+        Args:
+            name: Название интервала
+            category: Категория (rpc, gesture, ocr, wait, sleep, ...)
+            args: Дополнительные данные события
+        """
+        stack = self._stack()
+        frame = [0.0]
+        stack.append(frame)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            stack.pop()
+            self._finish(name, category, started, seconds, frame[0], args)
+
+    def observe_rpc(self, serial: str, method: str, seconds: float) -> None:
+        """Наблюдатель для InstrumentedDevice: RPC как интервал категории rpc."""
+        self._finish(method, "rpc", time.perf_counter() - seconds, seconds, 0.0, {})
+
+    def wrap(self, target, name: str, category: str, label=None) -> None:
+        """Заменяет метод объекта на версию в интервале.
+
+        Args:
+            target: Объект (парсер, Pacer, OcrPipeline ...)
+            name: Имя метода
+            category: Категория интервала
+            label: Функция (args, kwargs) -> название интервала, None - имя метода
+        """
+        method = getattr(target, name, None)
+        if method is None or not callable(method):
+            return
+
+        @functools.wraps(method)
+        def traced(*args, **kwargs):
+            with self.span(label(args, kwargs) if label else name, category):
+                return method(*args, **kwargs)
+
+        setattr(target, name, traced)
+
+    def summary(self) -> Dict[str, float]:
+        """Доля собственного времени по категориям."""
+        with self._lock:
+            total = sum(self.self_seconds.values())
+            return {
+                category: round(seconds / total, 3)
+                for category, seconds in sorted(self.self_seconds.items(), key=lambda item: -item[1])
+            } if total else {}
+
+    def close(self) -> None:
+        """Дописывает сводку и закрывает массив событий."""
+        summary = self.summary()
+        self._write({
+            "name": "self_seconds",
+            "ph": "M",
+            "pid": self._pid,
+            "args": {category: round(seconds, 3) for category, seconds in self.self_seconds.items()},
+        })
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write("\n]\n")
+            self._file.close()
+        logger.info(
+            f"[{self.serial}] Трассировка сохранена: {self.path}; доля времени: "
+            + ", ".join(f"{category} {share:.0%}" for category, share in summary.items())
+        )
+
+
+def trace_parser(parser, tracer: Tracer) -> None:
+    """Оборачивает в интервалы методы парсера и его помощников.
+
+    Методы из PARSER_SPANS, ожидания Pacer (категория wait, название - имя
+    ожидания), пауза ThermalGovernor (sleep), пакеты свайпов GestureBatcher
+    (gesture), распознавание OcrPipeline (ocr) и команды ShellPool (rpc).
+
+    Args:
+        parser: YoutubeParser или GoogleParser
+        tracer: Трассировка устройства
+    """
+    for name, category in PARSER_SPANS.items():
+        tracer.wrap(parser, name, category)
+
+    pacer = getattr(parser, "pacer", None)
+    if pacer is not None:
+        tracer.wrap(pacer, "wait_until", "wait", label=lambda args, kwargs: kwargs.get("name") or args[0])
+
+    for attribute, name, category in (
+        ("governor", "pace", "sleep"),
+        ("gestures", "swipe_batch", "gesture"),
+        ("ocr_pipeline", "recognize", "ocr"),
+        ("shell", "run_many", "rpc"),
+    ):
+        helper = getattr(parser, attribute, None)
+        if helper is not None and getattr(helper, "enabled", True):
+            tracer.wrap(helper, name, category)
@@ -1,8 +1,13 @@
 import uiautomator2
 
-from typing import List
+from typing import List, Optional, Union
 from uiautomator2 import Device
 
+from parsers.ocr import OcrCache, OcrPipeline
+from parsers.layout_cache import LayoutCache
+from parsers.google_parser import GoogleParser
+from parsers.youtube_parser import YoutubeParser
+
 
 def get_android_devices_list() -> List[Device]:
     """Возвращает список подключенных Android-устройств.
@@ -13,3 +18,72 @@ def get_android_devices_list() -> List[Device]:
 
     devices = uiautomator2.adbutils.adb.list()
     return [Device(serial=device_info.serial) for device_info in devices]
+
+
+def parser_package(parsing: str) -> str:
+    """Возвращает пакет приложения, с которым работает парсер выбранного режима."""
+    if parsing in ("links", "recommendations"):
+        return YoutubeParser.APP_NAME
+    return GoogleParser.PACKAGE_NAME
+
+
+def create_parser(
+    device: Device,
+    duration: float,
+    parsing: str,
+    stop_event=None,
+    ocr_client=None,
+    link_queue=None,
+    gesture_batch: int = 1,
+    capture: str = "png",
+    layout_cache: Optional[str] = None,
+    governor_interval: float = 0.0,
+    pipelined_ocr: bool = False,
+    shell_sessions: int = 2,
+) -> Union[YoutubeParser, GoogleParser]:
+    """Создаёт парсер для выбранного режима.
+
+    Args:
+        device: Экземпляр устройства uiautomator2
+        duration: Длительность свайпа в секундах
+        parsing: Тип парсинга: links, recommendations, google
+        stop_event: Событие остановки парсера
+        ocr_client: Клиент общего OCR-сервиса, None - OCR в текущем процессе
+        link_queue: Общая очередь ссылок (LinkQueue или её прокси), None - links.txt целиком
+        gesture_batch: Сколько свайпов отправлять одной shell-командой
+        capture: Способ снимка экрана для OCR в YoutubeParser: png или raw
+        layout_cache: Файл кеша границ опорных элементов, None - без кеша
+        governor_interval: Период замеров нагрева и заряда устройства в секундах, 0 - без регулятора темпа
+        pipelined_ocr: Снимать экран для OCR в отдельном потоке параллельно с распознаванием (YoutubeParser)
+        shell_sessions: Сколько постоянных shell-сессий adb держать на устройство, 0 - device.shell на каждую команду
+
+    Returns:
+        Экземпляр YoutubeParser или GoogleParser
+    """
+    cache = LayoutCache(layout_cache) if layout_cache else None
+
+    if parsing in ("links", "recommendations"):
+        return YoutubeParser(
+            device=device,
+            duration=duration,
+            parsing=parsing,
+            ocr_pipeline=OcrPipeline(engine=ocr_client, cache=OcrCache(), recorder=getattr(device, "recorder", None)),
+            stop_event=stop_event,
+            link_queue=link_queue,
+            gesture_batch=gesture_batch,
+            capture=capture,
+            layout_cache=cache,
+            governor_interval=governor_interval,
+            pipelined_ocr=pipelined_ocr,
+            shell_sessions=shell_sessions,
+        )
+
+    return GoogleParser(
+        device=device,
+        duration=duration,
+        stop_event=stop_event,
+        gesture_batch=gesture_batch,
+        layout_cache=cache,
+        governor_interval=governor_interval,
+        shell_sessions=shell_sessions,
+    )
@@ -0,0 +1,159 @@
+import time
+import logging
+
+from uiautomator2 import Device
+from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from parsers.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+LOCKED_PACKAGE_NAME = "com.android.systemui"
+
+UNLOCKED_MARKER = "__unlocked__"
+LOCKED_MARKER = "__locked__"
+UNKNOWN_MARKER = "__unknown__"
+
+# Вывод dumpsys содержит поля, по которым LOCKED_CHECK определяет состояние; иначе
+# (другая версия Android, урезанная прошивка) LOCKED_CHECK всегда считал бы экран выключенным
+STATE_KNOWN_CHECK = (
+    "{ dumpsys power | grep -qE 'mWakefulness=|Display Power: state=' && "
+    "dumpsys window | grep -qE 'mDreamingLockscreen=|mShowingLockscreen=|"
+    "isStatusBarKeyguard=|mKeyguardShowing='; }"
+)
+
+# Экран выключен или показан keyguard (названия полей отличаются между версиями Android)
+LOCKED_CHECK = (
+    "{ ! dumpsys power | grep -qE 'mWakefulness=Awake|Display Power: state=ON' || "
+    "dumpsys window | grep -qE 'mDreamingLockscreen=true|mShowingLockscreen=true|"
+    "isStatusBarKeyguard=true|mKeyguardShowing=true'; }"
+)
+
+
+def build_unlock_script(seconds: float, interval: float = 0.2) -> str:
+    """Shell-скрипт, который ждёт разблокировки на самом устройстве.
+
+    Состояние экрана и keyguard опрашивается на устройстве без RPC с хоста;
+    скрипт завершается сразу после разблокировки или через `seconds` секунд.
+    Если в выводе dumpsys нет известных полей состояния, скрипт сразу выводит
+    UNKNOWN_MARKER.
+
+    Args:
+        seconds: Максимальное время ожидания в секундах
+        interval: Период проверки на устройстве в секундах
+
+    Returns:
+        Команда для device.shell; выводит UNLOCKED_MARKER, LOCKED_MARKER или UNKNOWN_MARKER
+    """
+    steps = max(1, round(seconds / interval))
+    return (
+        f"if ! {STATE_KNOWN_CHECK}; then echo {UNKNOWN_MARKER}; else "
+        f"i=0; while [ $i -lt {steps} ] && {LOCKED_CHECK}; do sleep {interval}; i=$((i+1)); done; "
+        f"if {LOCKED_CHECK}; then echo {LOCKED_MARKER}; else echo {UNLOCKED_MARKER}; fi; fi"
+    )
+
+
+def wait_for_unlock(device: Device, stop_event=None, chunk: float = 10.0) -> bool:
+    """Ждёт, пока экран включится и keyguard будет снят.
+
+    Ожидание выполняется скриптом на устройстве отрезками по `chunk` секунд,
+    между отрезками проверяется событие остановки. Если состояние на устройстве
+    не определить (нет dumpsys или в его выводе нет известных полей, UNKNOWN_MARKER
+    либо нет ни одной метки), используется прежний опрос device.info.
+
+    Args:
+        device: Экземпляр устройства uiautomator2
+        stop_event: Событие остановки
+        chunk: Длина одного отрезка ожидания в секундах
+
+    Returns:
+        True, если устройство разблокировано; False - получен сигнал остановки
+    """
+    serial = device.serial
+    logged = False
+
+    while stop_event is None or not stop_event.is_set():
+        response = device.shell(build_unlock_script(chunk), timeout=chunk + 30)
+        output = getattr(response, "output", response) or ""
+
+        if UNLOCKED_MARKER in output:
+            return True
+        if UNKNOWN_MARKER in output or LOCKED_MARKER not in output:
+            logger.debug(f"[{serial}] Состояние keyguard недоступно, ожидание по device.info")
+            return _poll_unlock(device, stop_event)
+
+        if not logged:
+            logger.info(f"[{serial}] Устройство заблокировано. Ожидание разблокировки...")
+            logged = True
+
+    return False
+
+
+def _poll_unlock(device: Device, stop_event=None, interval: float = 0.5) -> bool:
+    while device.info.get("currentPackageName") == LOCKED_PACKAGE_NAME:
+        if stop_event is not None and stop_event.is_set():
+            return False
+        time.sleep(interval)
+    return True
+
+
+def warm_up(device: Device, package_name: str, stop_event=None, started: Optional[float] = None) -> Optional[Dict[str, float]]:
+    """Готовит устройство к парсингу.
+
+    Запуск агента uiautomator2 (первый RPC) выполняется параллельно с ожиданием
+    разблокировки и холодным стартом приложения через adb, поэтому время до
+    готовности - максимум этих этапов, а не их сумма.
+
+    Функция готовит одно устройство: её пул - один дополнительный поток для
+    агента. Разные устройства готовятся одновременно за счёт вызывающего кода:
+    в режиме `--engine process` у каждого устройства свой процесс, в режиме
+    `async` warm_up каждого устройства выполняется в своём потоке пула.
+
+    Args:
+        device: Экземпляр устройства uiautomator2
+        package_name: Приложение, которое запускается заранее
+        stop_event: Событие остановки
+        started: Момент начала подготовки (time.monotonic), None - вызов функции
+
+    Returns:
+        Длительность этапов в секундах и итоговое время до готовности (ready)
+        или None, если получен сигнал остановки до готовности
+    """
+    serial = device.serial
+    started = time.monotonic() if started is None else started
+    timings: Dict[str, float] = {}
+
+    def start_agent() -> None:
+        phase_started = time.monotonic()
+        device.info
+        timings["agent"] = time.monotonic() - phase_started
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"warmup-{serial}") as executor:
+        agent = executor.submit(start_agent)
+
+        phase_started = time.monotonic()
+        unlocked = wait_for_unlock(device, stop_event=stop_event)
+        timings["unlock"] = time.monotonic() - phase_started
+
+        if unlocked:
+            phase_started = time.monotonic()
+            device.app_start(package_name)
+            timings["app_start"] = time.monotonic() - phase_started
+
+        agent.result()
+
+    if not unlocked:
+        return None
+
+    timings["ready"] = time.monotonic() - started
+    for phase, seconds in timings.items():
+        registry.observe("warmup_seconds", seconds, serial=serial, phase=phase)
+    logger.info(
+        f"[{serial}] Готово к работе за {timings['ready']:.2f} сек ("
+        + ", ".join(f"{phase}={seconds:.2f}" for phase, seconds in timings.items() if phase != "ready")
+        + ")",
+        extra={"phase": "warmup", "durations": {phase: round(seconds, 3) for phase, seconds in timings.items()}},
+    )
+    return timings
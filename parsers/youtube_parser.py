@@ -1,9 +1,26 @@
 import time
-import pytesseract
+import logging
 
 from uiautomator2 import Device
-from PIL import ImageEnhance, Image
-from typing import Literal, Dict, Optional
+from PIL import Image
+from typing import Literal, Dict, Optional, Tuple
+
+from parsers.ocr import OcrCache, OcrPipeline
+from parsers.hierarchy import classify_hierarchy, hierarchy_signature
+from parsers.pacing import Pacer
+from parsers.governor import ThermalGovernor
+from parsers.frame_capture import FrameCapture
+from parsers.gestures import GestureBatcher
+from parsers.metrics import registry
+from parsers.link_queue import DONE_RESULTS, LinkQueue
+from parsers.device_state import DeviceState
+from parsers.screencap import RawScreenCapture
+from parsers.snapshot import HierarchySnapshot
+from parsers.layout_cache import LayoutCache
+from parsers.shell_pool import ShellPool
+
+
+logger = logging.getLogger(__name__)
 
 
 class YoutubeParser:
@@ -14,12 +31,29 @@ class YoutubeParser:
     LINK_TOP_OBJECT = "com.android.systemui:id/battery"
     LINK_BOTTOM_OBJECT = "com.google.android.youtube:id/action_bar_root"
     APP_NAME = "com.google.android.youtube"
+    HIERARCHY_TIMEOUT = 3.0
+    HIERARCHY_POLL_INTERVAL = 0.5
+    HIERARCHY_STABLE_COUNT = {"comments": 2, "concept": 2, "sponsored": 3}
+    # Метки на экране видео (в порядке проверки) и сколько кадров с меткой нужно для решения
+    OCR_LABELS = (("comments", "comments"), ("key concepts", "concept"), ("sponsored", "sponsored"))
+    OCR_VOTES = {"comments": 3, "concept": 3, "sponsored": 5}
+    OCR_FRAMES = 10
+    OCR_INTERVAL = 1.0
 
     def __init__(
         self,
         device: Device,
         parsing: Literal["links", "recommendations"],
         duration: float = 0.5,
+        ocr_pipeline: Optional[OcrPipeline] = None,
+        stop_event=None,
+        link_queue: Optional[LinkQueue] = None,
+        gesture_batch: int = 1,
+        capture: Literal["png", "raw"] = "png",
+        layout_cache: Optional[LayoutCache] = None,
+        governor_interval: float = 0.0,
+        pipelined_ocr: bool = False,
+        shell_sessions: int = 2,
     ) -> None:
         """Парсер YouTube для автоматизации взаимодействия с приложением через UI Automator.
 
@@ -27,40 +61,85 @@ class YoutubeParser:
             device: Экземпляр подключенного устройства
             parsing: Режим работы парсера ('links' или 'recommendations')
             duration: Длительность анимации свайпа (по умолчанию 0.5 сек)
+            ocr_pipeline: Конвейер предобработки скриншотов для OCR
+                (по умолчанию - обрезка до полосы с метками, оттенки серого и кеш по хешу кадра)
+            stop_event: Событие остановки (threading/multiprocessing Event), None - работать бесконечно
+            link_queue: Общая очередь ссылок для режима 'links', None - links.txt целиком
+            gesture_batch: Сколько свайпов серии отправлять одной shell-командой, 1 - по одному RPC
+            capture: Способ снимка экрана для OCR: 'png' - device.screenshot(),
+                'raw' - сырой кадр screencap через adb exec, обрезанный на устройстве до полосы OCR
+            layout_cache: Сохраняемый кеш границ опорных элементов, None - искать их в UI при каждом запуске
+            governor_interval: Период замеров нагрева и заряда для ThermalGovernor в секундах, 0 - без регулятора
+            pipelined_ocr: Снимать экран в отдельном потоке с постоянным периодом, пока OCR
+                распознаёт предыдущий кадр (устаревшие кадры пропускаются)
+            shell_sessions: Сколько постоянных shell-сессий держать для открытия ссылок, запуска
+                и остановки приложения и dumpsys, 0 - отдельное соединение adb на каждую команду
         """
         self.device = device
+        self.shell = ShellPool(device, size=shell_sessions)
+        self.state = DeviceState(device, layout_cache=layout_cache, shell=self.shell)
         self.parsing = parsing
         self.duration = duration
+        self.ocr_pipeline = ocr_pipeline or OcrPipeline(cache=OcrCache())
+        self.stop_event = stop_event
+        self.link_queue = link_queue
+        self.pacer = Pacer(device, stop_event=stop_event)
+        self.governor = ThermalGovernor(device, stop_event=stop_event, interval=governor_interval, shell=self.shell)
+        self.gesture_batch = max(1, gesture_batch)
+        self.gestures = GestureBatcher(device, shell=self.shell)
+        self.pipelined_ocr = pipelined_ocr
+        self.raw_capture: Optional[RawScreenCapture] = None
+        if capture == "raw":
+            if getattr(device, "recorder", None) is not None:
+                # RawScreenCapture читает кадры через adb мимо RecordingDevice: запись нельзя было бы воспроизвести
+                raise ValueError("Снимок экрана 'raw' несовместим с записью сессии")
+            region = self.ocr_pipeline.region
+            self.raw_capture = RawScreenCapture(device, rows=(region[1], region[3]) if region else None)
 
         self.top_y: int = None
         self.bottom_y: int = None
 
+    def stopped(self) -> bool:
+        """Проверяет, запрошена ли остановка парсера."""
+        return self.stop_event is not None and self.stop_event.is_set()
+
     @staticmethod
-    def get_screen_data(image: Image, lang: str, scale: bool = False) -> Dict:
+    def get_screen_data(
+        image: Image,
+        lang: str,
+        scale: bool = False,
+        pipeline: Optional[OcrPipeline] = None,
+        engine=None,
+    ) -> Dict:
         """Обрабатывает скриншот для извлечения текста через OCR.
 
         Args:
             image: Скриншот для обработки
             lang: Язык для распознавания (по умолчанию 'eng')
-            scale: Масштабировать ли изображение (улучшает точность для мелкого текста)
+            scale: Масштабировать ли изображение (улучшает точность для мелкого текста),
+                учитывается только без `pipeline`
+            pipeline: Конвейер предобработки; None - полный кадр, как раньше
+            engine: Движок OCR для конвейера по умолчанию (например, OcrClient)
 
         Returns:
             Словарь с распознанным текстом и метаданными в формате pytesseract
         """
-        if scale:
-            image = image.resize(size=(image.width * 4, image.height * 4))
+        if pipeline is None:
+            pipeline = OcrPipeline.legacy(scale=scale, engine=engine)
 
-        image = ImageEnhance.Contrast(image).enhance(1.5)
-        data: dict = pytesseract.image_to_data(
-            image=image,
-            lang=lang,
-            output_type=pytesseract.Output.DICT
-        )
-        return data
+        return pipeline.recognize(image=image, lang=lang)
 
-    def wait_load_video(self) -> Optional[Literal["comments", "concept", "sponsored"]]:
+    def wait_load_video(self, previous_signature: Optional[int] = None) -> Optional[Literal["comments", "concept", "sponsored"]]:
         """Ожидает загрузку видео и определяет его тип.
 
+        Сначала тип определяется по иерархии UI; OCR скриншотов используется
+        только если иерархия не дала устойчивого результата. Кеш OCR действует
+        в пределах одной ссылки: похожий кадр предыдущего видео не даёт его результат.
+
+        Args:
+            previous_signature: hierarchy_signature экрана до открытия ссылки;
+                пока экран не сменился, признаки прежнего видео не учитываются
+
         Returns:
             Тип контента:
             - 'comments' - обычное видео с комментариями
@@ -68,44 +147,167 @@ class YoutubeParser:
             - 'sponsored' - спонсорский контент
             None - если тип не определен
         """
-        time.sleep(3)
-
-        count: int = 0
-        comment_count: int = 0
-        concept_count: int = 0
-        sponsored_count: int = 0
-
-        while count < 10:
-            time.sleep(1)
-            screenshot = self.device.screenshot()
-            screenshot_data = self.get_screen_data(image=screenshot, lang="eng")
-            _union_text_for_check: str = " ".join(screenshot_data["text"])
-
-            if ("comments" in _union_text_for_check.lower()):
-                comment_count += 1
-            elif ("key concepts" in _union_text_for_check.lower()):
-                concept_count += 1
-            elif "sponsored" in _union_text_for_check.lower():
-                sponsored_count += 1
-
-            if comment_count >= 3:
-                return "comments"
-            elif concept_count >= 3:
-                return "concept"
-            elif sponsored_count >= 5:
-                return "sponsored"
+        if self.ocr_pipeline.cache is not None:
+            self.ocr_pipeline.cache.clear()
+
+        result = self.classify_by_hierarchy(previous_signature)
+        if result is not None:
+            return result
+
+        return self.classify_by_ocr()
+
+    def classify_by_hierarchy(self, previous_signature: Optional[int] = None) -> Optional[Literal["comments", "concept", "sponsored"]]:
+        """Определяет тип видео по дампу иерархии UI.
+
+        Результат возвращается, как только один и тот же тип найден
+        HIERARCHY_STABLE_COUNT раз подряд. Дампы учитываются только после того,
+        как структура экрана отличается от `previous_signature`: сразу после
+        `am start` на экране ещё может быть страница предыдущего видео.
+
+        Args:
+            previous_signature: hierarchy_signature экрана до открытия ссылки, None - не ждать смены экрана
+
+        Returns:
+            Тип контента или None, если за HIERARCHY_TIMEOUT сигнал не стабилизировался
+        """
+        state = {"result": None, "streak": 0, "changed": previous_signature is None}
+
+        def is_classified() -> bool:
+            xml = self.device.dump_hierarchy()
+            if not state["changed"]:
+                if hierarchy_signature(xml) == previous_signature:
+                    return False
+                state["changed"] = True
+
+            result = classify_hierarchy(xml)
+
+            if result is not None and result == state["result"]:
+                state["streak"] += 1
             else:
-                count += 1
+                state["streak"] = 1 if result is not None else 0
+            state["result"] = result
+
+            return result is not None and state["streak"] >= self.HIERARCHY_STABLE_COUNT[result]
+
+        if self.pacer.wait_until(
+            "video_classify",
+            is_classified,
+            timeout=self.HIERARCHY_TIMEOUT,
+            interval=self.HIERARCHY_POLL_INTERVAL,
+        ):
+            return state["result"]
+        return None
+
+    def classify_by_ocr(self) -> Optional[Literal["comments", "concept", "sponsored"]]:
+        """Определяет тип видео распознаванием текста на скриншотах.
+
+        До OCR_FRAMES снимков раз в OCR_INTERVAL секунд; тип возвращается, как
+        только набрано OCR_VOTES кадров с его меткой.
+
+        Returns:
+            Тип контента или None, если тип не определен
+        """
+        if self.pipelined_ocr:
+            return self.classify_by_ocr_pipelined()
+
+        votes = dict.fromkeys(self.OCR_VOTES, 0)
+        for _ in range(self.OCR_FRAMES):
+            time.sleep(self.OCR_INTERVAL)
+            screenshot, rows_cropped = self.capture_frame()
+            result = self.recognize_frame(screenshot, rows_cropped)
+            if result is not None:
+                votes[result] += 1
+                if votes[result] >= self.OCR_VOTES[result]:
+                    return result
+
+        return None
+
+    def classify_by_ocr_pipelined(self) -> Optional[Literal["comments", "concept", "sponsored"]]:
+        """classify_by_ocr с параллельным снимком экрана.
+
+        Поток FrameCapture снимает экран по тому же расписанию в кольцевой буфер,
+        OCR берёт самый новый кадр. Задержка решения - период снимков, а не
+        сумма паузы, снимка и OCR; при медленном OCR устаревшие кадры
+        пропускаются. Снимки прекращаются, как только решение принято.
+
+        Returns:
+            Тип контента или None, если тип не определен
+        """
+        serial = self.device.serial
+        votes = dict.fromkeys(self.OCR_VOTES, 0)
+        capture = FrameCapture(
+            self.capture_frame,
+            interval=self.OCR_INTERVAL,
+            max_frames=self.OCR_FRAMES,
+            stop_event=self.stop_event,
+            name=f"capture-{serial}",
+        )
+
+        try:
+            with capture:
+                for frame in capture.frames():
+                    result = self.recognize_frame(frame.image, frame.rows_cropped)
+                    if result is not None:
+                        votes[result] += 1
+                        if votes[result] >= self.OCR_VOTES[result]:
+                            return result
+            return None
+        finally:
+            if capture.ring.dropped:
+                registry.inc("ocr_frames_dropped_total", capture.ring.dropped, serial=serial)
+
+    def capture_frame(self) -> Tuple[Image.Image, bool]:
+        """Снимок экрана для OCR с замером screenshot_seconds."""
+        with registry.timer("screenshot_seconds", serial=self.device.serial):
+            return self.take_screenshot()
+
+    def recognize_frame(self, screenshot: Image.Image, rows_cropped: bool) -> Optional[Literal["comments", "concept", "sponsored"]]:
+        """Распознаёт кадр и возвращает тип видео по первой найденной метке OCR_LABELS.
 
+        Args:
+            screenshot: Снимок экрана
+            rows_cropped: Обрезан ли снимок по строкам области OCR
+
+        Returns:
+            Тип контента или None, если меток на кадре нет
+        """
+        screenshot_data = self.ocr_pipeline.recognize(image=screenshot, lang="eng", rows_cropped=rows_cropped)
+        if "ocr" in self.ocr_pipeline.timings:
+            registry.observe("ocr_seconds", self.ocr_pipeline.timings["ocr"], serial=self.device.serial)
+        else:
+            registry.inc("ocr_cache_hits_total", serial=self.device.serial)
+
+        text = " ".join(screenshot_data["text"]).lower()
+        for label, result in self.OCR_LABELS:
+            if label in text:
+                return result
         return None
 
+    def take_screenshot(self) -> Tuple[Image.Image, bool]:
+        """Снимает экран для OCR.
+
+        Сырой снимок (capture='raw') при ошибке adb отключается до конца работы
+        парсера, дальше используется device.screenshot().
+
+        Returns:
+            (скриншот, обрезан ли он уже по вертикали до области OCR)
+        """
+        if self.raw_capture is not None:
+            try:
+                return self.raw_capture.screenshot(), self.raw_capture.rows is not None
+            except Exception as e:
+                logger.warning(f"[{self.device.serial}] Сырой снимок экрана недоступен, используется PNG: {e}")
+                self.raw_capture = None
+
+        return self.device.screenshot(), False
+
     def open_link(self, link: str) -> None:
         """Открывает YouTube-ссылку на устройстве.
 
         Args:
             link: Полная URL-ссылка на видео
         """
-        self.device.shell(f"am start -a android.intent.action.VIEW -d \"{link}\" com.google.android.youtube")
+        self.shell.run(f"am start -a android.intent.action.VIEW -d \"{link}\" com.google.android.youtube")
 
     def swipe(self, duration: float, shift_top: int = 25, shift_bottom: int = 25) -> None:
         """Выполняет свайп по экрану между границами.
@@ -115,7 +317,7 @@ class YoutubeParser:
             shift_top: Отступ от верхней границы (в пикселях)
             shift_bottom: Отступ от нижней границы (в пикселях)
         """
-        center_x = round(self.device.info["displayWidth"] / 2)
+        center_x = round(self.state.display_width / 2)
 
         self.device.swipe_points(
             points=[
@@ -124,14 +326,41 @@ class YoutubeParser:
             ],
             duration=duration
         )
+        registry.inc("swipes_total", serial=self.device.serial)
+
+    def swipe_series(self, count: int, duration: float, shift_top: int = 25, shift_bottom: int = 25) -> None:
+        """Выполняет серию одинаковых свайпов.
+
+        При gesture_batch > 1 свайпы отправляются пакетами одной shell-командой.
+
+        Args:
+            count: Количество свайпов
+            duration: Длительность анимации (в секундах)
+            shift_top: Отступ от верхней границы (в пикселях)
+            shift_bottom: Отступ от нижней границы (в пикселях)
+        """
+        done = 0
+        while done < count and not self.stopped():
+            size = min(self.gesture_batch, count - done)
+
+            if size == 1:
+                self.swipe(duration=duration, shift_top=shift_top, shift_bottom=shift_bottom)
+            else:
+                center_x = round(self.state.display_width / 2)
+                start_point = (center_x, self.bottom_y - shift_bottom)
+                end_point = (center_x, self.top_y + shift_top)
+                self.gestures.swipe_batch([(start_point, end_point, duration)] * size)
+                registry.inc("swipes_total", size, serial=self.device.serial)
+
+            done += size
 
     def refresh_content(self) -> None:
         """Обновляет рекомендации
         """
-        center_x = round(self.device.info["displayWidth"] / 2)
+        center_x = round(self.state.display_width / 2)
         duration=0.2
         shift_bottom = 25
-        shift_top = self.device.info["displayHeight"] * 0.19
+        shift_top = self.state.display_height * 0.19
 
         self.device.swipe_points(
             points=[
@@ -140,6 +369,7 @@ class YoutubeParser:
             ],
             duration=duration
         )
+        registry.inc("refresh_cycles_total", serial=self.device.serial)
 
     def parse_recommendations(self) -> None:
         """Парсит рекомендации на главной странице YouTube.
@@ -152,65 +382,126 @@ class YoutubeParser:
         home_button = self.device(**self.HOME_BUTTON)
         home_button.click()
 
-        top_obj = self.device(resourceId=self.REC_TOP_OBJECT)
-        self.top_y = top_obj.bounds()[3]
-
-        bottom_obj = self.device(resourceId=self.REC_BOTTOM_OBJECT)
-        self.bottom_y = bottom_obj.bounds()[1]
+        self.update_feed_bounds()
 
         count = 0
-        while True:
-            self.swipe(duration=self.duration)
-            count += 1
+        while not self.stopped():
+            size = min(self.gesture_batch, 45 - count) if count < 45 else self.gesture_batch
+            self.governor.pace()
+            self.swipe_series(count=size, duration=self.governor.duration(self.duration))
+            count += size
 
             if count == 45:
-                time.sleep(3)
+                self.pacer.wait_for_stable_hierarchy("feed_settle", timeout=3)
 
                 home_button.click()
-                time.sleep(3)
+                self.pacer.wait_for_stable_hierarchy("home_open", timeout=3)
 
                 self.refresh_content()
-                time.sleep(5)
+                self.pacer.wait_for_refresh("feed_refresh", timeout=5)
+
+                changed = self.state.check()
+                if self.pacer.last_hierarchy is not None:
+                    changed = self.state.verify_anchors(HierarchySnapshot(self.pacer.last_hierarchy)) or changed
+                if changed:
+                    self.update_feed_bounds()
+
+    def update_feed_bounds(self) -> None:
+        """Обновляет границы области свайпа ленты рекомендаций.
+
+        Снимок иерархии снимается, только если сверенных границ нет в памяти;
+        границы из кеша раскладок сверяются с этим снимком до первого свайпа.
+        """
+        snapshot = None
+        if not (
+            self.state.has_anchor(resourceId=self.REC_TOP_OBJECT)
+            and self.state.has_anchor(resourceId=self.REC_BOTTOM_OBJECT)
+        ):
+            snapshot = HierarchySnapshot.capture(self.device)
+
+        self.top_y = self.state.anchor_bounds(snapshot, resourceId=self.REC_TOP_OBJECT)[3]
+        self.bottom_y = self.state.anchor_bounds(snapshot, resourceId=self.REC_BOTTOM_OBJECT)[1]
 
     def parse_links(self) -> None:
-        """Парсит видео из файла с ссылками.
+        """Парсит видео по ссылкам из очереди.
 
-        Для каждого видео:
+        Ссылки берутся из общей очереди `link_queue`, а без неё - из файла
+        links.txt. Для каждого видео:
         1. Открывает ссылку
         2. Определяет тип контента
         3. Выполняет взаимодействия в зависимости от типа
+        4. Сообщает результат очереди (она решает, нужен ли повтор)
         """
-        with open("links.txt") as file:
-            links = file.readlines()
-
-        for link in links:
-            self.open_link(link=link)
-
-            result = self.wait_load_video()
-
-            if result in ["comments", "concepts"]:
-                play_button = self.device(resourceId=self.PLAY_BUTTON)
-                play_button.click()
-                play_button.click()
-
-            elif result == "sponsored":
-                links.append(link)
+        link_queue = self.link_queue or LinkQueue.from_file("links.txt")
+        serial = self.device.serial
+
+        while not self.stopped():
+            self.governor.pace()
+            link, wait = link_queue.next(serial)
+            if link is None:
+                if wait <= 0:
+                    break
+                time.sleep(wait)
                 continue
 
-            else:
-                continue
-
-            top_obj = self.device(resourceId=self.LINK_TOP_OBJECT)
-            self.top_y = top_obj.bounds()[3]
-
-            bottom_obj = self.device(resourceId=self.LINK_BOTTOM_OBJECT)
-            self.bottom_y = bottom_obj.bounds()[3]
+            started = time.monotonic()
+            result = None
+            try:
+                result = self.process_link(link=link)
+            finally:
+                seconds = time.monotonic() - started
+                link_queue.report(serial, link, result, seconds)
+                registry.inc("links_classified_total", serial=serial, result=str(result))
+                registry.observe("link_seconds", seconds, serial=serial)
+                logger.info(
+                    f"[{serial}] Ссылка обработана за {seconds:.2f} сек: {result}",
+                    extra={"phase": "link", "link": link, "result": result, "seconds": round(seconds, 3)},
+                )
+
+    def process_link(self, link: str) -> Optional[Literal["comments", "concept", "sponsored"]]:
+        """Открывает одну ссылку, определяет тип видео и просматривает его.
+
+        Просматриваются видео с типом из DONE_RESULTS ('comments' и 'concept');
+        остальные результаты возвращаются без просмотра, и LinkQueue повторяет ссылку.
 
-            count = 0
-            while count < 16:
-                self.swipe(duration=self.duration, shift_bottom=100)
-                count += 1
+        Args:
+            link: Полная URL-ссылка на видео
 
+        Returns:
+            Тип контента из wait_load_video
+        """
+        # Отпечаток экрана до открытия: по нему видно, что страница предыдущего видео сменилась
+        previous_signature = hierarchy_signature(self.device.dump_hierarchy())
+        self.open_link(link=link)
+
+        result = self.wait_load_video(previous_signature)
+        if result not in DONE_RESULTS:
+            return result
+
+        # Кнопка и опорные элементы ищутся в одном снимке иерархии, клики - по координатам
+        snapshot = HierarchySnapshot.capture(self.device)
+        if snapshot.exists(resourceId=self.PLAY_BUTTON):
+            x, y = snapshot.center(resourceId=self.PLAY_BUTTON)
+            self.device.click(x, y)
+            self.device.click(x, y)
+        else:
+            play_button = self.device(resourceId=self.PLAY_BUTTON)
+            play_button.click()
+            play_button.click()
+
+        self.state.check()
+        # Клики меняют экран: опорные элементы ищутся в новом снимке, и только если их границы неизвестны
+        # или взяты из кеша раскладок и ещё не сверены
+        anchors = ({"resourceId": self.LINK_TOP_OBJECT}, {"resourceId": self.LINK_BOTTOM_OBJECT})
+        snapshot = None
+        if not all(self.state.has_anchor(**selector) for selector in anchors):
+            snapshot = HierarchySnapshot.capture(self.device)
+        self.top_y = self.state.anchor_bounds(snapshot, **anchors[0])[3]
+        self.bottom_y = self.state.anchor_bounds(snapshot, **anchors[1])[3]
+
+        self.swipe_series(count=16, duration=self.governor.duration(self.duration), shift_bottom=100)
+
+        return result
 
     def run(self) -> None:
         """Основной метод запуска парсера.
@@ -220,8 +511,8 @@ class YoutubeParser:
         - Обработку ошибок
         - Выбор режима работы
         """
-        self.device.app_start(package_name=self.APP_NAME)
-        self.device.orientation = "natural"
+        self.state.app_start(package_name=self.APP_NAME)
+        self.state.set_orientation("natural")
 
         try:
             if self.parsing == "recommendations":
@@ -233,4 +524,5 @@ class YoutubeParser:
             print(e)
 
         finally:
-            self.device.app_stop(package_name=self.APP_NAME)
+            self.shell.app_stop(self.APP_NAME)
+            self.shell.close()
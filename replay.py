@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import logging
+import argparse
+import tempfile
+
+from typing import Dict
+
+from parsers.metrics import registry
+from parsers.common import configure_logging
+from parsers.utils import create_parser
+from parsers.link_queue import LinkQueue
+from parsers.recording import SessionRecording
+from parsers.replay import RecordedOcr, ReplayDevice, fast_forward, recorded_links
+
+logger = logging.getLogger(__name__)
+configure_logging(level=logging.INFO)
+
+
+def replay(path: str, args) -> Dict:
+    """Прогоняет парсер по одной записи сессии и возвращает сводку.
+
+    Режим, длительность свайпа и параметры парсера берутся из заголовка записи
+    (параметры командной строки их заменяют): с другими параметрами парсер
+    делает другие вызовы устройства, и воспроизведение расходится с записью.
+    """
+    recording = SessionRecording(path)
+    header = recording.header()
+    device = ReplayDevice(recording)
+    ocr_engine = RecordedOcr(recording) if args.ocr == "recorded" else None
+
+    parsing = args.parsing or header.get("parsing", "links")
+    duration = args.duration if args.duration is not None else header.get("duration", 0.5)
+    parser_options = dict(header.get("parser_options", {}))
+    if args.gesture_batch is not None:
+        parser_options["gesture_batch"] = args.gesture_batch
+
+    link_queue = None
+    if parsing == "links":
+        link_queue = LinkQueue(recorded_links(recording), max_attempts=1)
+
+    with tempfile.TemporaryDirectory(prefix="replay-") as directory:
+        # Кеш раскладок включается, как при записи, но во временном файле: воспроизведение не меняет настоящий кеш
+        if parser_options.get("layout_cache"):
+            parser_options["layout_cache"] = os.path.join(directory, "layout_cache.json")
+
+        parser = create_parser(
+            device=device,
+            duration=duration,
+            parsing=parsing,
+            ocr_client=ocr_engine,
+            link_queue=link_queue,
+            **parser_options,
+        )
+
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        with fast_forward() as clock:
+            parser.run()
+        elapsed = time.perf_counter() - started
+
+    snapshot = registry.snapshot()
+    results: Dict[str, float] = {}
+    for (metric, labels), value in snapshot["counters"].items():
+        labels = dict(labels)
+        if metric == "links_classified_total" and labels.get("serial") == device.serial:
+            results[labels["result"]] = results.get(labels["result"], 0) + value
+
+    ocr_total, ocr_count = 0.0, 0
+    for (metric, labels), (_, total, count) in snapshot["histograms"].items():
+        if metric == "ocr_seconds" and dict(labels).get("serial") == device.serial:
+            ocr_total += total
+            ocr_count += count
+
+    recorded_seconds = recording.duration()
+    return {
+        "recording": path,
+        "parsing": parsing,
+        "parser_options": header.get("parser_options", {}),
+        "blocks": len(recording),
+        "recorded_seconds": round(recorded_seconds, 3),
+        "replay_seconds": round(elapsed, 3),
+        "cpu_seconds": round(time.process_time() - cpu_started, 3),
+        "skipped_wait_seconds": round(clock["skipped"], 3),
+        "speedup": round(recorded_seconds / elapsed, 1) if elapsed else 0.0,
+        "results": results,
+        "ocr_runs": ocr_count,
+        "ocr_seconds": round(ocr_total, 4),
+        "recorded_ocr_seconds": round(sum(ocr_engine.recorded_seconds), 4) if ocr_engine else None,
+        "calls": device.consumed,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Воспроизведение записанных сессий парсеров без устройств")
+
+    parser.add_argument(
+        "recordings",
+        nargs="+",
+        help="Файлы записей (.gasrec), созданные main.py --record"
+    )
+
+    parser.add_argument(
+        "-p", "--parsing",
+        type=str,
+        choices=["links", "recommendations", "google"],
+        default=None,
+        help="Тип парсинга, с которым была сделана запись (по умолчанию: из заголовка записи, для старых записей - links)"
+    )
+
+    parser.add_argument(
+        "--ocr",
+        type=str,
+        choices=["recorded", "live"],
+        default="recorded",
+        help="recorded - результаты OCR из записи (только логика решений), live - распознавать заново (по умолчанию: recorded)"
+    )
+
+    parser.add_argument(
+        "-d", "--duration",
+        type=float,
+        default=None,
+        help="Длительность свайпа (по умолчанию: из заголовка записи, для старых записей - 0.5)"
+    )
+
+    parser.add_argument(
+        "--gesture-batch",
+        type=int,
+        default=None,
+        help="Размер пакета свайпов (по умолчанию: из заголовка записи, для старых записей - 1)"
+    )
+
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        default=None,
+        help="Файл для сохранения результатов в JSON"
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    summaries = []
+    for path in args.recordings:
+        summary = replay(path, args)
+        summaries.append(summary)
+        logger.info(
+            f"{path}: {summary['recorded_seconds']} сек записи за {summary['replay_seconds']} сек "
+            f"(x{summary['speedup']}, CPU {summary['cpu_seconds']} сек), результаты {summary['results']}, "
+            f"OCR {summary['ocr_runs']} раз / {summary['ocr_seconds']} сек"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(summaries, file, ensure_ascii=False, indent=2)
+        logger.info(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
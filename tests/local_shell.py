@@ -0,0 +1,52 @@
+import socket
+import subprocess
+
+
+class LocalTransport:
+    """Соединение adb `exec:sh`, которое обслуживает локальный bash через socketpair."""
+
+    def __init__(self) -> None:
+        self.conn, remote = socket.socketpair()
+        self.process = subprocess.Popen(["bash"], stdin=remote, stdout=remote, stderr=remote)
+        remote.close()
+        self.commands = []
+
+    def send_command(self, command: str) -> None:
+        self.commands.append(command)
+
+    def check_okay(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.conn.close()
+        self.process.kill()
+        self.process.wait()
+
+
+class LocalAdbDevice:
+    """adb_device, каждое open_transport которого запускает новый bash."""
+
+    def __init__(self) -> None:
+        self.transports = []
+
+    def open_transport(self) -> LocalTransport:
+        transport = LocalTransport()
+        self.transports.append(transport)
+        return transport
+
+
+class LocalDevice:
+    """Минимальное устройство для ShellSession и ShellPool: shell-сессии - локальный bash.
+
+    device.shell выполняет команду отдельным процессом bash, как новое соединение adb.
+    """
+
+    def __init__(self, serial: str = "local-0") -> None:
+        self.serial = serial
+        self.adb_device = LocalAdbDevice()
+        self.shell_commands = []
+
+    def shell(self, command: str, timeout: float = 60.0) -> str:
+        self.shell_commands.append(command)
+        completed = subprocess.run(["bash", "-c", command], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=timeout)
+        return completed.stdout.decode()
@@ -0,0 +1,37 @@
+import asyncio
+import threading
+
+from parsers import async_engine
+from parsers.fake_device import FakeDevice
+
+
+def test_run_devices_runs_each_parser_in_its_own_thread(monkeypatch):
+    devices = {serial: FakeDevice(serial=serial, latency=0, jitter=0, load_time=0) for serial in ("fake-0", "fake-1")}
+    threads = {}
+    stop_event = threading.Event()
+
+    class Parser:
+        def __init__(self, device, stop_event, **kwargs):
+            self.device = device
+            self.stop_event = stop_event
+
+        def run(self):
+            threads[self.device.serial] = threading.current_thread().name
+            if len(threads) == len(devices):
+                self.stop_event.set()
+            # Цикл парсера держит поток до остановки: второй парсер должен получить свой поток
+            assert self.stop_event.wait(5)
+
+    monkeypatch.setattr(async_engine, "create_parser", Parser)
+
+    asyncio.run(async_engine.run_devices(
+        serials=list(devices),
+        duration=0.1,
+        parsing="links",
+        stop_event=stop_event,
+        device_factory=devices.__getitem__,
+    ))
+
+    assert set(threads) == set(devices)
+    assert len(set(threads.values())) == len(devices)
+    assert all(device.rpc_calls for device in devices.values())
@@ -0,0 +1,81 @@
+import pytest
+
+from parsers import coordinator as coordinator_module
+from parsers.coordinator import Coordinator, connect_coordinator, is_loopback, parse_address, serve_coordinator
+from parsers.link_queue import LinkQueue
+
+
+LINKS = ["https://www.youtube.com/watch?v=aaaaaaaaaaa", "https://www.youtube.com/watch?v=bbbbbbbbbbb"]
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_serial_is_served_by_one_agent():
+    coordinator = Coordinator(config={"parsing": "links"})
+
+    assert coordinator.register("host-a", ["s1", "s2"]) == {"config": {"parsing": "links"}, "serials": ["s1", "s2"]}
+    assert coordinator.register("host-b", ["s2", "s3"])["serials"] == ["s3"]
+    # Повторная регистрация того же агента сохраняет его устройства
+    assert coordinator.register("host-a", ["s1", "s2"])["serials"] == ["s1", "s2"]
+
+
+def test_heartbeat_statuses():
+    coordinator = Coordinator(config={})
+    coordinator.register("host-a", ["s1"])
+
+    assert coordinator.heartbeat("host-a", ["s1", "foreign"]) == "ok"
+    assert coordinator.agents()["host-a"]["online"] == ["s1"]
+    assert coordinator.heartbeat("host-b", []) == "unknown"
+    coordinator.stop()
+    assert coordinator.heartbeat("host-a", ["s1"]) == "stop"
+
+
+def test_lost_agent_links_return_to_queue(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(coordinator_module.time, "monotonic", clock)
+    queue = LinkQueue(LINKS, backoff=0.0)
+    coordinator = Coordinator(config={}, link_queue=queue, agent_timeout=30.0)
+    coordinator.register("host-a", ["s1"])
+    coordinator.register("host-b", ["s2"])
+
+    link, _ = queue.next("s1")
+    clock.now += 20
+    coordinator.heartbeat("host-b", ["s2"])
+    clock.now += 15
+
+    assert coordinator.expire() == ["host-a"]
+    assert list(coordinator.agents()) == ["host-b"]
+    assert queue.next("s2")[0] == link
+
+
+def test_addresses():
+    assert parse_address(":7700") == ("127.0.0.1", 7700)
+    assert parse_address("0.0.0.0:7700") == ("0.0.0.0", 7700)
+    assert is_loopback("127.0.0.1") and is_loopback("::1") and is_loopback("[::1]") and is_loopback("localhost")
+    assert not is_loopback("0.0.0.0")
+    assert not is_loopback("10.1.2.3")
+
+
+def test_network_address_needs_authkey():
+    with pytest.raises(ValueError):
+        serve_coordinator(Coordinator(config={}), ("0.0.0.0", 0))
+
+
+# serve_forever завершает поток сервера через sys.exit после stop_event
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_agent_registers_over_tcp():
+    coordinator = Coordinator(config={"parsing": "google", "duration": 0.5})
+    server = serve_coordinator(coordinator, ("127.0.0.1", 0), authkey=b"secret")
+    try:
+        manager = connect_coordinator(("127.0.0.1", server.address[1]), authkey=b"secret")
+        reply = manager.Coordinator().register("host-a", ["s1"])
+        assert reply == {"config": {"parsing": "google", "duration": 0.5}, "serials": ["s1"]}
+        assert list(coordinator.agents()) == ["host-a"]
+    finally:
+        server.stop_event.set()
@@ -0,0 +1,107 @@
+from parsers.device_state import DeviceState
+from parsers.fake_device import FakeDevice
+from parsers.layout_cache import LayoutCache
+from parsers.youtube_parser import YoutubeParser
+
+
+TOP = {"resourceId": YoutubeParser.REC_TOP_OBJECT}
+BOTTOM = {"resourceId": YoutubeParser.REC_BOTTOM_OBJECT}
+
+
+def make_parser(device: FakeDevice, cache: LayoutCache) -> YoutubeParser:
+    return YoutubeParser(device, parsing="recommendations", layout_cache=cache, shell_sessions=0)
+
+
+def live_bounds(device: FakeDevice, selector) -> tuple:
+    return tuple(device(**selector).bounds())
+
+
+def test_geometry_is_read_once():
+    device = FakeDevice(latency=0, jitter=0)
+    state = DeviceState(device)
+
+    assert (state.display_width, state.display_height) == (device.width, device.height)
+    calls = device.rpc_calls.get("info", 0)
+    state.display_width
+    state.rotation
+    assert device.rpc_calls.get("info", 0) == calls
+
+    state.invalidate()
+    state.package
+    assert device.rpc_calls.get("info", 0) == calls + 1
+
+
+def test_stale_layout_cache_is_verified_before_first_swipe(tmp_path):
+    device = FakeDevice(latency=0, jitter=0)
+    cache = LayoutCache(str(tmp_path / "layout.json"))
+    parser = make_parser(device, cache)
+    layout = parser.state.layout_key()
+    cache.put(layout, TOP, (0, 0, 10, 999))
+    cache.put(layout, BOTTOM, (0, 5, 10, 20))
+
+    # Границы с диска не сверены: для них нужен снимок
+    assert not parser.state.has_anchor(**TOP)
+
+    parser.update_feed_bounds()
+
+    assert parser.top_y == live_bounds(device, TOP)[3]
+    assert parser.bottom_y == live_bounds(device, BOTTOM)[1]
+    assert LayoutCache(cache.path).get(layout, TOP) == live_bounds(device, TOP)
+    assert parser.state.has_anchor(**TOP) and parser.state.has_anchor(**BOTTOM)
+
+
+def test_fresh_layout_cache_skips_selector_rpcs(tmp_path):
+    device = FakeDevice(latency=0, jitter=0)
+    cache = LayoutCache(str(tmp_path / "layout.json"))
+    make_parser(device, cache).update_feed_bounds()
+
+    device = FakeDevice(latency=0, jitter=0)
+    parser = make_parser(device, LayoutCache(cache.path))
+    parser.update_feed_bounds()
+
+    # Один дамп иерархии для сверки, без RPC селекторов
+    assert device.rpc_calls.get("dump_hierarchy") == 1
+    assert not any(method.startswith("selector.") for method in device.rpc_calls)
+    assert parser.top_y == live_bounds(device, TOP)[3]
+
+    # Сверенные границы повторно не сверяются
+    parser.update_feed_bounds()
+    assert device.rpc_calls.get("dump_hierarchy") == 1
+
+
+def test_anchor_bounds_are_queried_once():
+    device = FakeDevice(latency=0, jitter=0)
+    state = DeviceState(device)
+
+    bounds = state.anchor_bounds(**TOP)
+    assert state.anchor_bounds(**TOP) == bounds == live_bounds(device, TOP)
+    # live_bounds - ещё один RPC; кеш дал один
+    assert device.rpc_calls["selector.bounds"] == 2
+    assert state.has_anchor(**TOP)
+
+
+def test_check_resets_anchors_when_package_changes():
+    device = FakeDevice(latency=0, jitter=0)
+    state = DeviceState(device)
+    state.anchor_bounds(**TOP)
+
+    assert not state.check()
+    assert state.has_anchor(**TOP)
+
+    device.current_package = "com.google.android.youtube"
+    assert state.check()
+    assert not state.has_anchor(**TOP)
+
+
+def test_swipes_use_cached_geometry():
+    device = FakeDevice(latency=0, jitter=0)
+    parser = make_parser(device, cache=None)
+    parser.update_feed_bounds()
+    parser.swipe_series(count=1, duration=0.01)
+    calls = dict(device.rpc_calls)
+
+    parser.swipe_series(count=5, duration=0.01)
+
+    assert device.rpc_calls.get("info") == calls.get("info")
+    assert device.rpc_calls.get("dump_hierarchy") == calls.get("dump_hierarchy")
+    assert device.rpc_calls["swipe_points"] == calls["swipe_points"] + 5
@@ -0,0 +1,77 @@
+from PIL import Image
+
+from parsers.fake_device import FakeDevice
+from parsers.gestures import GestureBatcher
+from parsers.google_parser import GoogleParser
+from parsers.snapshot import HierarchySnapshot
+
+
+def test_feed_shows_more_stories_after_feed_length():
+    device = FakeDevice(latency=0, jitter=0, feed_length=3)
+    for _ in range(3):
+        device.swipe_points([(540, 2000), (540, 500)], duration=0)
+
+    assert HierarchySnapshot(device.dump_hierarchy()).exists(description="More stories")
+
+    # Свайп вниз - обновление ленты
+    device.swipe_points([(540, 500), (540, 2000)], duration=0)
+    assert device.position == 0
+    assert device.rpc_calls == {"swipe_points": 4, "dump_hierarchy": 1}
+
+
+def test_view_intent_opens_video_after_load_time():
+    device = FakeDevice(latency=0, jitter=0, video_label="Sponsored", load_time=60)
+    device.shell('am start -a android.intent.action.VIEW -d "https://youtu.be/aaaaaaaaaaa"')
+
+    snapshot = HierarchySnapshot(device.dump_hierarchy())
+    assert not snapshot.exists(description="Sponsored")
+    assert snapshot.exists(className="android.widget.ProgressBar")
+
+    device._loading_until = 0.0
+    assert HierarchySnapshot(device.dump_hierarchy()).exists(description="Sponsored")
+
+    device.app_stop_all()
+    assert not HierarchySnapshot(device.dump_hierarchy()).exists(description="Sponsored")
+
+
+def test_shell_swipe_batch_is_recorded_as_gestures():
+    device = FakeDevice(latency=0, jitter=0)
+    timings = GestureBatcher(device, gap=0).swipe_batch([((540, 2000), (540, 500), 0.01)] * 3)
+
+    assert len(timings) == 3
+    assert device.position == 3
+    assert [kind for _, kind, _ in device.gestures] == ["swipe"] * 3
+    assert device.rpc_calls == {"shell": 1}
+
+
+def test_dumpsys_reports_configured_state():
+    device = FakeDevice(latency=0, jitter=0)
+    device.battery_level, device.battery_temperature, device.thermal_status = 15, 41.5, 3
+
+    output = device.shell("dumpsys battery; dumpsys thermalservice")
+    assert "level: 15" in output
+    assert "temperature: 415" in output
+    assert "Thermal Status: 3" in output
+
+
+def test_recorded_frames_advance_with_swipes(tmp_path):
+    for index, color in enumerate([(255, 0, 0), (0, 0, 255)]):
+        Image.new("RGB", (10, 20), color).save(tmp_path / f"{index:02d}.png")
+        (tmp_path / f"{index:02d}.xml").write_text(f'<hierarchy><node content-desc="frame{index}" /></hierarchy>')
+
+    device = FakeDevice(recording=str(tmp_path), latency=0, jitter=0)
+    assert device.screenshot().getpixel((0, 0)) == (255, 0, 0)
+    device.swipe_points([(5, 15), (5, 5)], duration=0)
+    assert device.screenshot().getpixel((0, 0)) == (0, 0, 255)
+    assert "frame1" in device.dump_hierarchy()
+
+
+def test_google_parser_runs_on_fake_device():
+    device = FakeDevice(latency=0, jitter=0, feed_length=4)
+    parser = GoogleParser(device, duration=0.01, shell_sessions=0)
+    parser.update_bounds()
+    parser.swipe_series(count=4, duration=0.01)
+
+    assert device.position == 4
+    assert parser.top_y == 60
+    assert parser.bottom_y == device.height - 160
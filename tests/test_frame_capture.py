@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+from PIL import Image
+
+from parsers.frame_capture import Frame, FrameCapture, FrameRing
+
+
+def frame(index: int) -> Frame:
+    return Frame(index, float(index), Image.new("L", (4, 4)), False)
+
+
+def test_newest_drops_older_frames():
+    ring = FrameRing(capacity=3)
+    for index in range(3):
+        ring.put(frame(index))
+
+    assert ring.newest(timeout=0).index == 2
+    assert ring.dropped == 2
+    assert ring.newest(timeout=0) is None
+
+
+def test_full_ring_evicts_oldest():
+    ring = FrameRing(capacity=2)
+    for index in range(5):
+        ring.put(frame(index))
+
+    assert ring.dropped == 3
+    assert ring.newest(timeout=0).index == 4
+
+
+def test_close_wakes_waiting_consumer():
+    ring = FrameRing()
+    results = []
+    consumer = threading.Thread(target=lambda: results.append(ring.newest()))
+    consumer.start()
+
+    ring.close()
+    consumer.join(timeout=5)
+
+    assert not consumer.is_alive()
+    assert results == [None]
+
+
+def test_close_keeps_first_error():
+    ring = FrameRing()
+    ring.put(frame(0))
+    ring.close(error=RuntimeError("first"))
+    ring.close(error=RuntimeError("second"))
+    ring.close()
+
+    assert str(ring.error) == "first"
+    assert ring.newest().index == 0
+    assert ring.newest() is None
+
+
+def test_frames_until_max_frames():
+    images = iter(Image.new("L", (4, 4), color) for color in range(3))
+    with FrameCapture(lambda: (next(images), True), interval=0.01, max_frames=3, capacity=3) as capture:
+        frames = list(capture.frames())
+
+    assert capture.captured == 3
+    assert frames
+    assert frames[-1].index == 2
+    assert all(item.rows_cropped for item in frames)
+
+
+def test_frames_reraise_capture_error():
+    calls = []
+
+    def capture():
+        calls.append(1)
+        if len(calls) > 1:
+            raise OSError("screenshot failed")
+        return Image.new("L", (4, 4)), False
+
+    with FrameCapture(capture, interval=0.01, max_frames=5) as capture_thread:
+        frames = capture_thread.frames()
+        assert next(frames).index == 0
+        with pytest.raises(OSError, match="screenshot failed"):
+            next(frames)
+
+    assert capture_thread.captured == 1
+
+
+def test_stop_event_ends_frames():
+    stop_event = threading.Event()
+    stop_event.set()
+
+    with FrameCapture(lambda: (Image.new("L", (4, 4)), False), interval=0.01, max_frames=5, stop_event=stop_event) as capture:
+        assert list(capture.frames()) == []
+
+    assert capture.captured == 0
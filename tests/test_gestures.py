@@ -0,0 +1,52 @@
+from parsers.gestures import GestureBatcher, build_swipe_script, parse_swipe_timings
+from parsers.shell_pool import ShellPool
+from tests.local_shell import LocalDevice
+
+
+SWIPES = [((540, 1800), (540, 600), 0.2), ((540.4, 1800), (540, 600.6), 0.05)]
+
+
+def test_build_swipe_script():
+    assert build_swipe_script(SWIPES, gap=0.1) == "; ".join([
+        'echo "__gesture__ 0 $EPOCHREALTIME"',
+        "input swipe 540 1800 540 600 200",
+        "sleep 0.100",
+        'echo "__gesture__ 1 $EPOCHREALTIME"',
+        "input swipe 540 1800 540 601 50",
+        'echo "__gesture__ end $EPOCHREALTIME"',
+    ])
+
+
+def test_parse_swipe_timings():
+    output = "__gesture__ 0 100,0\nnoise\n__gesture__ 1 100.25\n__gesture__ end 100.5\n"
+    assert parse_swipe_timings(output, 2) == [0.25, 0.25]
+    # Без $EPOCHREALTIME метки пустые
+    assert parse_swipe_timings("__gesture__ 0\n__gesture__ end\n", 1) is None
+    assert parse_swipe_timings("__gesture__ 0 1.0\n", 1) is None
+
+
+def test_swipe_batch_runs_in_shell_session():
+    device = LocalDevice()
+    pool = ShellPool(device, size=1)
+    # `input` на локальной машине - функция сессии, которая спит длительность жеста
+    pool.run('input() { sleep "$(printf "0.%03d" "$6")"; }')
+
+    batcher = GestureBatcher(device, gap=0.01, shell=pool)
+    timings = batcher.swipe_batch(SWIPES)
+    pool.close()
+
+    assert device.shell_commands == []
+    assert len(device.adb_device.transports) == 1
+    assert len(timings) == 2
+    assert timings[0] >= 0.2
+    assert 0.05 <= timings[1] < 0.2
+
+
+def test_swipe_batch_without_pool_uses_device_shell():
+    device = LocalDevice()
+    batcher = GestureBatcher(device, gap=0)
+    timings = batcher.swipe_batch(SWIPES)
+
+    assert len(device.shell_commands) == 1
+    assert len(timings) == 2
+    assert batcher.swipe_batch([]) == []
@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+from parsers.fake_device import FakeDevice
+from parsers.governor import ThermalGovernor, ThermalSample, parse_sample, target_level
+
+
+BATTERY = """Current Battery Service state:
+  AC powered: false
+  USB powered: true
+  Wireless powered: false
+  status: 2
+  level: 40
+  scale: 50
+  temperature: 412
+"""
+
+THERMAL = """IsStatusOverride: false
+Thermal Status: 2
+Current temperatures from HAL:
+	Temperature{mValue=48.5, mType=0, mName=cpu0, mStatus=0}
+	Temperature{mValue=51.0, mType=0, mName=cpu1, mStatus=0}
+	Temperature{mValue=36.0, mType=3, mName=skin, mStatus=0}
+"""
+
+
+def sample(temperature=None, status=None, level=80, charging=False) -> ThermalSample:
+    return ThermalSample(level, temperature, charging, status, {})
+
+
+def test_parse_sample():
+    result = parse_sample(BATTERY + "__thermal__\n" + THERMAL)
+
+    assert result.battery_level == 80
+    assert result.battery_temperature == 41.2
+    assert result.charging
+    assert result.thermal_status == 2
+    assert result.temperatures == {"cpu": 51.0, "skin": 36.0}
+
+
+def test_parse_sample_without_thermal_service():
+    result = parse_sample("level: 50\n__thermal__\n")
+    assert result == ThermalSample(50, None, False, None, {})
+
+
+@pytest.mark.parametrize("temperature, current, expected", [
+    (30.0, 0, 0),
+    (40.0, 0, 1),
+    (46.5, 0, 3),
+    # Понижение - только после остывания на HYSTERESIS ниже порога
+    (39.0, 1, 1),
+    (38.4, 1, 0),
+    # и не больше чем на уровень за замер
+    (30.0, 3, 2),
+])
+def test_target_level_hysteresis(temperature, current, expected):
+    assert target_level(sample(temperature), current) == expected
+
+
+def test_thermal_status_and_low_battery():
+    assert target_level(sample(status=3), 0) == 3
+    assert target_level(sample(temperature=30.0, level=10), 0) == 1
+    assert target_level(sample(temperature=30.0, level=10, charging=True), 0) == 0
+
+
+def test_governor_slows_hot_device_and_samples_once_per_interval():
+    device = FakeDevice(latency=0, jitter=0)
+    device.battery_temperature = 43.5
+    stop_event = threading.Event()
+    stop_event.set()
+    governor = ThermalGovernor(device, stop_event=stop_event, interval=60)
+
+    governor.pace()
+    governor.pace()
+
+    assert governor.level_name == "hot"
+    assert governor.duration(0.5) == pytest.approx(0.8)
+    assert device.rpc_calls["shell"] == 1
+    assert governor.decisions[-1][1] == "hot"
+
+
+def test_disabled_governor_makes_no_calls():
+    device = FakeDevice(latency=0, jitter=0)
+    governor = ThermalGovernor(device, interval=0)
+    governor.pace()
+
+    assert device.rpc_calls == {}
+    assert governor.duration(0.5) == 0.5
@@ -0,0 +1,95 @@
+import threading
+
+from pathlib import Path
+
+import pytest
+
+from parsers.fake_device import FakeDevice
+from parsers.hierarchy import classify_hierarchy, find_video_type_signals, hierarchy_signature
+from parsers.youtube_parser import YoutubeParser
+
+
+FIXTURES = Path(__file__).parent / "fixtures" / "hierarchy"
+
+
+def fixture(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("watch_comments.xml", "comments"),
+    ("watch_concept.xml", "concept"),
+    ("watch_sponsored.xml", "sponsored"),
+    ("watch_loading.xml", None),
+])
+def test_classify_watch_page(name, expected):
+    assert classify_hierarchy(fixture(name)) == expected
+
+
+def test_title_and_description_words_are_not_signals():
+    # Название и описание со словами "comments"/"sponsored" и resource-id, лишь содержащий ad_badge
+    assert find_video_type_signals(fixture("watch_loading.xml")) == {
+        "comments": False, "concept": False, "sponsored": False,
+    }
+
+
+def test_broken_xml_has_no_signals():
+    assert classify_hierarchy("<hierarchy><node") is None
+
+
+def test_signature_ignores_text():
+    xml = fixture("watch_comments.xml")
+    assert hierarchy_signature(xml) == hierarchy_signature(xml.replace("1.2K", "1.3K"))
+    assert hierarchy_signature(xml) != hierarchy_signature(fixture("watch_concept.xml"))
+
+
+def make_parser(device: FakeDevice) -> YoutubeParser:
+    parser = YoutubeParser(device, parsing="links", shell_sessions=0)
+    parser.HIERARCHY_POLL_INTERVAL = 0.05
+    return parser
+
+
+def test_unchanged_screen_gives_no_hierarchy_result():
+    device = FakeDevice(latency=0, jitter=0, video_label="Comments", load_time=0)
+    parser = make_parser(device)
+    parser.HIERARCHY_TIMEOUT = 0.3
+    parser.open_link("https://www.youtube.com/watch?v=aaaaaaaaaaa")
+
+    previous = hierarchy_signature(device.dump_hierarchy())
+    assert parser.classify_by_hierarchy(previous) is None
+    assert parser.classify_by_hierarchy() == "comments"
+
+
+def test_process_link_ignores_previous_video_page():
+    device = FakeDevice(latency=0, jitter=0, video_label="Comments", load_time=0.1)
+    parser = make_parser(device)
+    parser.open_link("https://www.youtube.com/watch?v=aaaaaaaaaaa")
+    device._loading_until = 0.0
+
+    # Интент применяется с задержкой: первые дампы после am start - страница предыдущего видео
+    shell = device.shell
+
+    def delayed_shell(command, *args, **kwargs):
+        def apply() -> None:
+            device.video_label = "Sponsored"
+            shell(command, *args, **kwargs)
+
+        threading.Timer(0.3, apply).start()
+        return ""
+
+    device.shell = delayed_shell
+    assert parser.process_link("https://www.youtube.com/watch?v=bbbbbbbbbbb") == "sponsored"
+
+
+@pytest.mark.parametrize("label, result, watched", [
+    ("Comments", "comments", True),
+    ("Key concepts", "concept", True),
+    ("Sponsored", "sponsored", False),
+])
+def test_process_link_watches_comments_and_concept_videos(label, result, watched):
+    device = FakeDevice(latency=0, jitter=0, video_label=label, load_time=0.1)
+    parser = make_parser(device)
+    parser.duration = 0.01
+
+    assert parser.process_link("https://www.youtube.com/watch?v=aaaaaaaaaaa") == result
+    assert any(kind == "swipe" for _, kind, _ in device.gestures) == watched
@@ -0,0 +1,27 @@
+from parsers.journal import LinkJournal
+
+
+def test_batch_commit_is_durable(tmp_path):
+    journal = LinkJournal(str(tmp_path / "journal.db"), batch_size=2, flush_interval=60.0)
+
+    # FULL: фиксация пачки синхронизирует WAL на диск
+    assert journal._connection.execute("PRAGMA synchronous").fetchone()[0] == 2
+
+    journal.record("a", "done", result="comments")
+    journal.record("b", "retry", result="sponsored", attempts=1)
+
+    # Пачка зафиксирована без close(): второе соединение видит обе записи
+    reader = LinkJournal(str(tmp_path / "journal.db"))
+    assert reader.finished_links() == {"a"}
+    assert reader.retry_attempts() == {"b": 1}
+    reader.close()
+    journal.close()
+
+
+def test_partial_batch_is_committed_on_close(tmp_path):
+    path = str(tmp_path / "journal.db")
+    journal = LinkJournal(path, batch_size=100, flush_interval=60.0)
+    journal.record("a", "failed", attempts=3)
+    journal.close()
+
+    assert LinkJournal(path).finished_links() == {"a"}
@@ -0,0 +1,46 @@
+import json
+
+from parsers.device_state import DeviceState
+from parsers.fake_device import FakeDevice
+from parsers.layout_cache import LayoutCache, selector_key
+
+
+def test_writers_merge_with_file_contents(tmp_path):
+    path = str(tmp_path / "layout.json")
+    first, second = LayoutCache(path), LayoutCache(path)
+
+    first.put("phone-a", {"resourceId": "battery"}, (0, 0, 10, 60))
+    second.put("phone-b", {"resourceId": "battery"}, (0, 0, 20, 80))
+    first.put("phone-a", {"description": "Home"}, (0, 1900, 200, 2000))
+
+    cache = LayoutCache(path)
+    assert cache.get("phone-a", {"resourceId": "battery"}) == (0, 0, 10, 60)
+    assert cache.get("phone-a", {"description": "Home"}) == (0, 1900, 200, 2000)
+    assert cache.get("phone-b", {"resourceId": "battery"}) == (0, 0, 20, 80)
+    assert list(tmp_path.iterdir()) == [tmp_path / "layout.json"]
+
+
+def test_unreadable_file_is_an_empty_cache(tmp_path):
+    path = tmp_path / "layout.json"
+    path.write_text("{broken")
+
+    cache = LayoutCache(str(path))
+    assert cache.get("phone", {"resourceId": "battery"}) is None
+
+    cache.put("phone", {"resourceId": "battery"}, (1, 2, 3, 4))
+    assert json.loads(path.read_text()) == {"phone": {"resourceId=battery": [1, 2, 3, 4]}}
+
+
+def test_selector_key_ignores_argument_order():
+    assert selector_key({"resourceId": "a", "description": "b"}) == selector_key({"description": "b", "resourceId": "a"})
+
+
+def test_layout_key_includes_device_and_foreground_app():
+    device = FakeDevice(latency=0, jitter=0)
+    state = DeviceState(device)
+    key = state.layout_key()
+
+    assert key == f"fake|{device.width}x{device.height}|420dpi|rotation0|com.android.launcher@1.0"
+    device.current_package = "com.google.android.youtube"
+    state.invalidate()
+    assert state.layout_key() != key
@@ -0,0 +1,62 @@
+from parsers.link_queue import LinkQueue
+
+
+LINKS = [
+    "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+    "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+]
+
+
+def drain(queue: LinkQueue, results: dict) -> None:
+    """Обрабатывает ссылки очереди, пока она не опустеет; результат ссылки - из `results`."""
+    while True:
+        link, _ = queue.next("device")
+        if link is None:
+            return
+        queue.report("device", link, results.get(link), 1.0)
+
+
+def make_queue(journal_path) -> LinkQueue:
+    return LinkQueue(LINKS, max_attempts=3, backoff=0.0, journal_path=str(journal_path))
+
+
+def test_restart_continues_attempt_count(tmp_path):
+    journal_path = tmp_path / "journal.db"
+
+    queue = make_queue(journal_path)
+    link, _ = queue.next("device")
+    assert link == LINKS[0]
+    queue.report("device", link, "sponsored", 1.0)
+    queue.close()
+
+    # После перезапуска у первой ссылки осталось две попытки из трёх
+    queue = make_queue(journal_path)
+    drain(queue, {LINKS[0]: "sponsored", LINKS[1]: "comments"})
+    stats = queue.stats()
+    queue.close()
+
+    assert stats["failed"] == 1
+    assert stats["retried"] == 1
+    assert stats["done"] == 1
+
+
+def test_restart_skips_links_failed_before(tmp_path):
+    journal_path = tmp_path / "journal.db"
+
+    queue = make_queue(journal_path)
+    drain(queue, {LINKS[0]: "sponsored", LINKS[1]: "comments"})
+    queue.close()
+
+    queue = make_queue(journal_path)
+    assert queue.next("device") == (None, 0.0)
+    queue.close()
+
+
+def test_concept_result_is_done(tmp_path):
+    queue = make_queue(tmp_path / "journal.db")
+    drain(queue, {LINKS[0]: "concept", LINKS[1]: "sponsored"})
+
+    stats = queue.stats()
+    queue.close()
+    assert stats["devices"]["device"]["done"] == 1
+    assert stats["devices"]["device"]["not_done"] == 3
@@ -0,0 +1,61 @@
+import pytest
+
+from parsers import link_source
+from parsers.link_queue import LinkQueue
+from parsers.link_source import KeySet, LinkSource
+
+
+LINKS = [
+    "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+    "https://youtu.be/aaaaaaaaaaa",
+    "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+    "https://www.youtube.com/shorts/ccccccccccc",
+    "https://example.com/page/",
+    "https://example.com/page",
+]
+UNIQUE = [LINKS[0], LINKS[2], LINKS[3], LINKS[4]]
+
+
+@pytest.fixture
+def colliding_hash(monkeypatch):
+    """Все ключи получают один из двух хешей: каждое добавление упирается в совпадение хешей."""
+    monkeypatch.setattr(link_source, "_hash64", lambda key: 1 + len(key) % 2)
+
+
+def write_links(tmp_path, links):
+    path = tmp_path / "links.txt"
+    path.write_text("\n".join(links) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_link_source_keeps_links_with_colliding_hashes(tmp_path, colliding_hash):
+    source = LinkSource(write_links(tmp_path, LINKS))
+    assert list(source) == UNIQUE
+    assert source.duplicates == 2
+
+
+def test_link_source_excludes_finished_with_colliding_hashes(tmp_path, colliding_hash):
+    source = LinkSource(write_links(tmp_path, LINKS))
+    source.build(exclude=["https://youtu.be/bbbbbbbbbbb"])
+    assert list(source) == [LINKS[0], LINKS[3], LINKS[4]]
+    assert source.excluded == 1
+
+
+def test_key_set_with_colliding_hashes(colliding_hash):
+    keys = KeySet(["a", "b", "c", "d"])
+    assert len(keys) == 4
+    assert "c" in keys
+    assert "e" not in keys
+    assert not keys.add("a")
+
+
+def test_link_queue_in_memory_dedup(colliding_hash):
+    queue = LinkQueue(LINKS)
+    taken = []
+    while True:
+        link, _ = queue.next("device")
+        if link is None:
+            break
+        taken.append(link)
+        queue.report("device", link, "comments", 0.0)
+    assert taken == UNIQUE
@@ -0,0 +1,72 @@
+import json
+import logging
+import multiprocessing
+
+from parsers.common import ContextFilter, JsonFormatter, LogPipeline, RateLimitFilter, log_context
+
+
+def make_record(message: str, level: int = logging.INFO, lineno: int = 10, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("parsers.test", level, "test.py", lineno, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_rate_limit_drops_repeats_and_reports_count(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("parsers.common.time.monotonic", lambda: now[0])
+    limit = RateLimitFilter(rate=1.0, burst=2)
+
+    passed = [limit.filter(make_record("swipe")) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    # Другое место в коде и ошибки не ограничиваются
+    assert limit.filter(make_record("other", lineno=11))
+    assert limit.filter(make_record("error", level=logging.ERROR))
+
+    now[0] = 1.0
+    record = make_record("swipe")
+    assert limit.filter(record)
+    assert record.getMessage() == "swipe (пропущено похожих: 3)"
+    assert record.suppressed == 3
+
+
+def test_context_filter_adds_serial_and_phase():
+    record = make_record("[emulator-5554] Старт парсинга")
+    with log_context(phase="warmup"):
+        ContextFilter().filter(record)
+
+    assert record.serial == "emulator-5554"
+    assert record.phase == "warmup"
+
+
+def test_json_formatter_includes_extra_fields():
+    record = make_record("Ожидание", serial="s1", phase="feed_refresh", seconds=0.25)
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "Ожидание"
+    assert (entry["serial"], entry["phase"], entry["seconds"]) == ("s1", "feed_refresh", 0.25)
+    assert entry["line"] == "test:10"
+
+
+def _worker(log_queue) -> None:
+    from parsers.common import configure_worker_logging
+
+    configure_worker_logging(log_queue)
+    logging.getLogger("parsers.worker").info("[w1] из процесса устройства", extra={"phase": "links"})
+
+
+def test_worker_records_reach_the_json_file(tmp_path):
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    path = tmp_path / "log.jsonl"
+    pipeline = LogPipeline(log_file=str(path)).start()
+    try:
+        process = multiprocessing.Process(target=_worker, args=(pipeline.queue,))
+        process.start()
+        process.join(30)
+    finally:
+        pipeline.stop()
+        root.handlers[:] = handlers
+        root.setLevel(level)
+
+    entries = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert any(entry["serial"] == "w1" and entry["phase"] == "links" for entry in entries)
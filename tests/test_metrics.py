@@ -0,0 +1,38 @@
+from parsers.metrics import MetricsRegistry, merge_snapshots, render_prometheus
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.inc("errors_total", serial='emulator\\5554 "a"\nb')
+
+    assert render_prometheus(registry.snapshot()) == (
+        "# TYPE errors_total counter\n"
+        'errors_total{serial="emulator\\\\5554 \\"a\\"\\nb"} 1\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.observe("rpc_seconds", 0.05, method="click")
+    registry.observe("rpc_seconds", 0.5, method="click")
+    registry.observe("rpc_seconds", 5.0, method="click")
+
+    lines = render_prometheus(registry.snapshot()).splitlines()
+    assert 'rpc_seconds_bucket{method="click",le="0.1"} 1' in lines
+    assert 'rpc_seconds_bucket{method="click",le="1.0"} 2' in lines
+    assert 'rpc_seconds_bucket{method="click",le="+Inf"} 3' in lines
+    assert 'rpc_seconds_count{method="click"} 3' in lines
+
+
+def test_merge_snapshots_sums_counters_and_histograms():
+    left, right = MetricsRegistry(buckets=(1.0,)), MetricsRegistry(buckets=(1.0,))
+    for registry in (left, right):
+        registry.inc("swipes_total", 2, serial="a")
+        registry.observe("ocr_seconds", 0.5, serial="a")
+    right.inc("swipes_total", serial="b")
+
+    merged = merge_snapshots([left.snapshot(), right.snapshot()])
+
+    assert merged["counters"][("swipes_total", (("serial", "a"),))] == 4
+    assert merged["counters"][("swipes_total", (("serial", "b"),))] == 1
+    assert merged["histograms"][("ocr_seconds", (("serial", "a"),))] == ([2, 0], 1.0, 2)
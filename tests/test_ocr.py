@@ -0,0 +1,153 @@
+import pytest
+from PIL import Image, ImageDraw
+
+from parsers.fake_device import FakeDevice
+from parsers.ocr import OcrCache, OcrPipeline, dhash
+from parsers.youtube_parser import YoutubeParser
+
+
+class Engine:
+    """Движок OCR, считающий вызовы; возвращает заданный текст."""
+
+    def __init__(self, text: str = "Comments") -> None:
+        self.text = text
+        self.calls = 0
+        self.sizes = []
+
+    def image_to_data(self, image: Image.Image, lang: str):
+        self.calls += 1
+        self.sizes.append((image.mode, image.size))
+        return {"text": [self.text]}
+
+
+def frame(label: str = "", dark: bool = False) -> Image.Image:
+    image = Image.new("RGB", (200, 400), (15, 15, 15) if dark else (255, 255, 255))
+    if label:
+        ImageDraw.Draw(image).rectangle((20, 180, 20 + 12 * len(label), 220), fill=(128, 128, 128) if dark else (0, 0, 0))
+    return image
+
+
+def test_prepare_crops_to_region_and_converts_to_grayscale():
+    pipeline = OcrPipeline(region=(0.0, 0.25, 1.0, 0.75), contrast=1.0)
+    image = pipeline.prepare(frame())
+
+    assert image.size == (200, 200)
+    assert image.mode == "L"
+    assert set(pipeline.timings) == {"crop", "grayscale"}
+
+
+def test_prepare_skips_vertical_crop_for_cropped_rows():
+    pipeline = OcrPipeline(region=(0.0, 0.25, 0.5, 0.75), contrast=1.0)
+    assert pipeline.prepare(frame(), rows_cropped=True).size == (100, 400)
+
+
+def test_prepare_inverts_dark_theme_and_binarizes():
+    pipeline = OcrPipeline(region=None, threshold=128, contrast=1.0)
+    image = pipeline.prepare(frame(dark=True))
+
+    assert image.mode == "1"
+    # Тёмный фон после инверсии - светлый
+    assert image.getpixel((0, 0)) == 255
+    assert list(pipeline.timings) == ["grayscale", "binarize"]
+
+
+def test_prepare_scales():
+    pipeline = OcrPipeline(region=None, grayscale=False, scale=0.5, contrast=1.0)
+    assert pipeline.prepare(frame()).size == (100, 200)
+
+
+def test_invalid_region_and_scale():
+    with pytest.raises(ValueError):
+        OcrPipeline(region=(0.5, 0.0, 0.4, 1.0))
+    with pytest.raises(ValueError):
+        OcrPipeline(scale=0)
+
+
+def test_dhash_is_stable_and_changes_with_label():
+    assert dhash(frame("Comments")) == dhash(frame("Comments"))
+    assert bin(dhash(frame("Comments")) ^ dhash(frame())).count("1") > 2
+
+
+def test_cache_hit_and_miss():
+    engine = Engine()
+    cache = OcrCache()
+    pipeline = OcrPipeline(engine=engine, cache=cache)
+
+    first = pipeline.recognize(frame("Comments"), lang="eng")
+    second = pipeline.recognize(frame("Comments"), lang="eng")
+    pipeline.recognize(frame("Comments"), lang="rus")
+    pipeline.recognize(frame(), lang="eng")
+
+    assert first is second
+    assert engine.calls == 3
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
+    assert "ocr" not in OcrPipeline(engine=engine, cache=cache).timings
+
+
+def test_cache_evicts_least_recent():
+    cache = OcrCache(capacity=2, threshold=0)
+    for value in (1, 2, 3):
+        cache.put(("eng", value), {"value": value})
+
+    assert cache.get(("eng", 1)) is None
+    assert cache.get(("eng", 3)) == {"value": 3}
+
+
+def test_cache_clear_keeps_counters():
+    cache = OcrCache()
+    cache.put(("eng", 1), {})
+    cache.get(("eng", 1))
+    cache.clear()
+
+    assert cache.get(("eng", 1)) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_cache_is_scoped_to_one_link():
+    device = FakeDevice(latency=0, jitter=0, load_time=0)
+    engine = Engine("Comments")
+    parser = YoutubeParser(device, parsing="links", ocr_pipeline=OcrPipeline(engine=engine, cache=OcrCache()), shell_sessions=0)
+    parser.HIERARCHY_TIMEOUT = 0
+    parser.OCR_INTERVAL = 0
+    parser.classify_by_hierarchy = lambda previous_signature=None: None
+
+    assert parser.wait_load_video() == "comments"
+    calls = engine.calls
+
+    # Следующее видео с тем же кадром: результат предыдущей ссылки не используется
+    engine.text = "Sponsored"
+    assert parser.wait_load_video() == "sponsored"
+    assert engine.calls == calls + 1
+
+
+def test_legacy_pipeline_keeps_full_color_frame():
+    engine = Engine()
+    pipeline = OcrPipeline.legacy(scale=True, engine=engine)
+    pipeline.recognize(frame(), lang="eng")
+
+    assert engine.sizes == [("RGB", (800, 1600))]
+    assert OcrPipeline.legacy().prepare(frame()).size == (200, 400)
+
+
+def test_get_screen_data_without_pipeline_uses_legacy_processing():
+    engine = Engine("Sponsored")
+    data = YoutubeParser.get_screen_data(frame(), lang="eng", engine=engine)
+
+    assert data == {"text": ["Sponsored"]}
+    assert engine.sizes == [("RGB", (200, 400))]
+
+
+@pytest.mark.parametrize("text, result", [
+    ("Like Dislike Comments 1.2K", "comments"),
+    ("KEY CONCEPTS", "concept"),
+    ("Sponsored · Ad", "sponsored"),
+    ("Subscribe", None),
+])
+def test_recognize_frame_maps_labels(text, result):
+    parser = YoutubeParser(
+        FakeDevice(latency=0, jitter=0), parsing="links",
+        ocr_pipeline=OcrPipeline(engine=Engine(text)), shell_sessions=0,
+    )
+    assert parser.recognize_frame(frame(), rows_cropped=False) == result
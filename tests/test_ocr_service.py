@@ -0,0 +1,79 @@
+import os
+import threading
+
+import pytest
+from PIL import Image
+
+from parsers.ocr_service import OcrService, tsv_to_dict
+
+
+def answer(service: OcrService, responses) -> None:
+    """Отвечает на один запрос вместо процесса движка, перед ответом кладёт устаревший."""
+    client_id, request_id, lang, mode, size, payload, _ = service._requests.get(timeout=5)
+    queue = service._responses[client_id]
+    for response in responses(request_id):
+        queue.put(response)
+
+
+def test_stale_response_from_previous_process_is_dropped():
+    service = OcrService(engines=1, max_clients=2, timeout=5)
+    client = service.client("device-1")
+
+    # Ответ на запрос с тем же номером, но от упавшего процесса устройства
+    stale = lambda request_id: [
+        ((os.getpid() + 1, request_id[1]), {"text": ["stale"]}, None),
+        (request_id, {"text": ["fresh"]}, None),
+    ]
+    thread = threading.Thread(target=answer, args=(service, stale))
+    thread.start()
+    data = client.image_to_data(Image.new("L", (4, 4)), lang="eng")
+    thread.join()
+
+    assert data == {"text": ["fresh"]}
+
+
+def test_request_ids_include_process_id():
+    service = OcrService(engines=1, timeout=5)
+    client = service.client("device-1")
+    ids = []
+
+    def record(request_id):
+        ids.append(request_id)
+        return [(request_id, {}, None)]
+
+    for _ in range(2):
+        thread = threading.Thread(target=answer, args=(service, record))
+        thread.start()
+        client.image_to_data(Image.new("L", (2, 2)), lang="eng")
+        thread.join()
+
+    assert ids == [(os.getpid(), 0), (os.getpid(), 1)]
+
+
+def test_error_response_raises():
+    service = OcrService(engines=1, timeout=5)
+    client = service.client("device-1")
+    thread = threading.Thread(target=answer, args=(service, lambda request_id: [(request_id, None, "boom")]))
+    thread.start()
+    with pytest.raises(RuntimeError):
+        client.image_to_data(Image.new("L", (2, 2)), lang="eng")
+    thread.join()
+
+
+def test_clients_are_created_on_demand_by_name():
+    service = OcrService(engines=1, max_clients=2)
+    service._processes.append(object())  # Сервис уже запущен
+
+    first = service.client("device-1")
+    assert service.client("device-1") is first
+    assert service.client("device-2").client_id != first.client_id
+    with pytest.raises(RuntimeError):
+        service.client("device-3")
+    service._processes.clear()
+
+
+def test_tsv_to_dict():
+    data = tsv_to_dict("5\t1\t1\t1\t1\t1\t10\t20\t30\t40\t96.5\tComments\n5\t1\t1\t1\t1\t2\t50\t20\t30\t40\t-1\n")
+    assert data["text"] == ["Comments", ""]
+    assert data["conf"] == [96.5, -1.0]
+    assert data["left"] == [10, 50]
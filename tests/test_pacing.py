@@ -0,0 +1,58 @@
+import threading
+import time
+
+from parsers.fake_device import FakeDevice
+from parsers.pacing import Pacer
+
+
+def make_pacer(device: FakeDevice, stop_event=None) -> Pacer:
+    return Pacer(device, stop_event=stop_event, interval=0.01)
+
+
+def test_wait_returns_as_soon_as_condition_holds():
+    pacer = make_pacer(FakeDevice(latency=0, jitter=0))
+    calls = iter([False, False, True])
+
+    assert pacer.wait_until("ready", lambda: next(calls), timeout=5)
+    name, seconds, satisfied = pacer.records[-1]
+    assert (name, satisfied) == ("ready", True)
+    assert seconds < 1
+
+
+def test_wait_is_bounded_by_timeout():
+    pacer = make_pacer(FakeDevice(latency=0, jitter=0))
+    started = time.monotonic()
+
+    assert not pacer.wait_until("never", lambda: False, timeout=0.1)
+    assert 0.1 <= time.monotonic() - started < 0.5
+    assert pacer.records[-1][2] is False
+
+
+def test_wait_stops_on_stop_event():
+    stop_event = threading.Event()
+    pacer = make_pacer(FakeDevice(latency=0, jitter=0), stop_event=stop_event)
+    threading.Timer(0.05, stop_event.set).start()
+    started = time.monotonic()
+
+    assert not pacer.wait_until("stopped", lambda: False, timeout=10)
+    assert time.monotonic() - started < 1
+
+
+def test_stable_hierarchy_keeps_last_dump():
+    device = FakeDevice(latency=0, jitter=0)
+    pacer = make_pacer(device)
+
+    assert pacer.wait_for_stable_hierarchy("settle", timeout=1)
+    assert device.rpc_calls["dump_hierarchy"] == 2
+    assert pacer.last_hierarchy == device.current_hierarchy()
+
+
+def test_refresh_waits_for_spinner_to_disappear():
+    device = FakeDevice(latency=0, jitter=0, load_time=0.2)
+    device.shell('am start -a android.intent.action.VIEW -d "https://youtu.be/aaaaaaaaaaa"')
+    pacer = make_pacer(device)
+    started = time.monotonic()
+
+    assert pacer.wait_for_refresh("refresh", timeout=2)
+    assert time.monotonic() - started >= 0.2
+    assert "ProgressBar" not in pacer.last_hierarchy
@@ -0,0 +1,64 @@
+import threading
+
+from argparse import Namespace
+
+import pytest
+
+import replay
+from parsers.fake_device import FakeDevice
+from parsers.recording import RecordingDevice, SessionRecorder, SessionRecording
+from parsers.utils import create_parser
+
+
+def record_session(path: str, parsing: str, seconds: float, parser_options: dict) -> FakeDevice:
+    fake = FakeDevice(latency=0, jitter=0, load_time=0)
+    recorder = SessionRecorder(path, header=dict(parsing=parsing, duration=0.05, parser_options=parser_options))
+    stop_event = threading.Event()
+    parser = create_parser(
+        device=RecordingDevice(fake, recorder), duration=0.05, parsing=parsing,
+        stop_event=stop_event, **parser_options,
+    )
+    threading.Timer(seconds, stop_event.set).start()
+    parser.run()
+    recorder.close()
+    return fake
+
+
+def test_header_is_first_block(tmp_path):
+    path = str(tmp_path / "session.gasrec")
+    recorder = SessionRecorder(path, header={"parsing": "google", "parser_options": {"gesture_batch": 4}})
+    recorder.write_json("call", {"method": "info"})
+    recorder.close()
+
+    recording = SessionRecording(path)
+    assert recording.header() == {"parsing": "google", "parser_options": {"gesture_batch": 4}}
+    assert next(iter(recording)).kind == "mark"
+    recording.close()
+
+    SessionRecorder(path).close()
+    assert SessionRecording(path).header() == {}
+
+
+def test_replay_uses_recorded_parser_options(tmp_path):
+    path = str(tmp_path / "session.gasrec")
+    layout_cache = tmp_path / "layout.json"
+    options = dict(gesture_batch=4, layout_cache=str(layout_cache), governor_interval=0.0)
+    record_session(path, "recommendations", 1.0, options)
+    layout_cache.unlink()
+
+    summary = replay.replay(path, Namespace(parsing=None, duration=None, gesture_batch=None, ocr="recorded"))
+
+    assert summary["parsing"] == "recommendations"
+    assert summary["parser_options"] == options
+    # Свайпы воспроизводятся пакетами, как при записи, а не отдельными RPC
+    assert summary["calls"].get("shell", 0) > 0
+    assert "swipe_points" not in summary["calls"]
+    # Кеш раскладок при воспроизведении временный
+    assert not layout_cache.exists()
+
+
+def test_raw_capture_cannot_be_recorded(tmp_path):
+    recorder = SessionRecorder(str(tmp_path / "session.gasrec"))
+    with pytest.raises(ValueError):
+        create_parser(device=RecordingDevice(FakeDevice(), recorder), duration=0.05, parsing="links", capture="raw")
+    recorder.close()
@@ -0,0 +1,103 @@
+import re
+import struct
+
+import pytest
+
+from parsers.screencap import RawScreenCapture, parse_header, parse_raw_screencap
+
+
+def dump(width: int, height: int, pixel_format: int, bytes_per_pixel: int, header_size: int = 16) -> bytes:
+    """Синтетический вывод `screencap`: заголовок и пиксели с номером байта."""
+    header = struct.pack("<III", width, height, pixel_format)
+    if header_size == 16:
+        header += struct.pack("<I", 0)
+    pixels = bytes(index % 251 for index in range(width * height * bytes_per_pixel))
+    return header + pixels
+
+
+@pytest.mark.parametrize("header_size", [16, 12])
+def test_parse_header_detects_header_size(header_size):
+    data = dump(3, 2, 1, 4, header_size)
+    assert parse_header(data, total_size=len(data)) == (3, 2, 1, header_size)
+
+
+@pytest.mark.parametrize("pixel_format, bytes_per_pixel", [(1, 4), (2, 4), (3, 3), (4, 2), (5, 4)])
+def test_parse_raw_screencap_pixel_formats(pixel_format, bytes_per_pixel):
+    data = dump(5, 3, pixel_format, bytes_per_pixel)
+    frame = parse_raw_screencap(data)
+
+    assert (frame.width, frame.height, frame.pixel_format) == (5, 3, pixel_format)
+    assert frame.bytes_per_pixel == bytes_per_pixel
+    assert bytes(frame.pixels) == data[16:]
+    assert frame.to_image().size == (5, 3)
+
+
+def test_parse_header_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        parse_header(struct.pack("<IIII", 2, 2, 99, 0))
+
+
+def test_parse_header_rejects_short_header():
+    with pytest.raises(ValueError):
+        parse_header(b"\x01\x00\x00\x00")
+
+
+@pytest.mark.parametrize("extra", [-1, 1, 8])
+def test_parse_raw_screencap_rejects_bad_length(extra):
+    data = dump(4, 4, 1, 4)
+    data = data[:extra] if extra < 0 else data + bytes(extra)
+    with pytest.raises(ValueError):
+        parse_raw_screencap(data)
+
+
+class ShellScreencap:
+    """Выполняет команды RawScreenCapture над текущим синтетическим кадром."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.commands = []
+
+    def __call__(self, command: str) -> bytes:
+        self.commands.append(command)
+        if command == "screencap":
+            return self.data
+        header_size = int(re.search(r"count=(\d+)", command).group(1))
+        start = int(re.search(r"tail -c \+(\d+)", command).group(1)) - 1
+        size = int(re.search(r"head -c (\d+)", command).group(1))
+        pixels = self.data[header_size:]
+        return self.data[:header_size] + pixels[start:start + size]
+
+
+class Device:
+    serial = "test"
+
+
+def make_capture(data: bytes) -> RawScreenCapture:
+    capture = RawScreenCapture(Device(), rows=(0.5, 1.0))
+    capture._exec = ShellScreencap(data)
+    return capture
+
+
+def test_band_capture_uses_cached_geometry():
+    data = dump(4, 4, 1, 4)
+    capture = make_capture(data)
+
+    first = capture.capture()
+    second = capture.capture()
+
+    assert capture._exec.commands[1] != "screencap"
+    assert (second.width, second.height, second.top) == (4, 2, 2)
+    assert bytes(second.pixels) == bytes(first.pixels) == data[16 + 2 * 4 * 4:]
+
+
+def test_band_capture_refetches_after_rotation_with_same_size():
+    capture = make_capture(dump(4, 2, 1, 4))
+    capture.capture()
+
+    rotated = dump(2, 4, 1, 4)
+    capture._exec.data = rotated
+    frame = capture.capture()
+
+    assert capture._exec.commands[-1] == "screencap"
+    assert (frame.width, frame.height, frame.top) == (2, 2, 2)
+    assert bytes(frame.pixels) == rotated[16 + 2 * 2 * 4:]
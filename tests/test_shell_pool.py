@@ -0,0 +1,154 @@
+import pytest
+
+from parsers.shell_pool import ShellPool, ShellSession
+from tests.local_shell import LocalDevice
+
+
+class BrokenAdbDevice:
+    def __init__(self) -> None:
+        self.opened = 0
+
+    def open_transport(self):
+        self.opened += 1
+        raise ConnectionRefusedError("exec: не поддерживается")
+
+
+class FallbackDevice:
+    """Устройство без постоянных сессий: только device.shell и app_start/app_stop."""
+
+    def __init__(self) -> None:
+        self.serial = "fallback-0"
+        self.calls = []
+
+    def shell(self, command: str, timeout: float = 60.0) -> str:
+        self.calls.append(("shell", command))
+        return f"out:{command}"
+
+    def app_start(self, package_name: str) -> None:
+        self.calls.append(("app_start", package_name))
+
+    def app_stop(self, package_name: str) -> None:
+        self.calls.append(("app_stop", package_name))
+
+
+@pytest.fixture
+def device():
+    device = LocalDevice()
+    adb_device = device.adb_device
+    yield device
+    for transport in adb_device.transports:
+        transport.close()
+
+
+def test_session_splits_output_by_markers(device):
+    session = ShellSession(device)
+    results = session.run_many(["echo one; echo two", "echo err >&2; (exit 3)", "printf 'no newline'", "true # comment"])
+    session.close()
+
+    assert [result.output for result in results] == ["one\ntwo\n", "err\n", "no newline", ""]
+    assert [result.exit_code for result in results] == [0, 3, 0, 0]
+    assert len(device.adb_device.transports) == 1
+
+
+def test_session_commands_do_not_read_session_stdin(device):
+    session = ShellSession(device)
+    first, second = session.run_many(["cat", "echo after"])
+    session.close()
+
+    assert first.output == ""
+    assert second.output == "after\n"
+
+
+def test_session_timeout_closes_session(device):
+    session = ShellSession(device)
+    with pytest.raises(TimeoutError):
+        session.run("sleep 2", timeout=0.1)
+    assert not session.connected
+
+    # Следующая команда идёт по новому соединению без остатков прошлого вывода
+    assert session.run("echo fresh").output == "fresh\n"
+    assert len(device.adb_device.transports) == 2
+    session.close()
+
+
+def test_pool_keeps_state_between_commands(device):
+    pool = ShellPool(device, size=1)
+    pool.run("export PARSER_VALUE=42")
+    result = pool.run("echo $PARSER_VALUE")
+    pool.close()
+
+    assert pool.enabled
+    assert result.output == "42\n"
+    assert device.shell_commands == []
+    assert len(device.adb_device.transports) == 1
+
+
+def test_pool_reconnects_after_broken_session(device):
+    pool = ShellPool(device, size=1)
+    pool.run("true")
+    device.adb_device.transports[0].process.kill()
+    device.adb_device.transports[0].process.wait()
+
+    assert pool.run("echo again").output == "again\n"
+    assert pool.enabled
+    assert len(device.adb_device.transports) == 2
+    pool.close()
+
+
+def test_pool_does_not_retry_timeout(device):
+    pool = ShellPool(device, size=1)
+    with pytest.raises(TimeoutError):
+        pool.run("sleep 2", timeout=0.1)
+
+    assert pool.enabled
+    assert len(device.adb_device.transports) == 1
+    assert device.shell_commands == []
+    pool.close()
+
+
+def test_pool_falls_back_when_sessions_fail(device):
+    device.adb_device = BrokenAdbDevice()
+    pool = ShellPool(device, size=1)
+
+    assert pool.run("echo fallback").output == "fallback\n"
+    assert not pool.enabled
+    assert device.adb_device.opened == 2
+    assert device.shell_commands == ["echo fallback"]
+
+    pool.run("true")
+    assert device.adb_device.opened == 2
+
+
+def test_pool_without_adb_uses_device_methods():
+    device = FallbackDevice()
+    pool = ShellPool(device)
+
+    results = pool.run_many(["a", "b"])
+    pool.app_start("com.example")
+    pool.app_stop("com.example")
+
+    assert not pool.enabled
+    assert [(result.output, result.exit_code) for result in results] == [("out:a", 0), ("out:b", 0)]
+    assert device.calls == [("shell", "a"), ("shell", "b"), ("app_start", "com.example"), ("app_stop", "com.example")]
+
+
+def test_pool_disabled_while_recording(device):
+    device.recorder = object()
+    assert not ShellPool(device).enabled
+    assert not ShellPool(LocalDevice(), size=0).enabled
+
+
+def test_app_start_and_stop_in_session(device, tmp_path):
+    log = tmp_path / "am.log"
+    pool = ShellPool(device, size=1)
+    pool.run(f'monkey() {{ echo "monkey $*" >> {log}; }}; am() {{ echo "am $*" >> {log}; }}')
+
+    pool.app_start("com.example")
+    pool.app_stop("com.example")
+    pool.close()
+
+    assert log.read_text().splitlines() == [
+        "monkey -p com.example -c android.intent.category.LAUNCHER 1",
+        "am force-stop com.example",
+    ]
+    assert device.shell_commands == []
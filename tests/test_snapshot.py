@@ -0,0 +1,60 @@
+import pytest
+
+from parsers.fake_device import FakeDevice
+from parsers.snapshot import HierarchySnapshot, parse_bounds
+from parsers.youtube_parser import YoutubeParser
+
+
+XML = """<?xml version="1.0" encoding="UTF-8"?>
+<hierarchy rotation="0">
+  <node resource-id="app:id/list" class="android.widget.ListView" content-desc="" text="" bounds="[0,0][1080,2000]">
+    <node resource-id="app:id/item" class="android.widget.TextView" content-desc="" text="First" bounds="[0,0][1080,100]" />
+    <node resource-id="app:id/item" class="android.widget.TextView" content-desc="More stories" text="Second" bounds="[0,100][1080,200]" />
+    <node resource-id="" class="android.widget.Button" content-desc="Home" text="" bounds="[-10,1900][200,2000]" />
+    <node resource-id="app:id/empty" class="android.view.View" content-desc="" text="" bounds="" />
+  </node>
+</hierarchy>
+"""
+
+
+def test_selectors_match_all_criteria():
+    snapshot = HierarchySnapshot(XML)
+
+    assert snapshot.find(resourceId="app:id/item")["text"] == "First"
+    assert snapshot.find(resourceId="app:id/item", text="Second")["content-desc"] == "More stories"
+    assert snapshot.exists(description="Home", className="android.widget.Button")
+    assert not snapshot.exists(description="Home", className="android.view.View")
+    assert not snapshot.exists(description="More")
+    assert snapshot.exists(text="First")
+
+
+def test_bounds_and_center():
+    snapshot = HierarchySnapshot(XML)
+
+    assert snapshot.bounds(description="Home") == (-10, 1900, 200, 2000)
+    assert snapshot.center(resourceId="app:id/item", text="Second") == (540, 150)
+    with pytest.raises(LookupError):
+        snapshot.bounds(resourceId="app:id/empty")
+    with pytest.raises(LookupError):
+        snapshot.bounds(resourceId="app:id/missing")
+
+
+def test_broken_xml_gives_empty_snapshot():
+    snapshot = HierarchySnapshot("<hierarchy><node")
+    assert snapshot.nodes == []
+    assert not snapshot.exists(resourceId="app:id/item")
+
+
+def test_parse_bounds():
+    assert parse_bounds("[1,2][3,4]") == (1, 2, 3, 4)
+    assert parse_bounds("") is None
+    assert parse_bounds(None) is None
+
+
+def test_snapshot_agrees_with_device_selectors():
+    device = FakeDevice(latency=0, jitter=0)
+    snapshot = HierarchySnapshot.capture(device)
+
+    for resource_id in (YoutubeParser.REC_TOP_OBJECT, YoutubeParser.REC_BOTTOM_OBJECT, YoutubeParser.LINK_BOTTOM_OBJECT):
+        assert snapshot.bounds(resourceId=resource_id) == tuple(device(resourceId=resource_id).bounds())
+    assert device.rpc_calls["dump_hierarchy"] == 1
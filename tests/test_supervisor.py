@@ -0,0 +1,147 @@
+import threading
+
+import pytest
+
+from parsers import supervisor
+from parsers.supervisor import Supervisor
+
+
+class Watcher:
+    def __init__(self, online=()) -> None:
+        self.devices = set(online)
+        self.changed = threading.Event()
+
+    def online(self):
+        return set(self.devices)
+
+    def start(self):
+        return self
+
+    def stop(self) -> None:
+        pass
+
+
+class FakeProcess:
+    def __init__(self, serials) -> None:
+        self.serials = serials
+        self.alive = True
+        self.exitcode = None
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def crash(self, exitcode: int = 1) -> None:
+        self.alive = False
+        self.exitcode = exitcode
+
+    def join(self, timeout=None) -> None:
+        pass
+
+    def terminate(self) -> None:
+        self.crash(-15)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(supervisor.time, "monotonic", clock)
+    return clock
+
+
+def make_supervisor(watcher: Watcher, **kwargs):
+    started = []
+    exited = []
+
+    def start_unit(name, serials, stop_event):
+        process = FakeProcess(list(serials))
+        started.append((name, process))
+        return process
+
+    instance = Supervisor(
+        ["a", "b"], start_unit, on_exit=lambda name, serials: exited.append((name, serials)),
+        backoff=5.0, max_backoff=20.0, stable_after=600.0, watcher=watcher, **kwargs,
+    )
+    return instance, started, exited
+
+
+def test_crashed_unit_restarts_with_exponential_backoff(clock):
+    instance, started, exited = make_supervisor(Watcher(["a"]))
+    instance._step()
+    assert [name for name, _ in started] == ["a"]
+
+    delays = []
+    for _ in range(4):
+        started[-1][1].crash()
+        instance._step()
+        restart_at = instance.units["a"].next_start
+        delays.append(restart_at - clock.now)
+
+        clock.now = restart_at - 0.1
+        instance._step()
+        clock.now = restart_at
+        instance._step()
+
+    assert delays == [5.0, 10.0, 20.0, 20.0]
+    assert len(started) == 5
+    assert exited == [("a", ["a"])] * 4
+
+
+def test_failures_reset_after_stable_run(clock):
+    instance, started, _ = make_supervisor(Watcher(["a"]))
+    instance._step()
+    started[-1][1].crash()
+    instance._step()
+    clock.now = instance.units["a"].next_start
+    instance._step()
+
+    clock.now += 600
+    started[-1][1].crash()
+    instance._step()
+    assert instance.units["a"].next_start - clock.now == 5.0
+
+
+def test_hot_plug_and_unplug(clock):
+    watcher = Watcher()
+    instance, started, exited = make_supervisor(watcher)
+    instance._step()
+    assert started == []
+
+    watcher.devices = {"a", "b", "c"}
+    instance._step()
+    assert sorted(name for name, _ in started) == ["a", "b"]
+
+    watcher.devices = {"b"}
+    instance._step()
+    assert ("a", ["a"]) in exited
+    assert instance.alive() == ["b"]
+
+
+def test_group_restarts_when_its_devices_change(clock):
+    watcher = Watcher(["a"])
+    instance, started, exited = make_supervisor(watcher, loops=1)
+    instance._step()
+    assert [(name, process.serials) for name, process in started] == [("loop-0", ["a"])]
+
+    watcher.devices = {"a", "b"}
+    instance._step()
+    assert exited == [("loop-0", ["a"])]
+    assert started[-1][1].serials == ["a", "b"]
+
+
+def test_no_restart_when_work_is_finished(clock):
+    instance, started, _ = make_supervisor(Watcher(["a"]), finished=lambda: len(started) > 0)
+    instance._step()
+    started[-1][1].crash(0)
+    clock.now += 100
+    instance._step()
+
+    assert len(started) == 1
+    assert instance.alive() == []
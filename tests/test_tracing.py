@@ -0,0 +1,63 @@
+import json
+import time
+
+from parsers.fake_device import FakeDevice
+from parsers.instrumented_device import InstrumentedDevice
+from parsers.tracing import Tracer, trace_parser
+from parsers.youtube_parser import YoutubeParser
+
+
+def read_events(path) -> list:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def test_nested_spans_and_self_time(tmp_path):
+    path = tmp_path / "trace.json"
+    tracer = Tracer(str(path), "s1")
+    with tracer.span("process_link", "parser"):
+        time.sleep(0.05)
+        with tracer.span("recognize", "ocr", frame=1):
+            time.sleep(0.1)
+    tracer.close()
+
+    events = read_events(path)
+    spans = {event["name"]: event for event in events if event["ph"] == "X"}
+    assert spans["recognize"]["args"] == {"frame": 1}
+    assert spans["process_link"]["ts"] <= spans["recognize"]["ts"]
+    assert spans["process_link"]["dur"] >= spans["recognize"]["dur"]
+
+    # Собственное время родителя - без вложенного интервала
+    assert 0.05 <= tracer.self_seconds["parser"] < 0.1
+    assert tracer.self_seconds["ocr"] >= 0.1
+    assert events[-1]["name"] == "self_seconds"
+    assert events[0]["args"] == {"name": "s1"}
+
+
+def test_unclosed_trace_is_still_an_event_array(tmp_path):
+    path = tmp_path / "trace.json"
+    tracer = Tracer(str(path), "s1")
+    with tracer.span("swipe", "gesture"):
+        pass
+    tracer._file.flush()
+
+    text = path.read_text(encoding="utf-8")
+    assert json.loads(text + "\n]")[-1]["name"] == "swipe"
+    tracer.close()
+
+
+def test_trace_parser_records_phases_and_rpcs(tmp_path):
+    path = tmp_path / "trace.json"
+    tracer = Tracer(str(path), "fake-0")
+    device = InstrumentedDevice(FakeDevice(latency=0, jitter=0), observers=[tracer.observe_rpc])
+    parser = YoutubeParser(device, parsing="recommendations", shell_sessions=0)
+    trace_parser(parser, tracer)
+
+    parser.update_feed_bounds()
+    parser.swipe_series(count=2, duration=0.01)
+    parser.pacer.wait_for_stable_hierarchy("feed_settle", timeout=1)
+    tracer.close()
+
+    names = [event["name"] for event in read_events(path) if event["ph"] == "X"]
+    assert {"update_feed_bounds", "swipe_series", "swipe", "feed_settle", "dump_hierarchy"} <= set(names)
+    assert set(tracer.summary()) >= {"gesture", "rpc", "wait", "layout"}
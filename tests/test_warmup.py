@@ -0,0 +1,88 @@
+import threading
+
+from parsers.fake_device import FakeDevice
+from parsers.warmup import LOCKED_PACKAGE_NAME, wait_for_unlock, warm_up
+from tests.local_shell import LocalDevice
+
+
+AWAKE = "mWakefulness=Awake"
+ASLEEP = "mWakefulness=Asleep"
+KEYGUARD_HIDDEN = "mShowingLockscreen=false"
+KEYGUARD_SHOWN = "mShowingLockscreen=true"
+
+
+class DumpsysDevice(LocalDevice):
+    """Локальное устройство, где `dumpsys power` и `dumpsys window` выводят заданный текст."""
+
+    def __init__(self, power: str, window: str, packages=("com.google.android.youtube",)) -> None:
+        super().__init__()
+        self.power = power
+        self.window = window
+        self.packages = list(packages)
+        self.info_calls = 0
+
+    def shell(self, command: str, timeout: float = 60.0) -> str:
+        dumpsys = (
+            f'dumpsys() {{ if [ "$1" = power ]; then echo "{self.power}"; else echo "{self.window}"; fi; }}; '
+        )
+        return super().shell(dumpsys + command, timeout=timeout)
+
+    @property
+    def info(self):
+        self.info_calls += 1
+        package = self.packages.pop(0) if len(self.packages) > 1 else self.packages[0]
+        return {"currentPackageName": package}
+
+
+def test_unlocked_device_is_detected_on_device():
+    device = DumpsysDevice(power=AWAKE, window=KEYGUARD_HIDDEN)
+    assert wait_for_unlock(device, chunk=1.0)
+    assert device.info_calls == 0
+
+
+def test_locked_device_waits_until_stop():
+    device = DumpsysDevice(power=AWAKE, window=KEYGUARD_SHOWN)
+    stop_event = threading.Event()
+    threading.Timer(0.5, stop_event.set).start()
+
+    assert not wait_for_unlock(device, stop_event=stop_event, chunk=0.4)
+    assert device.info_calls == 0
+
+
+def test_unknown_dumpsys_output_falls_back_to_polling():
+    # Ни одного известного поля: раньше такой экран считался выключенным бесконечно
+    device = DumpsysDevice(
+        power="Power Manager State:", window="WINDOW MANAGER POLICY STATE",
+        packages=(LOCKED_PACKAGE_NAME, "com.google.android.youtube"),
+    )
+    assert wait_for_unlock(device, chunk=30.0)
+    assert device.info_calls == 2
+    assert len(device.shell_commands) == 1
+
+
+def test_asleep_device_is_locked_not_unknown():
+    device = DumpsysDevice(power=ASLEEP, window=KEYGUARD_HIDDEN)
+    stop_event = threading.Event()
+    threading.Timer(0.3, stop_event.set).start()
+
+    assert not wait_for_unlock(device, stop_event=stop_event, chunk=0.2)
+    assert device.info_calls == 0
+
+
+def test_warm_up_overlaps_agent_start_with_unlock_and_app_start():
+    device = FakeDevice(latency=0.1, jitter=0)
+    timings = warm_up(device, "com.google.android.youtube")
+
+    assert set(timings) == {"agent", "unlock", "app_start", "ready"}
+    assert device.current_package == "com.google.android.youtube"
+    # Агент (один RPC) запускается параллельно с остальными этапами
+    assert timings["ready"] < timings["agent"] + timings["unlock"] + timings["app_start"]
+
+
+def test_warm_up_returns_none_when_stopped():
+    stop_event = threading.Event()
+    stop_event.set()
+    device = DumpsysDevice(power=AWAKE, window=KEYGUARD_SHOWN)
+    device.app_start = lambda package_name: None
+
+    assert warm_up(device, "com.google.android.youtube", stop_event=stop_event) is None